@@ -27,6 +27,7 @@ import shutil
 import argparse
 
 import odatix.lib.printc as printc
+from odatix.lib.trash import Trash
 from odatix.lib.utils import read_from_list, KeyNotInListError, BadValueInListError
 from odatix.lib.settings import OdatixSettings
 
@@ -43,6 +44,7 @@ def add_arguments(parser):
   parser.add_argument("-f", "--force", action="store_true", help="force delete (dangerous!)")
   parser.add_argument("-v", "--verbose", action="store_true", help="print extra details")
   parser.add_argument("-q", "--quiet", action="store_true", help="do not print anything, except errors")
+  parser.add_argument("-j", "--jobs", type=int, default=1, help="number of parallel deletion jobs (default: 1)")
   parser.add_argument(
     "-c",
     "--config",
@@ -59,7 +61,7 @@ def parse_arguments():
 # Helper Functions
 ######################################
 
-def remove_path(path, force=False, verbose=False, quiet=False):
+def remove_path(path, force=False, verbose=False, quiet=False, trash=None):
       
   cwd = os.getcwd()
   full_path = os.path.realpath(os.path.join(cwd, path))
@@ -87,9 +89,14 @@ def remove_path(path, force=False, verbose=False, quiet=False):
         if not quiet:
           printc.say("Removed \"" + p + "\" (file)", script_name=script_name)
       elif os.path.isdir(p):
-        shutil.rmtree(p)
-        if not quiet:
-          printc.say("Removed \"" + p + "\" (directory)", script_name=script_name)
+        if trash is not None:
+          trash.remove(p)
+          if not quiet:
+            printc.say("Removing \"" + p + "\" (directory)", script_name=script_name)
+        else:
+          shutil.rmtree(p)
+          if not quiet:
+            printc.say("Removed \"" + p + "\" (directory)", script_name=script_name)
       else:
         if verbose:
           printc.warning("Path \"" + p + "\" does not exist or is not accessible.", script_name=script_name)
@@ -102,7 +109,7 @@ def remove_path(path, force=False, verbose=False, quiet=False):
 # Clean
 ######################################
 
-def clean(settings_filename, force=False, verbose=False, quiet=False):
+def clean(settings_filename, force=False, verbose=False, quiet=False, nb_jobs=1):
   if not os.path.isfile(settings_filename):
     if not quiet:
       printc.note("There is no clean settings file \"" + settings_filename + "\" in \"" + os.path.realpath(".") + "\". Using default Odatix clean settings file", script_name)
@@ -128,8 +135,16 @@ def clean(settings_filename, force=False, verbose=False, quiet=False):
       printc.note("Are you missing dashes (-)?", script_name)
       sys.exit(-1)
 
+    # Directories are deleted by a pool of workers in parallel mode
+    trash = Trash(nb_workers=nb_jobs, purge=False) if nb_jobs > 1 else None
+
     for path in remove_list:
-      remove_path(path, force, verbose, quiet)
+      remove_path(path, force, verbose, quiet, trash)
+
+    if trash is not None:
+      trash.shutdown()
+      if not quiet:
+        printc.say("Done", script_name=script_name)
 
 ######################################
 # Main
@@ -149,7 +164,8 @@ def main(args, settings=None):
     settings_filename=args.input,
     force=args.force,
     verbose=args.verbose,
-    quiet=args.quiet
+    quiet=args.quiet,
+    nb_jobs=args.jobs
   )
 
 if __name__ == "__main__":
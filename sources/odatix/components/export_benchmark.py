@@ -24,8 +24,10 @@ import re
 import sys
 import yaml
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 from odatix.lib.settings import OdatixSettings
+from odatix.lib.utils import list_dirs, read_from_list, KeyNotInListError, BadValueInListError
 import odatix.lib.re_helper as rh
 import odatix.lib.printc as printc
 
@@ -35,6 +37,12 @@ import odatix.lib.printc as printc
 
 DEFAULT_BENCHMARK = "dhrystone"
 DEFAULT_SIM_FILE = "log/sim.log"
+DEFAULT_JOBS = os.cpu_count() or 1
+
+# below this number of variants, a process pool costs more than it saves
+min_variants_per_job = 4
+
+sim_settings_filename = "_settings.yml"
 
 status_done = 'Done: 100%'
 
@@ -52,6 +60,7 @@ def add_arguments(parser):
   parser.add_argument('-S', '--sim_file', default=DEFAULT_SIM_FILE, help='simulation log file (default: ' + DEFAULT_SIM_FILE + ')')
   parser.add_argument('-B', '--benchmark_file', help='output benchmark file')
   parser.add_argument('-w', '--work', help='simulation work directory')
+  parser.add_argument('-j', '--jobs', type=int, help='number of parallel extraction jobs (default: number of cpus)')
   parser.add_argument('-c', '--config', default=OdatixSettings.DEFAULT_SETTINGS_FILE, help='global settings file for Odatix (default: ' + OdatixSettings.DEFAULT_SETTINGS_FILE + ')')
 
 def parse_arguments():
@@ -79,6 +88,107 @@ def safe_cast(val, to_type, default=None):
 def get_dmips_per_mhz(file):
   return rh.get_re_group_from_file(file, dmips_per_mhz_pattern, group_id=2)
 
+def get_default_metrics(sim_file):
+  # Metrics of simulations without a 'metrics' section in their settings
+  return [{"name": "DMIPS_per_MHz", "file": sim_file, "pattern": dmips_per_mhz_pattern.pattern, "group_id": 2, "from_end": False, "format": None}]
+
+def get_benchmark_metrics(settings_filename, sim_file):
+  """
+  Read the optional 'metrics' section of a simulation settings file.
+  Metrics are regular expressions searched in the simulation logs, declared like in tool.yml:
+    metrics:
+      CoreMark_per_MHz:
+        type: regex
+        settings:
+          file: log/sim.log   # optional, defaults to the simulation log file
+          pattern: "CoreMark/MHz: ([0-9.]+)"
+          group_id: 1
+          from_end: true      # optional, search from the end of the file
+        format: "%.3f"        # optional
+  """
+  if settings_filename is None or not os.path.isfile(settings_filename):
+    return get_default_metrics(sim_file)
+  with open(settings_filename, "r") as f:
+    try:
+      settings_data = yaml.load(f, Loader=yaml.loader.SafeLoader)
+    except Exception as e:
+      printc.error('Settings file "' + settings_filename + '" is not a valid YAML file', script_name)
+      printc.cyan("error details: ", end="", script_name=script_name)
+      print(str(e))
+      return get_default_metrics(sim_file)
+  if not isinstance(settings_data, dict) or "metrics" not in settings_data:
+    return get_default_metrics(sim_file)
+
+  metrics = []
+  for name, content in (settings_data["metrics"] or {}).items():
+    try:
+      type = read_from_list("type", content, settings_filename, parent=name, script_name=script_name)
+      settings = read_from_list("settings", content, settings_filename, parent=name, script_name=script_name)
+      if type != "regex":
+        printc.error('Unsupported metric type "' + str(type) + '" specified for metric "' + name + '" in "' + settings_filename + '"', script_name)
+        continue
+      pattern = read_from_list("pattern", settings, settings_filename, parent=name + "[settings]", script_name=script_name)
+      group_id = read_from_list("group_id", settings, settings_filename, parent=name + "[settings]", type=int, script_name=script_name)
+      file = read_from_list("file", settings, settings_filename, parent=name + "[settings]", raise_if_missing=False, print_error=False, script_name=script_name)
+      from_end = read_from_list("from_end", settings, settings_filename, parent=name + "[settings]", raise_if_missing=False, print_error=False, type=bool, script_name=script_name)
+      re.compile(pattern)
+    except (KeyNotInListError, BadValueInListError):
+      continue
+    except re.error as e:
+      printc.error('Invalid pattern for metric "' + name + '" in "' + settings_filename + '": ' + str(e), script_name)
+      continue
+    metrics.append({
+      "name": name,
+      "file": file if file else sim_file,
+      "pattern": pattern,
+      "group_id": group_id,
+      "from_end": bool(from_end),
+      "format": content.get("format"),
+    })
+  return metrics
+
+def format_value(value, format):
+  if value is None:
+    return None
+  try:
+    if format is not None:
+      value = format % float(value)
+    if "." in value or "e" in value.lower():
+      return float(value)
+    return int(value)
+  except (ValueError, TypeError):
+    return value
+
+def extract_variant(task):
+  """
+  Extract the metrics of a variant, scanning each log file once per direction.
+  Returns the metrics, or None if the simulation log is missing.
+  """
+  cur_path, sim_file, metrics = task
+  if not os.path.exists(os.path.join(cur_path, sim_file)):
+    return None
+
+  values = {}
+  scans = {}
+  for metric in metrics:
+    scans.setdefault((metric["file"], metric["from_end"]), []).append(metric)
+  for (file, from_end), scan_metrics in scans.items():
+    patterns = [(metric["pattern"], metric["group_id"]) for metric in scan_metrics]
+    for metric, value in zip(scan_metrics, rh.scan_file(os.path.join(cur_path, file), patterns, from_end=from_end)):
+      values[metric["name"]] = format_value(value, metric["format"])
+  return {metric["name"]: values[metric["name"]] for metric in metrics}
+
+def extract_all(tasks, jobs):
+  # Yield the results in the order of the tasks
+  jobs = min(jobs, len(tasks) // min_variants_per_job)
+  if jobs <= 1:
+    for task in tasks:
+      yield extract_variant(task)
+    return
+  with ProcessPoolExecutor(max_workers=jobs) as executor:
+    for result in executor.map(extract_variant, tasks, chunksize=max(1, len(tasks) // (jobs * 4))):
+      yield result
+
 ######################################
 # Format functions
 ######################################
@@ -95,24 +205,23 @@ def cast_to_float(input):
   else:
     return safe_cast(input, float, 0.0)
 
-def write_to_yaml(input, sim_file, output_file):
+def write_to_yaml(input, sim_file, output_file, metrics, jobs=1):
   yaml_data = {}
 
-  for arch in sorted(next(os.walk(input))[1]):
+  tasks = []
+  variants = []
+  for arch in list_dirs(input):
     yaml_data[arch] = {}
-    for variant in sorted(next(os.walk(os.path.join(input, arch)))[1]):
+    for variant in list_dirs(os.path.join(input, arch)):
       cur_path = os.path.join(input, arch, variant)
-      cur_sim_file = os.path.join(cur_path, sim_file)
-
-      if not os.path.exists(cur_sim_file):
-        corrupted_directory(arch + '/' + variant)
-        continue
+      tasks.append((cur_path, sim_file, metrics))
+      variants.append((arch, variant))
 
-      dmips_per_mhz = get_dmips_per_mhz(cur_sim_file)
-      dmips_per_mhz = cast_to_float(dmips_per_mhz) if dmips_per_mhz != ' /  ' else ""
-      yaml_data[arch][variant] = {
-        'DMIPS_per_MHz': dmips_per_mhz,
-      }
+  for (arch, variant), values in zip(variants, extract_all(tasks, jobs)):
+    if values is None:
+      corrupted_directory(arch + '/' + variant)
+      continue
+    yaml_data[arch][variant] = values
 
   output_path = os.path.dirname(output_file)
   if not os.path.exists(output_path):
@@ -130,15 +239,18 @@ def write_to_yaml(input, sim_file, output_file):
 # Export Results
 ######################################
 
-def export_benchmark(input, output, benchmark, sim_file):
+def export_benchmark(input, output, benchmark, sim_file, sim_path=None, jobs=DEFAULT_JOBS):
   print(printc.colors.CYAN + "Export " +  benchmark + " results" + printc.colors.ENDC)
   input = os.path.join(input, benchmark)
   if not os.path.isdir(input):
     printc.error("input directory \"" + input + "\" does not exist", script_name)
     sys.exit(1)
 
+  settings_filename = os.path.join(sim_path, benchmark, sim_settings_filename) if sim_path is not None else None
+  metrics = get_benchmark_metrics(settings_filename, sim_file)
+
   #if format in ['yml']:
-  write_to_yaml(input, sim_file, output)
+  write_to_yaml(input, sim_file, output, metrics, jobs)
 
   print()
 
@@ -168,7 +280,9 @@ def main(args, settings=None):
     input=work,
     output=benchmark_file,
     benchmark=args.benchmark,
-    sim_file=args.sim_file
+    sim_file=args.sim_file,
+    sim_path=settings.sim_path,
+    jobs=args.jobs if args.jobs is not None else DEFAULT_JOBS,
   )
 
 if __name__ == "__main__":
@@ -19,33 +19,63 @@
 # along with Odatix. If not, see <https://www.gnu.org/licenses/>.
 #
 
+import io
 import os
+import mmap
 import sys
 import yaml
 import re
 import csv
+import pickle
+import hashlib
 import argparse
+import contextlib
+import threading
+import time
+import functools
+import fnmatch
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 import odatix.lib.printc as printc
-from odatix.lib.utils import read_from_list, create_dir, KeyNotInListError, BadValueInListError
+from odatix.lib.utils import read_from_list, create_dir, list_dirs, KeyNotInListError, BadValueInListError
 import odatix.lib.settings as settings
 from odatix.lib.settings import OdatixSettings
+from odatix.lib.retention import RetentionPolicy
+import odatix.lib.result_formats as result_formats
+from odatix.lib.operation import get_operation
+from odatix.lib.result_history import ResultHistory, history_filename, get_git_revision, get_tool_version
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
-banned_metrics = []
-banned_arch = []
+yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 ######################################
 # Settings
 ######################################
 
 DEFAULT_FORMAT = "yml"
+DEFAULT_JOBS = os.cpu_count() or 1
+
+# below this number of configurations, a process pool costs more than it saves
+min_configs_per_job = 8
+
+# minimum time between two rewrites of the results while jobs are running, in seconds
+DEFAULT_STREAM_INTERVAL = 10
+
+# reports larger than this are memory mapped instead of read
+mmap_threshold = 4 * 1024 * 1024
 
 simulations_dir = "simulations"
 
+manifest_prefix = ".manifest_"
+manifest_version = 1
+
 status_done = "Done: 100%"
 
+# the status log is rewritten with a single progress line, only its end is read
+status_tail_size = 4096
+
 script_name = os.path.basename(__file__)
 
 
@@ -59,14 +89,19 @@ def add_arguments(parser):
   parser.add_argument(
     "-f",
     "--format",
-    choices=["csv", "yml", "all"],
+    choices=result_formats.formats + ["all"],
     default=DEFAULT_FORMAT,
-    help="Output format: csv, yml, or all (default: " + DEFAULT_FORMAT + ")",
+    help="Output format: " + ", ".join(result_formats.formats) + ", or all (default: " + DEFAULT_FORMAT + ")",
   )
   parser.add_argument("-u", "--use_benchmark", action="store_true", help="Use benchmark values in yaml file")
   parser.add_argument("-B", "--benchmark_file", help="Benchmark file")
   parser.add_argument("-w", "--work", help="Work directory")
   parser.add_argument("-r", "--respath", help="Result path")
+  parser.add_argument("-j", "--jobs", type=int, help="number of parallel extraction jobs (default: number of cpus)")
+  parser.add_argument("--targets", nargs="+", help="only export the targets matching these glob patterns (ex: 'XC7*')")
+  parser.add_argument("--archs", nargs="+", help="only export the architectures matching these glob patterns (ex: 'Example*' or 'Example_Counter/*_8bits')")
+  parser.add_argument("--full", action="store_true", help="extract all configurations again, ignoring the export manifest")
+  parser.add_argument("--nohistory", action="store_true", help="do not record this export in the result history database")
   parser.add_argument(
     "-c",
     "--config",
@@ -86,65 +121,139 @@ def parse_arguments():
 ######################################
 
 
-def parse_regex(file, pattern, group_id, error_prefix=""):
+class ReportFiles:
+  """
+  Report files read while extracting metrics. Each file is read, and parsed
+  as csv or yaml, at most once whatever the number of metrics it holds.
+  With 'check_signature', entries are dropped when the file is modified.
+  """
+  def __init__(self, check_signature=False):
+    self.check_signature = check_signature
+    self.signatures = {}
+    self.entries = {}
+
+  def get(self, file, loader):
+    if self.check_signature:
+      stat = os.stat(file)
+      signature = (stat.st_mtime_ns, stat.st_size)
+      if self.signatures.get(file) != signature:
+        self.signatures[file] = signature
+        for key in [key for key in self.entries if key[0] == file]:
+          del self.entries[key]
+    key = (file, loader.__name__)
+    if key not in self.entries:
+      try:
+        self.entries[key] = (loader(file), None)
+      except Exception as e:
+        self.entries[key] = (None, e)
+    value, error = self.entries[key]
+    if error is not None:
+      raise error
+    return value
+
+  def close(self):
+    for value, _ in self.entries.values():
+      if isinstance(value, mmap.mmap):
+        value.close()
+    self.entries = {}
+    self.signatures = {}
+
+
+# benchmark file is shared by all configurations
+benchmark_files = ReportFiles(check_signature=True)
+
+
+@functools.lru_cache(maxsize=None)
+def get_regex(pattern):
+  return re.compile(pattern)
+
+
+def read_text(file):
+  # Large reports are mapped rather than copied into memory
+  if os.path.getsize(file) >= mmap_threshold:
+    with open(file, "rb") as f:
+      return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+  with open(file, "r") as f:
+    return f.read()
+
+
+def read_csv(file):
+  with open(file, mode="r") as csv_file:
+    return list(csv.DictReader(csv_file))
+
+
+def read_yaml(file):
+  with open(file, "r") as yaml_file:
+    return yaml.safe_load(yaml_file)
+
+
+def parse_regex(file, pattern, group_id, error_prefix="", files=None):
   if not os.path.isfile(file):
     printc.error(error_prefix + 'File "' + file + '" does not exist', script_name)
     return None
-  with open(file, "r") as f:
-    try:
-      content = f.read()
-      match = re.search(pattern, content)
+  if files is None:
+    files = ReportFiles()
+  try:
+    content = files.get(file, read_text)
+    if isinstance(content, mmap.mmap):
+      match = get_regex(pattern.encode()).search(content)
+      if match:
+        value = match.group(group_id)
+        return value.decode(errors="replace") if value is not None else None
+    else:
+      match = get_regex(pattern).search(content)
       if match:
         return match.group(group_id)
-    except Exception as e:
-      printc.error(
-        error_prefix + 'Could not get value from regex "' + pattern + '" in file "' + file + '": ' + str(e), script_name=script_name
-      )
-      return None
+  except Exception as e:
+    printc.error(
+      error_prefix + 'Could not get value from regex "' + pattern + '" in file "' + file + '": ' + str(e), script_name=script_name
+    )
+    return None
 
   printc.error(error_prefix + 'No match for regex "' + pattern + '" in file "' + file + '"', script_name=script_name)
   return None
 
 
-def parse_csv(file, key, error_prefix=""):
+def parse_csv(file, key, error_prefix="", files=None):
   if not os.path.isfile(file):
     printc.error(error_prefix + 'File "' + file + '" does not exist', script_name)
     return None
-  with open(file, mode="r") as csv_file:
-    try:
-      reader = csv.DictReader(csv_file)
-      for row in reader:
-        if key in row:
-          return row[key]
-        else:
-          printc.error(error_prefix + 'Could not find key "' + key + '" in csv "' + file + '"', script_name=script_name)
-    except csv.Error as e:
-      printc.error(error_prefix + 'An error occurred while reading csv file "' + file + '": ' + str(e), script_name=script_name)
-      return None
+  if files is None:
+    files = ReportFiles()
+  try:
+    rows = files.get(file, read_csv)
+  except csv.Error as e:
+    printc.error(error_prefix + 'An error occurred while reading csv file "' + file + '": ' + str(e), script_name=script_name)
+    return None
+  for row in rows:
+    if key in row:
+      return row[key]
+    else:
+      printc.error(error_prefix + 'Could not find key "' + key + '" in csv "' + file + '"', script_name=script_name)
 
   return None
 
 
-def parse_yaml(file, key, error_prefix=""):
+def parse_yaml(file, key, error_prefix="", files=None):
   if not os.path.isfile(file):
     printc.error(error_prefix + 'File "' + file + '" does not exist', script_name)
     return None
-
-  with open(file, "r") as yaml_file:
-    try:
-      data = yaml.safe_load(yaml_file)
-      keys = key.split("[")
-      for k in keys:
-        k = k.rstrip("]")
-        if k in data:
-          data = data[k]
-        else:
-          printc.error(error_prefix + 'Could not find key "' + k + '" in yaml "' + file + '"', script_name=script_name)
-          return None
-      return data
-    except yaml.YAMLError as e:
-      printc.error(error_prefix + 'Could not parse yaml file "' + file + '": ' + str(e), script_name=script_name)
+  if files is None:
+    files = ReportFiles()
+  try:
+    data = files.get(file, read_yaml)
+  except yaml.YAMLError as e:
+    printc.error(error_prefix + 'Could not parse yaml file "' + file + '": ' + str(e), script_name=script_name)
+    return None
+  keys = key.split("[")
+  for k in keys:
+    k = k.rstrip("]")
+    if k in data:
+      data = data[k]
+    else:
+      printc.error(error_prefix + 'Could not find key "' + k + '" in yaml "' + file + '"', script_name=script_name)
       return None
+  return data
 
 
 ######################################
@@ -170,101 +279,141 @@ def validate_tool_settings(file_path):
 ######################################
 
 
-def extract_metrics(tool_settings, tool_settings_file, cur_path, arch, arch_path, use_benchmark, benchmark_file):
-  global banned_metrics
-  results = {}
-  units = {}
-  error_prefix = arch_path + " => "
-  metrics = read_from_list("metrics", tool_settings, tool_settings_file, raise_if_missing=False, script_name=script_name)
-  for metric, content in metrics.items():
-    if metric in banned_metrics:
-      continue
-
+# settings of each metric type, besides 'type' and 'settings'
+metric_settings = {
+  "regex": ["file", "pattern", "group_id"],
+  "csv": ["file", "key"],
+  "yaml": ["file", "key"],
+  "benchmark": ["key"],
+  "operation": ["op"],
+}
+
+
+def get_banned_metrics(tool_settings, tool_settings_file, use_benchmark, print_error=True):
+  """
+  Return the metrics of the tool settings that cannot be extracted, whatever the configuration:
+  metrics with invalid settings or an unsupported type, and benchmark metrics when benchmark
+  values are not used. Checked once per export, so that errors are printed once.
+  """
+  banned_metrics = []
+  metrics = read_from_list("metrics", tool_settings, tool_settings_file, raise_if_missing=False, print_error=print_error, script_name=script_name)
+  for metric, content in (metrics or {}).items():
     try:
-      type = read_from_list("type", content, tool_settings_file, parent=metric, script_name=script_name)
-      settings = read_from_list("settings", content, tool_settings_file, parent=metric, script_name=script_name)
+      type = read_from_list("type", content, tool_settings_file, parent=metric, print_error=print_error, script_name=script_name)
+      settings = read_from_list("settings", content, tool_settings_file, parent=metric, print_error=print_error, script_name=script_name)
     except (KeyNotInListError, BadValueInListError):
       banned_metrics.append(metric)
       continue
 
     benchmark_only = read_from_list("benchmark_only", content, tool_settings_file, parent=metric, raise_if_missing=False, type=bool, print_error=False, script_name=script_name)
-    if benchmark_only and not use_benchmark:
+    if (benchmark_only or type == "benchmark") and not use_benchmark:
       banned_metrics.append(metric)
       continue
 
+    if type not in metric_settings:
+      if print_error:
+        printc.error(
+          'Unsupported metric type "' + type + '" specified for metric "' + metric + '" in "' + tool_settings_file + '"',
+          script_name=script_name,
+        )
+      banned_metrics.append(metric)
+      continue
+
+    try:
+      for key in metric_settings[type]:
+        read_from_list(
+          key, settings, tool_settings_file, parent=metric + "[settings]", type=int if key == "group_id" else None,
+          print_error=print_error, script_name=script_name
+        )
+    except (KeyNotInListError, BadValueInListError):
+      banned_metrics.append(metric)
+  return banned_metrics
+
+
+def extract_metrics(tool_settings, tool_settings_file, cur_path, arch, arch_path, use_benchmark, benchmark_file, banned_metrics=None):
+  if banned_metrics is None:
+    banned_metrics = get_banned_metrics(tool_settings, tool_settings_file, use_benchmark, print_error=False)
+  results = {}
+  units = {}
+  error_prefix = arch_path + " => "
+  files = ReportFiles()
+  deferred = []
+  benchmark_missing = False
+  metrics = read_from_list("metrics", tool_settings, tool_settings_file, raise_if_missing=False, script_name=script_name) or {}
+  metrics = {metric: content for metric, content in metrics.items() if metric not in banned_metrics}
+  pending_metrics = list(metrics)
+  for metric, content in metrics.items():
+    pending_metrics.remove(metric)
+    type = content["type"]
+    settings = content["settings"]
+
     if type == "regex":
-      try:
-        file = read_from_list("file", settings, tool_settings_file, parent=metric + "[settings]", script_name=script_name)
-        pattern = read_from_list("pattern", settings, tool_settings_file, parent=metric + "[settings]", script_name=script_name)
-        group_id = read_from_list("group_id", settings, tool_settings_file, parent=metric + "[settings]", type=int, script_name=script_name)
-      except (KeyNotInListError, BadValueInListError):
-        banned_metrics.append(metric)
-        continue
-      value = parse_regex(os.path.join(cur_path, file), pattern, group_id, error_prefix)
+      value = parse_regex(os.path.join(cur_path, settings["file"]), settings["pattern"], settings["group_id"], error_prefix, files)
     elif type == "csv":
-      try:
-        file = read_from_list( "file", settings, tool_settings_file, parent=metric + "[settings]", script_name=script_name)
-        key = read_from_list("key", settings, tool_settings_file, parent=metric + "[settings]", script_name=script_name)
-      except (KeyNotInListError, BadValueInListError):
-        banned_metrics.append(metric)
-        continue
-      value = parse_csv(os.path.join(cur_path, file), key, error_prefix)
+      value = parse_csv(os.path.join(cur_path, settings["file"]), settings["key"], error_prefix, files)
     elif type == "yaml":
-      try:
-        file = read_from_list("file", settings, tool_settings_file, parent=metric + "[settings]", script_name=script_name)
-        key = read_from_list("key", settings, tool_settings_file, parent=metric + "[settings]", script_name=script_name)
-      except (KeyNotInListError, BadValueInListError):
-        banned_metrics.append(metric)
-        continue
-      value = parse_yaml(os.path.join(cur_path, file), key, error_prefix)
+      value = parse_yaml(os.path.join(cur_path, settings["file"]), settings["key"], error_prefix, files)
     elif type == "benchmark":
-      if not use_benchmark:
-        banned_metrics.append(metric)
+      # Once a benchmark value is missing, the other benchmark metrics of the configuration are skipped
+      if benchmark_missing:
         continue
-      if arch in banned_arch:
-        continue
-      try:
-        key = read_from_list("key", settings, tool_settings_file, parent=metric + "[settings]", script_name=script_name)
-      except (KeyNotInListError, BadValueInListError):
-        banned_metrics.append(metric)
-        continue
-      key = arch + "[" + key + "]"
-      value = parse_yaml(benchmark_file, key, error_prefix)
+      key = arch + "[" + settings["key"] + "]"
+      value = parse_yaml(benchmark_file, key, error_prefix, benchmark_files)
       if value is None:
-        banned_arch.append(arch)
-    elif type == "operation":
-      try:
-        op = read_from_list("op", settings, tool_settings_file, parent=metric + "[settings]", script_name=script_name)
-      except (KeyNotInListError, BadValueInListError):
-        banned_metrics.append(metric)
+        benchmark_missing = True
+    else:
+      op = settings["op"]
+      # Operations on metrics defined further in tool.yml are evaluated once these are extracted
+      if get_dependencies(op) & set(pending_metrics):
+        results[metric] = None
+        deferred.append((metric, content, op))
         continue
       value = calculate_operation(op, results, error_prefix)
-    else:
-      printc.error(
-        'Unsupported metric type "' + type + '" specified for metric "' + metric + '" in "' + tool_settings_file + '"',
-        script_name=script_name,
-      )
-      banned_metrics.append(metric)
-      continue
 
-    # Apply formatting if specified
-    if value is not None and "format" in content:
-      try:
-        value = convert_to_numeric(content["format"] % float(value))
-      except ValueError:
-        pass  # printc.warning(f"Failed to format value {value} for metric {metric}", script_name)
-
-    # Append unit if specified
-    if value is not None:
-      results[metric] = value
-      if "unit" in content:
-        units[metric] = content["unit"]
-    else:
-      results[metric] = None
+    store_metric(metric, content, value, results, units)
+
+  # Evaluate deferred operations in dependency order
+  while deferred:
+    deferred_metrics = set(metric for metric, _, _ in deferred)
+    ready = [entry for entry in deferred if not get_dependencies(entry[2]) & deferred_metrics]
+    if not ready:
+      for metric, content, op in deferred:
+        printc.error(error_prefix + 'Failed to evaluate operation "' + op + '": circular dependency between operations', script_name)
+      break
+    for metric, content, op in ready:
+      value = calculate_operation(op, results, error_prefix)
+      store_metric(metric, content, value, results, units)
+    deferred = [entry for entry in deferred if entry not in ready]
 
+  files.close()
   return results, units
 
 
+def store_metric(metric, content, value, results, units):
+  # Apply formatting if specified
+  if value is not None and "format" in content:
+    try:
+      value = convert_to_numeric(content["format"] % float(value))
+    except ValueError:
+      pass  # printc.warning(f"Failed to format value {value} for metric {metric}", script_name)
+
+  # Append unit if specified
+  if value is not None:
+    results[metric] = value
+    if "unit" in content:
+      units[metric] = content["unit"]
+  else:
+    results[metric] = None
+
+
+def get_dependencies(op_str):
+  # Metrics used by an operation, none if it is invalid (the error is reported on evaluation)
+  try:
+    return set(get_operation(op_str).names)
+  except (SyntaxError, ValueError):
+    return set()
+
+
 ######################################
 # Misc functions
 ######################################
@@ -288,8 +437,8 @@ def convert_to_numeric(data):
 def calculate_operation(op_str, results, error_prefix=""):
   try:
     local_vars = {k: v for k, v in results.items() if v is not None}
-    return eval(op_str, {}, local_vars)
-  except (NameError, SyntaxError, TypeError, ZeroDivisionError) as e:
+    return get_operation(op_str).evaluate(local_vars)
+  except (NameError, SyntaxError, TypeError, ZeroDivisionError, ValueError, OverflowError) as e:
     printc.error(error_prefix + 'Failed to evaluate operation "' + op_str + '": ' + str(e) , script_name)
     return None
 
@@ -299,7 +448,311 @@ def calculate_operation(op_str, results, error_prefix=""):
 ######################################
 
 
-def export_results(input, output, tools, format, use_benchmark, benchmark_file):
+class ExportManifest:
+  """
+  Metrics extracted by the previous exports, along with the signature of the
+  files they were extracted from. A configuration is only extracted again if
+  its status log or one of its report files changed, or if the tool settings
+  or the benchmark file changed.
+  """
+  def __init__(self, manifest_file, settings_signature, report_files, load=True):
+    self.manifest_file = manifest_file
+    self.settings_signature = settings_signature
+    self.files = [os.path.join("log", "status.log")] + [os.path.normpath(file) for file in report_files]
+    self.entries = {}
+    self.new_entries = {}
+    self.recorded = True
+    self.loaded = False
+    if load:
+      self.load()
+
+  @staticmethod
+  def get_settings_signature(tool_settings_file, use_benchmark, benchmark_file):
+    with open(tool_settings_file, "rb") as f:
+      tool_hash = hashlib.sha1(f.read()).hexdigest()
+    benchmark_signature = None
+    if use_benchmark and benchmark_file is not None and os.path.isfile(benchmark_file):
+      stat = os.stat(benchmark_file)
+      benchmark_signature = (os.path.realpath(benchmark_file), stat.st_mtime_ns, stat.st_size)
+    return (tool_hash, bool(use_benchmark), benchmark_signature)
+
+  def get_signature(self, cur_path):
+    signature = []
+    for file in self.files:
+      try:
+        stat = os.stat(os.path.join(cur_path, file))
+        signature.append((stat.st_mtime_ns, stat.st_size))
+      except OSError:
+        signature.append(None)
+    return tuple(signature)
+
+  def load(self):
+    if not os.path.isfile(self.manifest_file):
+      return
+    try:
+      with open(self.manifest_file, "rb") as f:
+        data = pickle.load(f)
+      if data.get("version") == manifest_version and data.get("settings") == self.settings_signature and data.get("files") == self.files:
+        self.entries = data["entries"]
+        self.recorded = data.get("recorded", True)
+        self.loaded = True
+    except Exception:
+      # A corrupted manifest only means a full export
+      self.entries = {}
+
+  def get(self, arch_path, signature):
+    entry = self.entries.get(arch_path)
+    if entry is not None and entry[0] == signature:
+      return entry[1]
+    return None
+
+  def set(self, arch_path, signature, result):
+    self.new_entries[arch_path] = (signature, result)
+
+  def save(self, silent=False):
+    # Configurations that no longer exist are dropped
+    tmp_file = self.manifest_file + ".tmp"
+    try:
+      with open(tmp_file, "wb") as f:
+        data = {
+          "version": manifest_version,
+          "settings": self.settings_signature,
+          "files": self.files,
+          "entries": self.new_entries,
+          "recorded": self.recorded,
+        }
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+      os.replace(tmp_file, self.manifest_file)
+    except Exception as e:
+      if not silent:
+        printc.warning('Could not write export manifest "' + self.manifest_file + '": ' + str(e), script_name)
+
+
+def read_results(output, tool):
+  """
+  Return the data and units of the yml results of a tool, empty if there are none.
+  """
+  try:
+    with open(result_formats.get_output_file(output, tool, "yml"), "r") as f:
+      content = yaml.load(f, Loader=yaml_loader)
+    data = content.get("fmax_results") or {}
+    units = content.get("units") or {}
+  except Exception:
+    return {}, {}
+  if not isinstance(data, dict) or not isinstance(units, dict):
+    return {}, {}
+  return data, units
+
+
+def get_result_entries(output, tool):
+  """
+  Return manifest entries built from the yml results of a tool, for when there is no
+  valid manifest. They have no signature, so their configurations are extracted again
+  once they are selected.
+  """
+  data, units = read_results(output, tool)
+  entries = {}
+  for target, architectures in data.items():
+    for architecture, configurations in (architectures or {}).items():
+      for configuration, metrics in (configurations or {}).items():
+        if isinstance(metrics, dict):
+          entries[os.path.join(target, architecture, configuration)] = (None, (metrics, units, ""))
+  return entries
+
+
+def read_tail(file, size=status_tail_size):
+  with open(file, "rb") as f:
+    f.seek(0, os.SEEK_END)
+    f.seek(max(0, f.tell() - size))
+    return f.read().decode(errors="replace")
+
+
+def match_patterns(name, patterns):
+  return patterns is None or any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def is_selected(target, architecture, configuration, targets=None, archs=None):
+  """
+  Check a configuration against the target and architecture filters.
+  Architecture patterns containing a '/' are matched against 'architecture/configuration'.
+  """
+  if not match_patterns(target, targets):
+    return False
+  if archs is None:
+    return True
+  for pattern in archs:
+    if "/" in pattern:
+      if fnmatch.fnmatchcase(architecture + "/" + configuration, pattern):
+        return True
+    elif fnmatch.fnmatchcase(architecture, pattern):
+      return True
+  return False
+
+
+def list_configurations(input, targets=None, archs=None):
+  """
+  Walk the work directory of a tool and yield its (target, architecture, configuration),
+  in sorted order. Directories that cannot match the filters are not read.
+  Targets and architectures without configurations are yielded with None in place
+  of the missing levels, so they still appear in the results.
+  """
+  arch_patterns = None if archs is None else [pattern.split("/")[0] for pattern in archs]
+  for target in list_dirs(input):
+    if not match_patterns(target, targets):
+      continue
+    architectures = [architecture for architecture in list_dirs(os.path.join(input, target)) if match_patterns(architecture, arch_patterns)]
+    if not architectures:
+      yield target, None, None
+    for architecture in architectures:
+      configurations = list_dirs(os.path.join(input, target, architecture))
+      if archs is not None:
+        configurations = [configuration for configuration in configurations if is_selected(target, architecture, configuration, archs=archs)]
+      if not configurations:
+        yield target, architecture, None
+      for configuration in configurations:
+        yield target, architecture, configuration
+
+
+def extract_config(task):
+  # Extract the metrics of one configuration, capturing what is printed meanwhile
+  tool_settings, tool_settings_file, cur_path, arch, arch_path, use_benchmark, benchmark_file, banned_metrics = task
+  output = io.StringIO()
+  with contextlib.redirect_stdout(output):
+    # Check if synthesis completed
+    try:
+      done = status_done in read_tail(os.path.join(cur_path, "log", "status.log"))
+    except OSError:
+      done = False
+
+    if done:
+      metrics, units = extract_metrics(tool_settings, tool_settings_file, cur_path, arch, arch_path, use_benchmark, benchmark_file, banned_metrics)
+    else:
+      corrupted_directory(arch_path)
+      metrics, units = None, {}
+  return metrics, units, output.getvalue()
+
+
+def extract_all(tasks, jobs):
+  # Yield the results in the order of the tasks
+  jobs = min(jobs, len(tasks) // min_configs_per_job)
+  if jobs <= 1:
+    for task in tasks:
+      yield extract_config(task[3])
+    return
+  with ProcessPoolExecutor(max_workers=jobs) as executor:
+    for result in executor.map(extract_config, [task[3] for task in tasks], chunksize=max(1, len(tasks) // (jobs * 4))):
+      yield result
+
+
+class StreamingExporter:
+  """
+  Extracts the metrics of each configuration as soon as its job is retired,
+  and rewrites the yml results of the tool at most every 'min_interval'
+  seconds, so that results can be explored while the other jobs are running.
+  Meant to be used as a retire callback of ParallelJobHandler.
+  Nothing is printed, as jobs are displayed in a curses interface meanwhile:
+  metrics are extracted in a worker process, where messages are captured without
+  redirecting the output of this process, and printed by the final export.
+  """
+  def __init__(self, input, output, tool, use_benchmark=False, benchmark_file=None, min_interval=DEFAULT_STREAM_INTERVAL):
+    self.input = input
+    self.output = output
+    self.tool = tool
+    self.use_benchmark = use_benchmark
+    self.benchmark_file = benchmark_file
+    self.min_interval = min_interval
+    self.last_write = 0
+    self.pending = False
+    self.errors = []
+    self.lock = threading.Lock()
+    # Spawned rather than forked, as jobs are handled by other threads of this process
+    self.executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    # Tool settings were checked before running the jobs, errors are reported by the final export
+    self.tool_settings_file = os.path.join(OdatixSettings.odatix_eda_tools_path, tool, "tool.yml")
+    try:
+      with open(self.tool_settings_file, "r") as f:
+        self.tool_settings = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError):
+      self.tool_settings = None
+    if not isinstance(self.tool_settings, dict):
+      self.manifest = None
+      return
+    settings_signature = ExportManifest.get_settings_signature(self.tool_settings_file, use_benchmark, benchmark_file)
+    manifest_file = os.path.join(output, manifest_prefix + tool)
+    self.manifest = ExportManifest(manifest_file, settings_signature, RetentionPolicy.get_metric_files(self.tool_settings))
+    self.manifest.new_entries = dict(self.manifest.entries)
+    # Without a valid manifest (first export, settings changed), results of the previous
+    # exports are only in the result file: streamed results are added to it, not written over it
+    if self.manifest.loaded:
+      self.base_data, self.base_units = {}, {}
+    else:
+      self.base_data, self.base_units = read_results(output, tool)
+    self.banned_metrics = get_banned_metrics(self.tool_settings, self.tool_settings_file, use_benchmark, print_error=False)
+
+  def submit(self, job):
+    if self.manifest is None:
+      return
+    arch_path = os.path.relpath(job.tmp_dir, self.input)
+    if len(arch_path.split(os.sep)) != 3:
+      return
+    try:
+      target, architecture, configuration = arch_path.split(os.sep)
+      cur_path = os.path.join(self.input, arch_path)
+      arch = architecture + "[" + configuration + "]"
+      signature = self.manifest.get_signature(cur_path)
+      task = (self.tool_settings, self.tool_settings_file, cur_path, arch, arch_path, self.use_benchmark, self.benchmark_file, self.banned_metrics)
+      future = self.executor.submit(extract_config, task)
+    except Exception as e:
+      self.errors.append((arch_path, e))
+      return
+    future.add_done_callback(functools.partial(self.store, arch_path, signature))
+
+  def store(self, arch_path, signature, future):
+    # Called once the metrics of a configuration are extracted by the worker process
+    try:
+      result = future.result()
+      with self.lock:
+        self.manifest.set(arch_path, signature, result)
+        self.pending = True
+        if time.time() - self.last_write >= self.min_interval:
+          self.write()
+    except Exception as e:
+      self.errors.append((arch_path, e))
+
+  def write(self):
+    data = {
+      target: {architecture: dict(configurations or {}) for architecture, configurations in (architectures or {}).items()}
+      for target, architectures in self.base_data.items()
+    }
+    units = dict(self.base_units)
+    for arch_path in sorted(self.manifest.new_entries, key=lambda arch_path: arch_path.split(os.sep)):
+      metrics, cur_units, _ = self.manifest.new_entries[arch_path][1]
+      if metrics is None:
+        continue
+      target, architecture, configuration = arch_path.split(os.sep)
+      data.setdefault(target, {}).setdefault(architecture, {})[configuration] = metrics
+      units.update(cur_units)
+    os.makedirs(self.output, exist_ok=True)
+    result_formats.write_results(self.output, self.tool, data, units, "yml", silent=True)
+    self.manifest.recorded = False
+    self.manifest.save(silent=True)
+    self.last_write = time.time()
+    self.pending = False
+
+  def shutdown(self):
+    self.executor.shutdown(wait=True)
+    with self.lock:
+      if self.pending:
+        self.write()
+    for arch_path, e in self.errors:
+      printc.error('Could not export the results of "' + arch_path + '" while running', script_name=script_name)
+      printc.cyan("error details: ", script_name=script_name, end="")
+      print(str(e))
+
+
+def export_results(input, output, tools, format, use_benchmark, benchmark_file, jobs=DEFAULT_JOBS, full=False, history=True, targets=None, archs=None,
+                   design_path=None, target_path=None):
   input_path = input
   for tool in tools:
     if tool == simulations_dir:
@@ -321,51 +774,131 @@ def export_results(input, output, tools, format, use_benchmark, benchmark_file):
     input = os.path.join(input_path, tool)
 
     try:
-      dirs = sorted(next(os.walk(input))[1])
-    except StopIteration:
+      configurations = list(list_configurations(input, targets, archs))
+    except OSError:
       continue
 
-    for target in dirs:
-      data[target] = {}
-      for architecture in sorted(next(os.walk(os.path.join(input, target)))[1]):
-        data[target][architecture] = {}
-        for configuration in sorted(next(os.walk(os.path.join(input, target, architecture)))[1]):
-          arch = architecture + "[" + configuration + "]"
-          arch_path = os.path.join(target, architecture, configuration)
-          cur_path = os.path.join(input, arch_path)
+    os.makedirs(output, exist_ok=True)
+    settings_signature = ExportManifest.get_settings_signature(tool_settings_file, use_benchmark, benchmark_file)
+    manifest_file = os.path.join(output, manifest_prefix + tool)
+    manifest = ExportManifest(manifest_file, settings_signature, RetentionPolicy.get_metric_files(tool_settings))
+
+    # Configurations excluded by the filters keep their last exported results, without reading their directories
+    if targets is not None or archs is not None:
+      if manifest.loaded:
+        previous_entries = manifest.entries
+      else:
+        previous_entries = get_result_entries(output, tool)
+        if previous_entries:
+          printc.note(
+            "No valid export manifest: configurations excluded by the filters keep their results from \""
+            + result_formats.get_output_file(output, tool, "yml") + "\"",
+            script_name,
+          )
+      for arch_path, (signature, result) in previous_entries.items():
+        target, architecture, configuration = arch_path.split(os.sep)
+        if not is_selected(target, architecture, configuration, targets, archs):
+          configurations.append((target, architecture, configuration))
+          manifest.set(arch_path, signature, result)
+      configurations.sort(key=lambda levels: tuple(level or "" for level in levels))
+
+    # Metrics are checked once, before extracting configurations in parallel
+    banned_metrics = get_banned_metrics(tool_settings, tool_settings_file, use_benchmark)
+
+    # List configurations in sorted order, so results are merged deterministically
+    tasks = []
+    for target, architecture, configuration in configurations:
+      data.setdefault(target, {})
+      if architecture is None:
+        continue
+      data[target].setdefault(architecture, {})
+      if configuration is None:
+        continue
+      arch_path = os.path.join(target, architecture, configuration)
+      if arch_path in manifest.new_entries:
+        signature, cached = manifest.new_entries[arch_path]
+        tasks.append((target, architecture, configuration, None, signature, cached))
+        continue
+      arch = architecture + "[" + configuration + "]"
+      cur_path = os.path.join(input, arch_path)
+      signature = manifest.get_signature(cur_path)
+      task = (tool_settings, tool_settings_file, cur_path, arch, arch_path, use_benchmark, benchmark_file, banned_metrics)
+      tasks.append((target, architecture, configuration, task, signature, None if full else manifest.get(arch_path, signature)))
+
+    # Only configurations whose files changed since the last export are extracted
+    to_extract = [task for task in tasks if task[5] is None]
+    extracted = extract_all(to_extract, jobs)
+    for target, architecture, configuration, task, signature, cached in tasks:
+      if task is None:
+        # Excluded by the filters
+        metrics, cur_units, messages = cached
+      else:
+        if cached is None:
+          result = next(extracted)
+        else:
+          result = cached
+        manifest.set(task[4], signature, result)
+        metrics, cur_units, messages = result
+        print(messages, end="")
+      if metrics is None:
+        continue
+      data[target][architecture][configuration] = metrics
 
-          status_log = os.path.join(cur_path, "log", "status.log")
+      # Update units
+      units.update(cur_units)
 
-          # Check if synthesis completed
-          if not os.path.isfile(status_log):
-            corrupted_directory(arch_path)
-            continue
+    selected = len([task for task in tasks if task[3] is not None])
+    if len(to_extract) < selected:
+      printc.note(str(selected - len(to_extract)) + " of " + str(selected) + " configurations unchanged since the last export", script_name)
 
-          with open(status_log, "r") as f:
-            if status_done not in f.read():
-              corrupted_directory(arch_path)
-              continue
+    # Export to the desired formats
+    result_formats.write_results(output, tool, data, units, format)
 
-          # Get values
-          metrics, cur_units = extract_metrics(tool_settings, tool_settings_file, cur_path, arch, arch_path, use_benchmark, benchmark_file)
-          data[target][architecture][configuration] = metrics
+    # Record the results, unless they are the same as in the last recorded export
+    changed = len(to_extract) > 0 or not manifest.recorded
+    if history and changed:
+      record_history(output, tool, tool_settings, tool_settings_file, input, data, units, design_path, target_path)
+    manifest.recorded = history or not changed
+    manifest.save()
 
-          # Update units
-          units.update(cur_units)
 
-    # Export to the desired format
-    os.makedirs(output, exist_ok=True)
-    output_file = os.path.join(output, "results_" + tool + ".yml")
-    try:
-      with open(output_file, "w") as file:
-        yaml.dump(
-          {"units": units, "fmax_results": data}, file, default_style=None, default_flow_style=False, sort_keys=False
-        )
-        printc.say('Results written to "' + output_file + '"', script_name=script_name)
-    except Exception as e:
-      printc.error('Could not write "' + output_file + '"', script_name=script_name)
-      printc.cyan("error details: ", script_name=script_name, end="")
-      print(str(e))
+def get_install_path(target_path, tool):
+  """
+  Return the install path of a tool defined in its target settings, or None.
+  """
+  if target_path is None:
+    return None
+  try:
+    with open(os.path.join(target_path, "target_" + tool + ".yml"), "r") as f:
+      install_path = yaml.safe_load(f).get("tool_install_path")
+  except Exception:
+    return None
+  if not isinstance(install_path, str):
+    return None
+  return os.path.realpath(os.path.expanduser(install_path))
+
+
+def record_history(output, tool, tool_settings, tool_settings_file, input, data, units, design_path=None, target_path=None):
+  # Only called for exports that add a run: the version command is not run otherwise
+  history_file = os.path.join(output, history_filename)
+  version_command = read_from_list("version_command", tool_settings, tool_settings_file, raise_if_missing=False, print_error=False, script_name=script_name)
+  if not isinstance(version_command, str):
+    version_command = None
+  try:
+    with ResultHistory(history_file) as history:
+      run_id = history.add_run(
+        tool=tool,
+        data=data,
+        units=units,
+        tool_version=get_tool_version(version_command, get_install_path(target_path, tool)),
+        git_revision=get_git_revision(design_path if design_path is not None else input),
+        work_path=os.path.realpath(input),
+      )
+    printc.say("Results recorded as run " + str(run_id) + ' in "' + history_file + '"', script_name=script_name)
+  except Exception as e:
+    printc.error('Could not record results in "' + history_file + '"', script_name=script_name)
+    printc.cyan("error details: ", script_name=script_name, end="")
+    print(str(e))
 
 
 ######################################
@@ -414,9 +947,16 @@ def main(args, settings=None):
     input=input,
     output=output,
     tools=tools,
-    format=args.format,
+    format=args.format if args.format is not None else DEFAULT_FORMAT,
     use_benchmark=use_benchmark,
     benchmark_file=benchmark_file,
+    jobs=args.jobs if args.jobs is not None else DEFAULT_JOBS,
+    full=args.full,
+    history=not args.nohistory,
+    targets=args.targets,
+    archs=args.archs,
+    design_path=settings.arch_path,
+    target_path=settings.target_path,
   )
 
 
@@ -0,0 +1,142 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import sys
+import argparse
+
+import odatix.lib.printc as printc
+from odatix.lib.settings import OdatixSettings
+from odatix.lib.result_history import ResultHistory, history_filename
+
+script_name = os.path.basename(__file__)
+
+######################################
+# Settings
+######################################
+
+DEFAULT_LAST = 50
+
+######################################
+# Parse Arguments
+######################################
+
+def add_arguments(parser):
+  parser.add_argument("-t", "--tool", help="eda tool (default: all)")
+  parser.add_argument("-m", "--metric", help="metric to display (ex: Fmax)")
+  parser.add_argument("-T", "--target", help="target to display")
+  parser.add_argument("-a", "--arch", help="architecture to display")
+  parser.add_argument("-C", "--configuration", help="configuration to display")
+  parser.add_argument("-n", "--last", type=int, default=DEFAULT_LAST, help="number of runs to display (default: " + str(DEFAULT_LAST) + ")")
+  parser.add_argument("-R", "--regressions", action="store_true", help="list configurations whose metric got worse in the last run of the tool")
+  parser.add_argument("--minimize", action="store_true", help="lower values of the metric are better (for regressions)")
+  parser.add_argument("--threshold", type=float, default=0.0, help="minimum degradation in percent to report a regression (default: 0)")
+  parser.add_argument("-r", "--respath", help="result path")
+  parser.add_argument(
+    "-c",
+    "--config",
+    default=OdatixSettings.DEFAULT_SETTINGS_FILE,
+    help="global settings file for Odatix (default: " + OdatixSettings.DEFAULT_SETTINGS_FILE + ")",
+  )
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(description="Query the history of exported results")
+  add_arguments(parser)
+  return parser.parse_args()
+
+######################################
+# Display
+######################################
+
+def format_value(value):
+  if isinstance(value, float):
+    return "%g" % value
+  return str(value)
+
+def print_table(header, rows):
+  widths = [max([len(str(cell)) for cell in [title] + [row[i] for row in rows]]) for i, title in enumerate(header)]
+  printc.bold("  ".join(str(title).ljust(width) for title, width in zip(header, widths)))
+  for row in rows:
+    print("  ".join(str(cell).ljust(width) for cell, width in zip(row, widths)))
+
+def print_runs(history, tool, last):
+  runs = history.get_runs(tool=tool, last=last)
+  if not runs:
+    printc.note("No run recorded yet", script_name)
+    return
+  rows = [[run_id, timestamp, tool, tool_version or "-", git_revision or "-"] for run_id, timestamp, tool, tool_version, git_revision in runs]
+  print_table(["run", "date", "tool", "tool version", "git revision"], rows)
+
+def print_trend(history, metric, tool, target, architecture, configuration, last):
+  trend = history.get_trend(metric, tool=tool, target=target, architecture=architecture, configuration=configuration, last=last)
+  if not trend:
+    printc.note('No value recorded for metric "' + metric + '"', script_name)
+    return
+  unit = history.get_unit(tool, metric) if tool is not None else None
+  title = metric + (" (" + unit + ")" if unit else "")
+  rows = []
+  for run_id, timestamp, git_revision, target, architecture, configuration, value in trend:
+    rows.append([target, architecture, configuration, run_id, timestamp, git_revision or "-", format_value(value)])
+  print_table(["target", "architecture", "configuration", "run", "date", "git revision", title], rows)
+
+def print_regressions(history, metric, tool, maximize, threshold):
+  regressions = history.get_regressions(metric, tool, maximize=maximize, threshold=threshold)
+  if not regressions:
+    printc.say('No regression of "' + metric + '" in the last run of ' + tool, script_name=script_name)
+    return
+  rows = []
+  for target, architecture, configuration, previous_value, last_value, change in regressions:
+    rows.append([target, architecture, configuration, format_value(previous_value), format_value(last_value), "%+.2f%%" % change])
+  printc.warning(str(len(regressions)) + ' regression(s) of "' + metric + '" in the last run of ' + tool, script_name)
+  print_table(["target", "architecture", "configuration", "previous", "last", "change"], rows)
+
+######################################
+# Main
+######################################
+
+def main(args, settings=None):
+  # Get settings
+  if settings is None:
+    settings = OdatixSettings(args.config)
+    if not settings.valid:
+      sys.exit(-1)
+
+  result_path = args.respath if args.respath is not None else settings.result_path
+  history_file = os.path.join(result_path, history_filename)
+  if not os.path.isfile(history_file):
+    printc.error('Could not find result history "' + history_file + '"', script_name=script_name)
+    printc.note("Export results using the 'odatix results' command to record them", script_name=script_name)
+    sys.exit(-1)
+
+  with ResultHistory(history_file) as history:
+    if args.regressions:
+      if args.metric is None or args.tool is None:
+        printc.error("Options --metric and --tool are required to look for regressions", script_name=script_name)
+        sys.exit(-1)
+      print_regressions(history, args.metric, args.tool, not args.minimize, args.threshold)
+    elif args.metric is not None:
+      print_trend(history, args.metric, args.tool, args.target, args.arch, args.configuration, args.last)
+    else:
+      print_runs(history, args.tool, args.last)
+
+if __name__ == "__main__":
+  args = parse_arguments()
+  main(args)
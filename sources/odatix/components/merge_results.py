@@ -0,0 +1,290 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import sys
+import yaml
+import pickle
+import sqlite3
+import argparse
+import tempfile
+
+import odatix.lib.printc as printc
+import odatix.lib.result_formats as result_formats
+from odatix.lib.utils import list_dirs
+from odatix.lib.settings import OdatixSettings
+import odatix.components.export_results as exp_res
+
+script_name = os.path.basename(__file__)
+
+######################################
+# Settings
+######################################
+
+policies = ["newest", "best_fmax", "error"]
+
+DEFAULT_POLICY = "newest"
+DEFAULT_FMAX_METRIC = "Fmax"
+
+yaml_prefix = "results_"
+
+######################################
+# Parse Arguments
+######################################
+
+def add_arguments(parser):
+  parser.add_argument("inputs", nargs="+", help="result files (results_<tool>.yml) or fmax work directories to merge")
+  parser.add_argument(
+    "-p",
+    "--policy",
+    choices=policies,
+    default=DEFAULT_POLICY,
+    help="configuration found in several inputs: keep the newest, keep the one with the highest fmax, or stop with an error if they differ (default: " + DEFAULT_POLICY + ")",
+  )
+  parser.add_argument("-m", "--fmax_metric", default=DEFAULT_FMAX_METRIC, help="metric compared by the best_fmax policy (default: " + DEFAULT_FMAX_METRIC + ")")
+  parser.add_argument("-f", "--format", choices=result_formats.formats + ["all"], default=exp_res.DEFAULT_FORMAT, help="output format (default: " + exp_res.DEFAULT_FORMAT + ")")
+  parser.add_argument("-r", "--respath", help="result path where merged results are written")
+  parser.add_argument("-j", "--jobs", type=int, help="number of parallel extraction jobs for work directories (default: number of cpus)")
+  parser.add_argument(
+    "-c",
+    "--config",
+    default=OdatixSettings.DEFAULT_SETTINGS_FILE,
+    help="global settings file for Odatix (default: " + OdatixSettings.DEFAULT_SETTINGS_FILE + ")",
+  )
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(description="Merge results produced on different machines")
+  add_arguments(parser)
+  return parser.parse_args()
+
+######################################
+# Merge Store
+######################################
+
+class MergeStore:
+  """
+  Temporary database holding the merged configurations, so that inputs are
+  read one at a time and only the merged results of a tool are held in
+  memory when they are written.
+  """
+  def __init__(self, policy, fmax_metric):
+    self.policy = policy
+    self.fmax_metric = fmax_metric
+    self.conflicts = []
+    self.replaced = 0
+    handle, self.db_file = tempfile.mkstemp(prefix="odatix_merge_", suffix=".db")
+    os.close(handle)
+    self.connection = sqlite3.connect(self.db_file)
+    self.connection.execute(
+      "CREATE TABLE configurations (tool TEXT, target TEXT, architecture TEXT, configuration TEXT,"
+      " timestamp REAL, fmax REAL, metrics BLOB, source TEXT, PRIMARY KEY (tool, target, architecture, configuration))"
+    )
+    self.connection.execute("CREATE TABLE units (tool TEXT, metric TEXT, unit TEXT, PRIMARY KEY (tool, metric))")
+
+  def close(self):
+    self.connection.close()
+    os.remove(self.db_file)
+
+  def get_fmax(self, metrics):
+    try:
+      return float(metrics[self.fmax_metric])
+    except (KeyError, TypeError, ValueError):
+      return None
+
+  def is_better(self, timestamp, fmax, old_timestamp, old_fmax):
+    if self.policy == "best_fmax":
+      if fmax is not None and (old_fmax is None or fmax > old_fmax):
+        return True
+      if fmax != old_fmax:
+        return False
+    return timestamp > old_timestamp
+
+  def add(self, tool, target, architecture, configuration, metrics, timestamp, source):
+    key = (tool, target, architecture, configuration)
+    fmax = self.get_fmax(metrics)
+    row = self.connection.execute(
+      "SELECT timestamp, fmax, metrics, source FROM configurations WHERE tool = ? AND target = ? AND architecture = ? AND configuration = ?", key
+    ).fetchone()
+    if row is not None:
+      old_timestamp, old_fmax, old_metrics, old_source = row
+      if self.policy == "error":
+        if pickle.loads(old_metrics) != metrics:
+          self.conflicts.append((key, old_source, source))
+        return
+      if not self.is_better(timestamp, fmax, old_timestamp, old_fmax):
+        return
+      self.replaced += 1
+    self.connection.execute(
+      "INSERT OR REPLACE INTO configurations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+      key + (timestamp, fmax, pickle.dumps(metrics, protocol=pickle.HIGHEST_PROTOCOL), source),
+    )
+
+  def add_units(self, tool, units):
+    self.connection.executemany("INSERT OR IGNORE INTO units VALUES (?, ?, ?)", ((tool, metric, unit) for metric, unit in units.items()))
+
+  def get_tools(self):
+    return [row[0] for row in self.connection.execute("SELECT DISTINCT tool FROM configurations ORDER BY tool")]
+
+  def get_results(self, tool):
+    data = {}
+    rows = self.connection.execute(
+      "SELECT target, architecture, configuration, metrics FROM configurations WHERE tool = ? ORDER BY target, architecture, configuration", (tool,)
+    )
+    for target, architecture, configuration, metrics in rows:
+      data.setdefault(target, {}).setdefault(architecture, {})[configuration] = pickle.loads(metrics)
+    units = {metric: unit for metric, unit in self.connection.execute("SELECT metric, unit FROM units WHERE tool = ? ORDER BY rowid", (tool,))}
+    return data, units
+
+######################################
+# Inputs
+######################################
+
+def add_result_file(store, file):
+  """
+  Add the configurations of a results_<tool>.yml file, dated by the file modification time.
+  """
+  basename = os.path.basename(file)
+  if not (basename.startswith(yaml_prefix) and basename.endswith(".yml")):
+    printc.error('"' + file + '" is not a result file, expected "' + yaml_prefix + '<tool>.yml"', script_name)
+    return False
+  tool = basename[len(yaml_prefix):-len(".yml")]
+  try:
+    with open(file, "r") as f:
+      content = yaml.load(f, Loader=yaml.loader.SafeLoader)
+    data = content["fmax_results"] or {}
+    units = content.get("units") or {}
+  except Exception as e:
+    printc.error('Could not read result file "' + file + '"', script_name)
+    printc.cyan("error details: ", end="", script_name=script_name)
+    print(str(e))
+    return False
+
+  timestamp = os.path.getmtime(file)
+  count = 0
+  for target, architectures in data.items():
+    for architecture, configurations in (architectures or {}).items():
+      for configuration, metrics in (configurations or {}).items():
+        store.add(tool, target, architecture, configuration, metrics, timestamp, file)
+        count += 1
+  store.add_units(tool, units)
+  printc.say('Read ' + str(count) + ' configurations of ' + tool + ' from "' + file + '"', script_name=script_name)
+  return True
+
+def add_work_directory(store, work_path, jobs):
+  """
+  Extract and add the configurations of an fmax work directory, dated by their status log.
+  """
+  for tool in list_dirs(work_path):
+    if tool == exp_res.simulations_dir:
+      continue
+    tool_settings_file = os.path.join(OdatixSettings.odatix_eda_tools_path, tool, "tool.yml")
+    tool_settings = exp_res.validate_tool_settings(tool_settings_file)
+    if tool_settings is None:
+      continue
+
+    input = os.path.join(work_path, tool)
+    banned_metrics = exp_res.get_banned_metrics(tool_settings, tool_settings_file, False)
+    tasks = []
+    for target in list_dirs(input):
+      for architecture in list_dirs(os.path.join(input, target)):
+        for configuration in list_dirs(os.path.join(input, target, architecture)):
+          arch = architecture + "[" + configuration + "]"
+          arch_path = os.path.join(target, architecture, configuration)
+          cur_path = os.path.join(input, arch_path)
+          tasks.append((target, architecture, configuration, (tool_settings, tool_settings_file, cur_path, arch, arch_path, False, None, banned_metrics)))
+
+    count = 0
+    for (target, architecture, configuration, task), (metrics, units, messages) in zip(tasks, exp_res.extract_all(tasks, jobs)):
+      print(messages, end="")
+      if metrics is None:
+        continue
+      timestamp = os.path.getmtime(os.path.join(task[2], "log", "status.log"))
+      store.add(tool, target, architecture, configuration, metrics, timestamp, task[2])
+      store.add_units(tool, units)
+      count += 1
+    printc.say('Extracted ' + str(count) + ' configurations of ' + tool + ' from "' + input + '"', script_name=script_name)
+  return True
+
+######################################
+# Merge
+######################################
+
+def merge_results(inputs, output, policy=DEFAULT_POLICY, fmax_metric=DEFAULT_FMAX_METRIC, format=exp_res.DEFAULT_FORMAT, jobs=exp_res.DEFAULT_JOBS):
+  store = MergeStore(policy, fmax_metric)
+  try:
+    for input in inputs:
+      if os.path.isdir(input):
+        valid = add_work_directory(store, input, jobs)
+      elif os.path.isfile(input):
+        valid = add_result_file(store, input)
+      else:
+        printc.error('Could not find "' + input + '"', script_name)
+        valid = False
+      if not valid:
+        sys.exit(-1)
+
+    if store.conflicts:
+      for (tool, target, architecture, configuration), old_source, source in store.conflicts:
+        printc.error(
+          tool + "/" + target + "/" + architecture + "/" + configuration + ' differs between "' + old_source + '" and "' + source + '"',
+          script_name,
+        )
+      printc.note("Use '--policy newest' or '--policy best_fmax' to resolve conflicts", script_name)
+      sys.exit(-1)
+
+    if store.replaced > 0:
+      printc.note(str(store.replaced) + " configurations found in several inputs were replaced (policy: " + policy + ")", script_name)
+
+    os.makedirs(output, exist_ok=True)
+    for tool in store.get_tools():
+      data, units = store.get_results(tool)
+      result_formats.write_results(output, tool, data, units, format)
+  finally:
+    store.close()
+
+######################################
+# Main
+######################################
+
+def main(args, settings=None):
+  # Get settings
+  if settings is None:
+    settings = OdatixSettings(args.config)
+    if not settings.valid:
+      sys.exit(-1)
+
+  if args.respath is not None:
+    output = args.respath
+  else:
+    output = settings.result_path
+
+  merge_results(
+    inputs=args.inputs,
+    output=output,
+    policy=args.policy,
+    fmax_metric=args.fmax_metric,
+    format=args.format,
+    jobs=args.jobs if args.jobs is not None else exp_res.DEFAULT_JOBS,
+  )
+
+if __name__ == "__main__":
+  args = parse_arguments()
+  main(args)
@@ -0,0 +1,575 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import re
+import sys
+import yaml
+import fnmatch
+import argparse
+import numpy as np
+
+import odatix.lib.printc as printc
+import odatix.lib.pareto as pareto
+import odatix.components.run_fmax_synthesis as run_synth
+import odatix.components.export_results as exp_res
+from odatix.lib.surrogate import GaussianProcess
+from odatix.lib.parallel_job_handler import ParallelJobHandler, ParallelJob
+from odatix.lib.trash import Trash, trash_dirname
+from odatix.lib.settings import OdatixSettings
+from odatix.lib.utils import ask_to_continue
+from odatix.lib.run_settings import get_synth_settings
+
+######################################
+# Settings
+######################################
+
+DEFAULT_INITIAL_SAMPLES = 16
+DEFAULT_BUDGET = 200
+DEFAULT_PATIENCE = 3
+DEFAULT_TOLERANCE = 0.001
+
+exploration_weight = 1.0
+nb_mc_samples = 4096
+
+pareto_prefix = "pareto_"
+
+number_pattern = re.compile(r"(?<![\w.'])[-+]?[0-9]+(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?(?![\w.'])")
+glob_pattern = re.compile(r"[*?\[]")
+
+script_name = os.path.basename(__file__)
+
+######################################
+# Parse Arguments
+######################################
+
+def add_arguments(parser):
+  parser.add_argument("-t", "--tool", default="vivado", help="eda tool in use (default: vivado)")
+  parser.add_argument("-O", "--objectives", nargs="+", required=True, help="objective metrics from tool.yml, as metric:max or metric:min (ex: Fmax:max LUT_count:min)")
+  parser.add_argument("-n", "--initial", type=int, default=DEFAULT_INITIAL_SAMPLES, help="number of configurations in the initial sample (default: " + str(DEFAULT_INITIAL_SAMPLES) + ")")
+  parser.add_argument("-b", "--budget", type=int, default=DEFAULT_BUDGET, help="maximum number of synthesis runs per target (default: " + str(DEFAULT_BUDGET) + ")")
+  parser.add_argument("-B", "--batch", type=int, help="number of configurations synthesized per iteration (default: nb_jobs)")
+  parser.add_argument("-p", "--patience", type=int, default=DEFAULT_PATIENCE, help="stop after this number of iterations without hypervolume improvement (default: " + str(DEFAULT_PATIENCE) + ")")
+  parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="minimum relative hypervolume improvement of an iteration (default: " + str(DEFAULT_TOLERANCE) + ")")
+  parser.add_argument("-s", "--seed", type=int, help="random seed")
+  parser.add_argument("-o", "--overwrite", action="store_true", help="overwrite existing results")
+  parser.add_argument("-y", "--noask", action="store_true", help="do not ask to continue")
+  parser.add_argument("-i", "--input", help="input settings file")
+  parser.add_argument("-a", "--archpath", help="architecture directory")
+  parser.add_argument("-w", "--work", help="work directory")
+  parser.add_argument("-r", "--respath", help="result path")
+  parser.add_argument("-e", "--noexport", action="store_true", help="do not export results while and after exploring")
+  parser.add_argument(
+    "-c",
+    "--config",
+    default=OdatixSettings.DEFAULT_SETTINGS_FILE,
+    help="global settings file for Odatix (default: " + OdatixSettings.DEFAULT_SETTINGS_FILE + ")",
+  )
+
+def parse_arguments():
+  parser = argparse.ArgumentParser(description="Explore the Pareto front of selected architectures")
+  add_arguments(parser)
+  return parser.parse_args()
+
+######################################
+# Misc functions
+######################################
+
+def parse_objectives(objectives):
+  names = []
+  directions = []
+  for objective in objectives:
+    parts = objective.split(":")
+    if len(parts) != 2 or parts[1] not in [pareto.MAXIMIZE, pareto.MINIMIZE]:
+      printc.error('Invalid objective "' + objective + '"', script_name)
+      printc.note('Objectives must be written as metric:' + pareto.MAXIMIZE + ' or metric:' + pareto.MINIMIZE, script_name)
+      sys.exit(-1)
+    names.append(parts[0])
+    directions.append(parts[1])
+  return names, directions
+
+def normalize_arch(arch):
+  if arch.endswith(".txt"):
+    arch = arch[:-4]
+  if arch.endswith("/"):
+    arch = arch[:-1]
+  if "/" not in arch:
+    arch = arch + "/" + arch
+  return arch
+
+def expand_architectures(architectures, arch_path):
+  """
+  Expand wildcards in the architecture list (ex: My_Design/*)
+  """
+  expanded = []
+  for arch in architectures:
+    if not glob_pattern.search(arch):
+      if arch not in expanded:
+        expanded.append(arch)
+      continue
+    arch_pattern = re.sub("/.*", "", arch)
+    config_pattern = re.sub(".*/", "", arch) if "/" in arch else "*"
+    if config_pattern.endswith(".txt"):
+      config_pattern = config_pattern[:-4]
+    matches = []
+    for arch_dir in sorted(os.listdir(arch_path)):
+      if not fnmatch.fnmatch(arch_dir, arch_pattern) or not os.path.isdir(os.path.join(arch_path, arch_dir)):
+        continue
+      for filename in sorted(os.listdir(os.path.join(arch_path, arch_dir))):
+        config, extension = os.path.splitext(filename)
+        if extension == ".txt" and fnmatch.fnmatch(config, config_pattern):
+          matches.append(arch_dir + "/" + config)
+    if not matches:
+      printc.warning('No configuration matches "' + arch + '" in "' + arch_path + '"', script_name)
+    for match in matches:
+      if match not in expanded:
+        expanded.append(match)
+  return expanded
+
+def get_features(candidates, arch_path):
+  """
+  Build a normalized feature vector for each configuration from the numbers
+  of its parameter file, and from its architecture name
+  """
+  arch_dirs = sorted(set(re.sub("/.*", "", candidate) for candidate in candidates))
+  numbers = []
+  for candidate in candidates:
+    param_file = os.path.join(arch_path, candidate + ".txt")
+    values = []
+    if os.path.isfile(param_file):
+      with open(param_file, "r") as f:
+        values = [float(value) for value in number_pattern.findall(f.read())]
+    numbers.append(values)
+
+  nb_numbers = max([len(values) for values in numbers] + [0])
+  features = np.zeros((len(candidates), nb_numbers + (len(arch_dirs) if len(arch_dirs) > 1 else 0)))
+  for i, candidate in enumerate(candidates):
+    features[i, :len(numbers[i])] = numbers[i]
+    if len(arch_dirs) > 1:
+      features[i, nb_numbers + arch_dirs.index(re.sub("/.*", "", candidate))] = 1.0
+
+  # Normalize in [0, 1]
+  lower = np.min(features, axis=0) if len(features) > 0 else 0
+  span = np.max(features, axis=0) - lower if len(features) > 0 else 1
+  span = np.where(span > 0, span, 1.0)
+  return (features - lower) / span
+
+def is_done(tmp_dir):
+  status_file = os.path.join(tmp_dir, run_synth.log_path, run_synth.fmax_status_filename)
+  frequency_search_file = os.path.join(tmp_dir, run_synth.log_path, run_synth.frequency_search_filename)
+  if not os.path.isfile(status_file) or not os.path.isfile(frequency_search_file):
+    return False
+  with open(status_file, "r") as f:
+    if run_synth.valid_status not in f.read():
+      return False
+  with open(frequency_search_file, "r") as f:
+    return run_synth.valid_frequency_search in f.read()
+
+def to_float(value):
+  try:
+    return float(value)
+  except (ValueError, TypeError):
+    return np.nan
+
+def maximin_selection(features, selected_mask, nb, rng):
+  """
+  Select 'nb' unselected points, each one as far as possible from the already selected ones
+  """
+  selected_mask = selected_mask.copy()
+  chosen = []
+  for _ in range(nb):
+    remaining = np.nonzero(~selected_mask)[0]
+    if len(remaining) == 0:
+      break
+    if not selected_mask.any():
+      index = remaining[rng.randint(len(remaining))]
+    else:
+      selected = features[selected_mask]
+      dist = np.min(np.sum((features[remaining, np.newaxis, :] - selected[np.newaxis, :, :]) ** 2, axis=2), axis=1)
+      index = remaining[np.argmax(dist)]
+    chosen.append(index)
+    selected_mask[index] = True
+  return chosen
+
+######################################
+# Exploration
+######################################
+
+class Exploration:
+  def __init__(self, candidates, features, objective_names, directions, rng):
+    self.candidates = candidates
+    self.features = features
+    self.objective_names = objective_names
+    self.directions = directions
+    self.rng = rng
+
+    self.evaluated = np.zeros(len(candidates), dtype=bool)
+    self.values = np.full((len(candidates), len(objective_names)), np.nan)
+    self.metrics = [None] * len(candidates)
+    self.reference = None
+
+  def add_observation(self, index, metrics):
+    self.evaluated[index] = True
+    self.metrics[index] = metrics
+    if metrics is not None:
+      values = [to_float(metrics.get(name, None)) for name in self.objective_names]
+      self.values[index] = pareto.to_maximization([values], self.directions)[0]
+
+  def get_valid(self):
+    return self.evaluated & ~np.isnan(self.values).any(axis=1)
+
+  def get_front(self):
+    valid = np.nonzero(self.get_valid())[0]
+    mask = pareto.pareto_mask(self.values[valid])
+    return valid[mask]
+
+  def update_reference(self):
+    """
+    Set the reference point once, slightly below the worst observed values
+    """
+    if self.reference is not None:
+      return
+    valid = self.values[self.get_valid()]
+    if len(valid) == 0:
+      return
+    lower = np.min(valid, axis=0)
+    span = np.max(valid, axis=0) - lower
+    span = np.where(span > 0, span, np.maximum(np.abs(lower), 1.0))
+    self.reference = lower - 0.1 * span
+
+  def get_hypervolume(self):
+    if self.reference is None:
+      return 0.0
+    return pareto.hypervolume(self.values[self.get_front()], self.reference)
+
+  def select_batch(self, nb):
+    pending = np.nonzero(~self.evaluated)[0]
+    if len(pending) == 0:
+      return []
+
+    valid = np.nonzero(self.get_valid())[0]
+    if len(valid) < 2 or self.reference is None:
+      return maximin_selection(self.features, self.evaluated, nb, self.rng)
+
+    # Fit one surrogate per objective
+    means = np.empty((len(pending), len(self.objective_names)))
+    stds = np.empty((len(pending), len(self.objective_names)))
+    for i in range(len(self.objective_names)):
+      model = GaussianProcess().fit(self.features[valid], self.values[valid, i])
+      means[:, i], stds[:, i] = model.predict(self.features[pending])
+    optimistic = means + exploration_weight * stds
+
+    # Greedy batch selection, assuming selected points will reach their predicted mean
+    front = self.values[self.get_front()]
+    selected_mask = self.evaluated.copy()
+    chosen = []
+    available = np.ones(len(pending), dtype=bool)
+    for _ in range(min(nb, len(pending))):
+      improvement = pareto.hypervolume_improvement(optimistic[available], front, self.reference, nb_mc_samples, self.rng)
+      candidates = np.nonzero(available)[0]
+      if len(improvement) > 0 and np.max(improvement) > 0:
+        best = candidates[np.argmax(improvement)]
+      else:
+        best = np.nonzero(pending == maximin_selection(self.features, selected_mask, 1, self.rng)[0])[0][0]
+      chosen.append(pending[best])
+      available[best] = False
+      selected_mask[pending[best]] = True
+      front = np.vstack([front, means[best]])
+      front = front[pareto.pareto_mask(front)]
+    return chosen
+
+######################################
+# Run Exploration
+######################################
+
+def extract_objective_metrics(tool_settings, tool_settings_file, tmp_dir, arch_name):
+  arch_path = os.path.relpath(tmp_dir)
+  metrics, _ = exp_res.extract_metrics(tool_settings, tool_settings_file, tmp_dir, arch_name, arch_path, False, None)
+  return metrics
+
+def run_jobs(arch_instances, tool, arch_path, nb_jobs, process_group, trash=None, retire_callback=None):
+  job_list = []
+  for arch_instance in arch_instances:
+    running_arch = run_synth.prepare_job(arch_instance, tool, arch_path, trash)
+    if running_arch is not None:
+      job_list.append(running_arch)
+  if not job_list:
+    return True
+  parallel_jobs = ParallelJobHandler(job_list, nb_jobs, process_group, auto_exit=True, retire_callback=retire_callback)
+  return parallel_jobs.run()
+
+def explore_target(target, candidates, arch_path, work_path, tool, tool_settings, tool_settings_file, arch_handler, constraint_file, install_path,
+                   objective_names, directions, nb_initial, budget, batch, patience, tolerance, overwrite, rng, trash=None, retire_callback=None):
+  printc.header("Exploration for target \"" + target + "\"")
+
+  # Pending configurations are the ones that need a synthesis
+  arch_instances = arch_handler.get_architectures(candidates, [target], constraint_file, install_path)
+  pending_instances = {arch_instance.arch_name: arch_instance for arch_instance in arch_instances}
+
+  valid_candidates = []
+  cached_candidates = []
+  for candidate in candidates:
+    name = normalize_arch(candidate)
+    if name in pending_instances:
+      valid_candidates.append(name)
+    elif not overwrite and is_done(os.path.join(work_path, target, name)):
+      valid_candidates.append(name)
+      cached_candidates.append(name)
+
+  if not valid_candidates:
+    printc.error("No valid configuration to explore for target \"" + target + "\"", script_name)
+    return None
+
+  features = get_features(valid_candidates, arch_path)
+  exploration = Exploration(valid_candidates, features, objective_names, directions, rng)
+
+  # Reuse existing results
+  for name in cached_candidates:
+    tmp_dir = os.path.join(work_path, target, name)
+    metrics = extract_objective_metrics(tool_settings, tool_settings_file, tmp_dir, name)
+    exploration.add_observation(valid_candidates.index(name), metrics)
+
+  printc.say(
+    str(len(valid_candidates)) + " candidate configurations, " + str(len(cached_candidates)) + " with existing results",
+    script_name=script_name
+  )
+
+  nb_runs = 0
+  iteration = 0
+  stall = 0
+  hypervolume = 0.0
+  while nb_runs < budget and not exploration.evaluated.all():
+    nb = min(batch, budget - nb_runs)
+    if iteration == 0 and exploration.evaluated.sum() < nb_initial:
+      nb = min(nb_initial - int(exploration.evaluated.sum()), budget - nb_runs)
+      selection = maximin_selection(exploration.features, exploration.evaluated, nb, rng)
+    else:
+      selection = exploration.select_batch(nb)
+    if not selection:
+      break
+
+    iteration += 1
+    printc.subheader("Iteration " + str(iteration) + ": synthesis of " + str(len(selection)) + " configurations")
+    names = [valid_candidates[index] for index in selection]
+    for name in names:
+      print("  - " + name)
+
+    success = run_jobs([pending_instances[name] for name in names], tool, arch_path, batch, arch_handler.process_group, trash, retire_callback)
+    nb_runs += len(selection)
+
+    for index, name in zip(selection, names):
+      tmp_dir = os.path.join(work_path, target, name)
+      metrics = extract_objective_metrics(tool_settings, tool_settings_file, tmp_dir, name) if is_done(tmp_dir) else None
+      exploration.add_observation(index, metrics)
+
+    if not success:
+      printc.warning("Exploration interrupted", script_name)
+      break
+
+    # Check convergence
+    exploration.update_reference()
+    new_hypervolume = exploration.get_hypervolume()
+    if hypervolume > 0:
+      improvement = (new_hypervolume - hypervolume) / hypervolume
+    else:
+      improvement = 1.0 if new_hypervolume > 0 else 0.0
+    hypervolume = new_hypervolume
+    printc.say(
+      "Pareto front: " + str(len(exploration.get_front())) + " configurations, hypervolume: " + "{:.6g}".format(hypervolume)
+      + " (" + str(nb_runs) + "/" + str(budget) + " runs)",
+      script_name=script_name
+    )
+    if iteration > 1 and improvement < tolerance:
+      stall += 1
+      if stall >= patience:
+        printc.note("Hypervolume has not improved for " + str(patience) + " iterations. Stopping.", script_name)
+        break
+    else:
+      stall = 0
+
+  exploration.update_reference()
+  front = exploration.get_front()
+
+  print()
+  printc.bold("Pareto front for target \"" + target + "\":")
+  front_data = {}
+  for index in front:
+    name = valid_candidates[index]
+    arch, config = name.split("/", 1)
+    objective_values = {objective: exploration.metrics[index].get(objective, None) for objective in objective_names}
+    front_data.setdefault(arch, {})[config] = objective_values
+    print("  - " + name + ": " + ", ".join(objective + "=" + str(value) for objective, value in objective_values.items()))
+  print()
+
+  return {
+    "candidates": len(valid_candidates),
+    "evaluated": int(exploration.evaluated.sum()),
+    "synthesized": nb_runs,
+    "hypervolume": float(exploration.get_hypervolume()),
+    "front": front_data,
+  }
+
+def write_front(output, tool, objective_names, directions, results):
+  os.makedirs(output, exist_ok=True)
+  output_file = os.path.join(output, pareto_prefix + tool + ".yml")
+  try:
+    with open(output_file, "w") as file:
+      yaml.dump(
+        {"objectives": dict(zip(objective_names, directions)), "targets": results}, file, default_flow_style=False, sort_keys=False
+      )
+      printc.say('Pareto front written to "' + output_file + '"', script_name=script_name)
+  except Exception as e:
+    printc.error('Could not write "' + output_file + '"', script_name=script_name)
+    printc.cyan("error details: ", script_name=script_name, end="")
+    print(str(e))
+
+def run_exploration(run_config_settings_filename, arch_path, tool, work_path, target_path, result_path, objectives,
+                    nb_initial, budget, batch, patience, tolerance, seed, overwrite, noask, stream=False, use_benchmark=False, benchmark_file=None):
+  _overwrite, ask_continue, show_log_if_one, nb_jobs, architectures = get_synth_settings(run_config_settings_filename)
+
+  work_path = os.path.join(work_path, tool)
+
+  if architectures is None:
+    printc.error('The "architectures" section of "' + run_config_settings_filename + '" is empty.', script_name)
+    printc.note('You must define your architectures in "' + run_config_settings_filename + '" before using this command.', script_name)
+    sys.exit(-1)
+
+  if overwrite:
+    overwrite = True
+  else:
+    overwrite = _overwrite
+
+  if noask:
+    ask_continue = False
+
+  if batch is None:
+    batch = nb_jobs
+
+  objective_names, directions = parse_objectives(objectives)
+
+  eda_target_filename, tool_settings_file, process_group, targets, constraint_file, install_path = run_synth.check_settings(tool, target_path)
+
+  # Check objectives against tool metrics
+  tool_settings = exp_res.validate_tool_settings(tool_settings_file)
+  if tool_settings is None:
+    sys.exit(-1)
+  tool_metrics = tool_settings.get("metrics", {}) or {}
+  for name in objective_names:
+    if name not in tool_metrics:
+      printc.error('Objective "' + name + '" is not a metric of "' + tool_settings_file + '"', script_name)
+      printc.note("Available metrics: " + ", ".join(tool_metrics.keys()), script_name)
+      sys.exit(-1)
+
+  candidates = expand_architectures(architectures, arch_path)
+
+  printc.say(
+    "Exploring " + str(len(candidates)) + " configurations on " + str(len(targets)) + " target(s), with a budget of "
+    + str(budget) + " synthesis runs per target",
+    script_name=script_name
+  )
+  printc.say("Objectives: " + ", ".join(name + " (" + direction + ")" for name, direction in zip(objective_names, directions)), script_name=script_name)
+  if ask_continue:
+    print()
+    ask_to_continue()
+  print()
+
+  ParallelJob.set_patterns(run_synth.synth_status_pattern, run_synth.fmax_status_pattern)
+
+  rng = np.random.RandomState(seed)
+  results = {}
+  trash = Trash(os.path.join(work_path, trash_dirname))
+  retention = run_synth.get_retention_policy(run_config_settings_filename, tool_settings_file)
+  streamer = exp_res.StreamingExporter(work_path, result_path, tool, use_benchmark, benchmark_file) if stream else None
+  retire_callback = run_synth.get_retire_callback([retention, streamer])
+  arch_handler = run_synth.get_arch_handler(work_path, arch_path, eda_target_filename, process_group, overwrite)
+  for target in targets:
+    target_results = explore_target(
+      target, candidates, arch_path, work_path, tool, tool_settings, tool_settings_file, arch_handler, constraint_file, install_path,
+      objective_names, directions, nb_initial, budget, batch, patience, tolerance, overwrite, rng, trash, retire_callback
+    )
+    if target_results is not None:
+      results[target] = target_results
+  trash.shutdown()
+  if retention is not None:
+    retention.shutdown()
+  if streamer is not None:
+    streamer.shutdown()
+
+  write_front(result_path, tool, objective_names, directions, results)
+
+######################################
+# Main
+######################################
+
+def main(args, settings=None):
+  # Get settings
+  if settings is None:
+    settings = OdatixSettings(args.config)
+    if not settings.valid:
+      sys.exit(-1)
+
+  if args.input is not None:
+    run_config_settings_filename = args.input
+  else:
+    run_config_settings_filename = settings.fmax_synthesis_settings_file
+
+  if args.archpath is not None:
+    arch_path = args.archpath
+  else:
+    arch_path = settings.arch_path
+
+  if args.work is not None:
+    work_path = args.work
+  else:
+    work_path = settings.fmax_work_path
+
+  if args.respath is not None:
+    result_path = args.respath
+  else:
+    result_path = settings.result_path
+
+  # Results are exported while jobs are running, unless they are not exported at all
+  stream = not args.noexport
+
+  run_exploration(
+    run_config_settings_filename=run_config_settings_filename,
+    arch_path=arch_path,
+    tool=args.tool,
+    work_path=work_path,
+    target_path=settings.target_path,
+    result_path=result_path,
+    objectives=args.objectives,
+    nb_initial=args.initial,
+    budget=args.budget,
+    batch=args.batch,
+    patience=args.patience,
+    tolerance=args.tolerance,
+    seed=args.seed,
+    overwrite=args.overwrite,
+    noask=args.noask,
+    stream=stream,
+    use_benchmark=settings.use_benchmark,
+    benchmark_file=settings.benchmark_file,
+  )
+
+if __name__ == "__main__":
+  args = parse_arguments()
+  main(args)
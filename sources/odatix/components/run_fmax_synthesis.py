@@ -28,14 +28,17 @@ import argparse
 import subprocess
 
 import odatix.lib.printc as printc
-from odatix.lib.replace_params import replace_params
+from odatix.lib.replace_params import replace_param_blocks
+from odatix.lib.trash import Trash, trash_dirname
 from odatix.lib.parallel_job_handler import ParallelJobHandler, ParallelJob
 from odatix.lib.settings import OdatixSettings
 from odatix.lib.architecture_handler import ArchitectureHandler, Architecture
 from odatix.lib.utils import read_from_list, copytree, create_dir, ask_to_continue, KeyNotInListError, BadValueInListError
 from odatix.lib.prepare_work import edit_config_file
 from odatix.lib.check_tool import check_tool
-from odatix.lib.run_settings import get_synth_settings
+from odatix.lib.run_settings import get_synth_settings, get_retention_settings
+from odatix.lib.retention import RetentionPolicy
+import odatix.components.export_results as exp_res
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -72,6 +75,7 @@ synth_status_filename = "synth_status.log"
 frequency_search_filename = "frequency_search.log"
 tool_makefile_filename = "makefile.mk"
 constraint_filename = "constraints.txt"
+arch_index_filename = ".arch_index"
 source_tcl = "source scripts/"
 synth_fmax_rule = "synth_fmax_only"
 test_tool_rule = "test_tool"
@@ -106,6 +110,7 @@ def add_arguments(parser):
   parser.add_argument("-i", "--input", help="input settings file")
   parser.add_argument("-a", "--archpath", help="architecture directory")
   parser.add_argument("-w", "--work", help="work directory")
+  parser.add_argument("-e", "--noexport", action="store_true", help="do not export results while and after running synthesis")
   parser.add_argument(
     "-c",
     "--config",
@@ -125,25 +130,7 @@ def parse_arguments():
 ######################################
 
 
-def run_synthesis(run_config_settings_filename, arch_path, tool, work_path, target_path, overwrite, noask):
-  _overwrite, ask_continue, show_log_if_one, nb_jobs, architectures = get_synth_settings(run_config_settings_filename)
-
-  work_path = os.path.join(work_path, tool)
-
-  if architectures is None:
-    printc.error('The "architectures" section of "' + run_config_settings_filename + '" is empty.', script_name)
-    printc.note('You must define your architectures in "' + run_config_settings_filename + '" before using this command.', script_name)
-    printc.note("Check out examples Odatix's documentation for more information.", script_name)
-    sys.exit(-1)
-
-  if overwrite:
-    overwrite = True
-  else:
-    overwrite = _overwrite
-
-  if noask:
-    ask_continue = False
-
+def check_settings(tool, target_path):
   eda_target_filename = os.path.realpath(os.path.join(target_path, "target_" + tool + ".yml"))
 
   # Check if the target file exists
@@ -248,9 +235,11 @@ def run_synthesis(run_config_settings_filename, arch_path, tool, work_path, targ
     tool, script_path, makefile=tool_makefile_filename, rule=test_tool_rule, supported_tools=default_supported_tools, tool_install_path=install_path
   )
 
-  ParallelJob.set_patterns(synth_status_pattern, fmax_status_pattern)
+  return eda_target_filename, tool_settings_filename, process_group, targets, constraint_file, install_path
+
 
-  arch_handler = ArchitectureHandler(
+def get_arch_handler(work_path, arch_path, eda_target_filename, process_group, overwrite):
+  return ArchitectureHandler(
     work_path=work_path,
     arch_path=arch_path,
     script_path=script_path,
@@ -267,8 +256,212 @@ def run_synthesis(run_config_settings_filename, arch_path, tool, work_path, targ
     default_fmax_lower_bound=default_fmax_lower_bound,
     default_fmax_upper_bound=default_fmax_upper_bound,
     overwrite=overwrite,
+    index_file=os.path.join(work_path, arch_index_filename),
+  )
+
+
+def prepare_job(arch_instance, tool, arch_path, trash=None):
+  # Get param dir (arch name before '/')
+  arch_param_dir = re.sub("/.*", "", arch_instance.arch_name)
+
+  # Create directory
+  create_dir(arch_instance.tmp_dir, trash)
+
+  # Copy scripts
+  try:
+    copytree(script_path + "/" + common_script_path, arch_instance.tmp_script_path)
+  except:
+    printc.error('"' + arch_instance.tmp_script_path + '" exists while it should not', script_name)
+
+  copytree(script_path + "/" + tool + "/tcl", arch_instance.tmp_script_path, dirs_exist_ok=True)
+
+  # Copy design
+  if arch_instance.design_path != -1:
+    copytree(arch_instance.design_path, arch_instance.tmp_dir, dirs_exist_ok=True)
+
+  # Copy rtl (if exists)
+  if not arch_instance.generate_rtl:
+    copytree(arch_instance.rtl_path, arch_instance.tmp_dir + "/" + "rtl", dirs_exist_ok=True)
+
+  # Replace parameters
+  param_filename = arch_path + "/" + arch_instance.arch_name + ".txt"
+  param_blocks = arch_instance.get_param_blocks(arch_instance.tmp_dir, param_filename)
+  if param_blocks:
+    replace_param_blocks(param_blocks, silent=True)
+
+  # Create target and architecture files
+  f = open(arch_instance.tmp_dir + "/" + target_filename, "w")
+  print(arch_instance.target, file=f)
+  f.close()
+  f = open(arch_instance.tmp_dir + "/" + arch_filename, "w")
+  print(arch_instance.arch_name, file=f)
+  f.close()
+
+  # File copy
+  if arch_instance.file_copy_enable:
+    file_copy_dest = os.path.join(arch_instance.tmp_dir, arch_instance.file_copy_dest)
+    try:
+      shutil.copy2(arch_instance.file_copy_source, file_copy_dest)
+    except Exception as e:
+      printc.error(
+        'Could not copy "' + arch_instance.script_copy_source + '" to "' + os.path.realpath(file_copy_dest) + '"',
+        script_name,
+      )
+      printc.cyan("error details: ", end="", script_name=script_name)
+      print(str(e))
+      return None
+
+  # Script copy
+  if arch_instance.script_copy_enable:
+    try:
+      shutil.copy2(arch_instance.script_copy_source, arch_instance.tmp_script_path)
+    except Exception as e:
+      printc.error(
+        'Could not copy "'
+        + arch_instance.script_copy_source
+        + '" to "'
+        + os.path.realpath(arch_instance.tmp_script_path)
+        + '"',
+        script_name,
+      )
+      printc.cyan("error details: ", end="", script_name=script_name)
+      print(str(e))
+      return None
+
+  # Edit tcl config script
+  tcl_config_file = os.path.join(arch_instance.tmp_script_path, tcl_config_filename)
+  report_path = os.path.join(arch_instance.tmp_dir, work_report_path)
+  edit_config_file(arch_instance, tcl_config_file)
+
+  # Write yaml config script
+  yaml_config_file = os.path.join(arch_instance.tmp_dir, yaml_config_filename)
+  Architecture.write_yaml(arch_instance, yaml_config_file)
+
+  # Link all scripts to config script
+  for filename in os.listdir(arch_instance.tmp_script_path):
+    if filename.endswith(".tcl"):
+      with open(arch_instance.tmp_script_path + "/" + filename, "r") as f:
+        tcl_content = f.read()
+      pattern = re.escape(source_tcl) + r"(.+?\.tcl)"
+
+      def replace_path(match):
+        return "source " + os.path.realpath(arch_instance.tmp_script_path) + "/" + match.group(1)
+
+      tcl_content = re.sub(pattern, replace_path, tcl_content)
+      with open(arch_instance.tmp_script_path + "/" + filename, "w") as f:
+        f.write(tcl_content)
+
+  # Run binary search script
+  tool_makefile_file = script_path + "/" + tool + "/" + tool_makefile_filename
+  command = (
+    "make -f {} {}".format(tool_makefile_file, synth_fmax_rule)
+    + ' WORK_DIR="{}"'.format(os.path.realpath(arch_instance.tmp_dir))
+    + ' TOOL_INSTALL_PATH="{}"'.format(os.path.realpath(arch_instance.install_path))
+    + ' ODATIX_DIR="{}"'.format(OdatixSettings.odatix_path)
+    + ' SCRIPT_DIR="{}"'.format(os.path.realpath(os.path.join(arch_instance.tmp_dir, work_script_path)))
+    + ' LOG_DIR="{}"'.format(os.path.realpath(os.path.join(arch_instance.tmp_dir, log_path)))
+    + ' CLOCK_SIGNAL="{}"'.format(arch_instance.clock_signal)
+    + ' TOP_LEVEL_MODULE="{}"'.format(arch_instance.top_level_module)
+    + ' LIB_NAME="{}"'.format(arch_instance.lib_name)
+    + " --no-print-directory"
+  )
+
+  fmax_status_file = os.path.join(arch_instance.tmp_dir, log_path, fmax_status_filename)
+  synth_status_file = os.path.join(arch_instance.tmp_dir, log_path, synth_status_filename)
+
+  running_arch = ParallelJob(
+    process=None,
+    command=command,
+    directory=".",
+    generate_rtl=arch_instance.generate_rtl,
+    generate_command=arch_instance.generate_command,
+    target=arch_instance.target,
+    arch=arch_instance.arch_name,
+    display_name=arch_instance.arch_display_name,
+    status_file=fmax_status_file,
+    progress_file=synth_status_file,
+    tmp_dir=arch_instance.tmp_dir,
+    progress_mode="fmax",
+    status="idle",
+  )
+
+  return running_arch
+
+
+def get_retention_policy(run_config_settings_filename, tool_settings_filename):
+  retention_settings = get_retention_settings(run_config_settings_filename)
+  if retention_settings is None:
+    return None
+
+  with open(tool_settings_filename, "r") as f:
+    try:
+      tool_settings = yaml.load(f, Loader=yaml.loader.SafeLoader)
+    except Exception as e:
+      printc.error('Settings file "' + tool_settings_filename + '" is not a valid YAML file', script_name)
+      printc.cyan("error details: ", end="", script_name=script_name)
+      print(str(e))
+      sys.exit(-1)
+
+  return RetentionPolicy(
+    keep=retention_settings["keep"],
+    delete=retention_settings["delete"],
+    archive_format=retention_settings["archive"],
+    tool_settings=tool_settings,
   )
 
+
+def get_retire_callback(handlers):
+  # Submit retired jobs to each handler (retention policy, streaming exporter), in order
+  handlers = [handler for handler in handlers if handler is not None]
+  if not handlers:
+    return None
+  def retire_callback(job):
+    for handler in handlers:
+      handler.submit(job)
+  return retire_callback
+
+
+def print_fmax_summary(job_list, work_path):
+  print()
+  for running_arch in job_list:
+    tmp_dir = work_path + "/" + running_arch.target + "/" + running_arch.arch
+    frequency_search_file = tmp_dir + "/" + log_path + "/" + frequency_search_filename
+    try:
+      with open(frequency_search_file, "r") as file:
+        lines = file.readlines()
+        if len(lines) >= 1:
+          summary_line = lines[-1]
+          print(running_arch.display_name + ": " + summary_line, end="")
+    except:
+      pass
+  print()
+
+
+def run_synthesis(run_config_settings_filename, arch_path, tool, work_path, target_path, overwrite, noask, result_path=None, use_benchmark=False, benchmark_file=None):
+  _overwrite, ask_continue, show_log_if_one, nb_jobs, architectures = get_synth_settings(run_config_settings_filename)
+
+  work_path = os.path.join(work_path, tool)
+
+  if architectures is None:
+    printc.error('The "architectures" section of "' + run_config_settings_filename + '" is empty.', script_name)
+    printc.note('You must define your architectures in "' + run_config_settings_filename + '" before using this command.', script_name)
+    printc.note("Check out examples Odatix's documentation for more information.", script_name)
+    sys.exit(-1)
+
+  if overwrite:
+    overwrite = True
+  else:
+    overwrite = _overwrite
+
+  if noask:
+    ask_continue = False
+
+  eda_target_filename, tool_settings_filename, process_group, targets, constraint_file, install_path = check_settings(tool, target_path)
+
+  ParallelJob.set_patterns(synth_status_pattern, fmax_status_pattern)
+
+  arch_handler = get_arch_handler(work_path, arch_path, eda_target_filename, process_group, overwrite)
+
   architecture_instances = arch_handler.get_architectures(architectures, targets, constraint_file, install_path)
 
   # Print checklist summary
@@ -285,165 +478,29 @@ def run_synthesis(run_config_settings_filename, arch_path, tool, work_path, targ
 
   job_list = []
 
-  def prepare_job(arch_instance):
-    if True:
-      # Get param dir (arch name before '/')
-      arch_param_dir = re.sub("/.*", "", arch_instance.arch_name)
-
-      # Create directory
-      create_dir(arch_instance.tmp_dir)
-
-      # Copy scripts
-      try:
-        copytree(script_path + "/" + common_script_path, arch_instance.tmp_script_path)
-      except:
-        printc.error('"' + arch_instance.tmp_script_path + '" exists while it should not', script_name)
-
-      copytree(script_path + "/" + tool + "/tcl", arch_instance.tmp_script_path, dirs_exist_ok=True)
-
-      # Copy design
-      if arch_instance.design_path != -1:
-        copytree(arch_instance.design_path, arch_instance.tmp_dir, dirs_exist_ok=True)
-
-      # Copy rtl (if exists)
-      if not arch_instance.generate_rtl:
-        copytree(arch_instance.rtl_path, arch_instance.tmp_dir + "/" + "rtl", dirs_exist_ok=True)
-
-      # Replace parameters
-      if arch_instance.use_parameters:
-        # printc.subheader("Replace parameters")
-        param_target_file = arch_instance.tmp_dir + "/" + arch_instance.param_target_filename
-        param_filename = arch_path + "/" + arch_instance.arch_name + ".txt"
-        replace_params(
-          base_text_file=param_target_file,
-          replacement_text_file=param_filename,
-          output_file=param_target_file,
-          start_delimiter=arch_instance.start_delimiter,
-          stop_delimiter=arch_instance.stop_delimiter,
-          replace_all_occurrences=False,
-          silent=True,
-        )
-        # print()
-
-      # Create target and architecture files
-      f = open(arch_instance.tmp_dir + "/" + target_filename, "w")
-      print(arch_instance.target, file=f)
-      f.close()
-      f = open(arch_instance.tmp_dir + "/" + arch_filename, "w")
-      print(arch_instance.arch_name, file=f)
-      f.close()
-
-      # File copy
-      if arch_instance.file_copy_enable:
-        file_copy_dest = os.path.join(arch_instance.tmp_dir, arch_instance.file_copy_dest)
-        try:
-          shutil.copy2(arch_instance.file_copy_source, file_copy_dest)
-        except Exception as e:
-          printc.error(
-            'Could not copy "' + arch_instance.script_copy_source + '" to "' + os.path.realpath(file_copy_dest) + '"',
-            script_name,
-          )
-          printc.cyan("error details: ", end="", script_name=script_name)
-          print(str(e))
-          return
-
-      # Script copy
-      if arch_instance.script_copy_enable:
-        try:
-          shutil.copy2(arch_instance.script_copy_source, arch_instance.tmp_script_path)
-        except Exception as e:
-          printc.error(
-            'Could not copy "'
-            + arch_instance.script_copy_source
-            + '" to "'
-            + os.path.realpath(arch_instance.tmp_script_path)
-            + '"',
-            script_name,
-          )
-          printc.cyan("error details: ", end="", script_name=script_name)
-          print(str(e))
-          return
-
-      # Edit tcl config script
-      tcl_config_file = os.path.join(arch_instance.tmp_script_path, tcl_config_filename)
-      report_path = os.path.join(arch_instance.tmp_dir, work_report_path)
-      edit_config_file(arch_instance, tcl_config_file)
-
-      # Write yaml config script
-      yaml_config_file = os.path.join(arch_instance.tmp_dir, yaml_config_filename)
-      Architecture.write_yaml(arch_instance, yaml_config_file)
-
-      # Link all scripts to config script
-      for filename in os.listdir(arch_instance.tmp_script_path):
-        if filename.endswith(".tcl"):
-          with open(arch_instance.tmp_script_path + "/" + filename, "r") as f:
-            tcl_content = f.read()
-          pattern = re.escape(source_tcl) + r"(.+?\.tcl)"
-
-          def replace_path(match):
-            return "source " + os.path.realpath(arch_instance.tmp_script_path) + "/" + match.group(1)
-
-          tcl_content = re.sub(pattern, replace_path, tcl_content)
-          with open(arch_instance.tmp_script_path + "/" + filename, "w") as f:
-            f.write(tcl_content)
-
-      # Run binary search script
-      tool_makefile_file = script_path + "/" + tool + "/" + tool_makefile_filename
-      command = (
-        "make -f {} {}".format(tool_makefile_file, synth_fmax_rule)
-        + ' WORK_DIR="{}"'.format(os.path.realpath(arch_instance.tmp_dir))
-        + ' TOOL_INSTALL_PATH="{}"'.format(os.path.realpath(arch_instance.install_path))
-        + ' ODATIX_DIR="{}"'.format(OdatixSettings.odatix_path)
-        + ' SCRIPT_DIR="{}"'.format(os.path.realpath(os.path.join(arch_instance.tmp_dir, work_script_path)))
-        + ' LOG_DIR="{}"'.format(os.path.realpath(os.path.join(arch_instance.tmp_dir, log_path)))
-        + ' CLOCK_SIGNAL="{}"'.format(arch_instance.clock_signal)
-        + ' TOP_LEVEL_MODULE="{}"'.format(arch_instance.top_level_module)
-        + ' LIB_NAME="{}"'.format(arch_instance.lib_name)
-        + " --no-print-directory"
-      )
-
-      fmax_status_file = os.path.join(arch_instance.tmp_dir, log_path, fmax_status_filename)
-      synth_status_file = os.path.join(arch_instance.tmp_dir, log_path, synth_status_filename)
-
-      running_arch = ParallelJob(
-        process=None,
-        command=command,
-        directory=".",
-        generate_rtl=arch_instance.generate_rtl,
-        generate_command=arch_instance.generate_command,
-        target=arch_instance.target,
-        arch=arch_instance.arch_name,
-        display_name=arch_instance.arch_display_name,
-        status_file=fmax_status_file,
-        progress_file=synth_status_file,
-        tmp_dir=arch_instance.tmp_dir,
-        progress_mode="fmax",
-        status="idle",
-      )
+  trash = Trash(os.path.join(work_path, trash_dirname))
 
+  for arch_instance in architecture_instances:
+    running_arch = prepare_job(arch_instance, tool, arch_path, trash)
+    if running_arch is not None:
       job_list.append(running_arch)
 
-  for arch_instance in architecture_instances:
-    prepare_job(arch_instance)
+  retention = get_retention_policy(run_config_settings_filename, tool_settings_filename)
+  streamer = exp_res.StreamingExporter(work_path, result_path, tool, use_benchmark, benchmark_file) if result_path is not None else None
+  retire_callback = get_retire_callback([retention, streamer])
 
-  parallel_jobs = ParallelJobHandler(job_list, nb_jobs, arch_handler.process_group)
+  parallel_jobs = ParallelJobHandler(job_list, nb_jobs, arch_handler.process_group, retire_callback=retire_callback)
   job_exit_success = parallel_jobs.run()
 
+  trash.shutdown()
+  if retention is not None:
+    retention.shutdown()
+  if streamer is not None:
+    streamer.shutdown()
+
   # Summary
   if job_exit_success:
-    print()
-    for running_arch in job_list:
-      tmp_dir = work_path + "/" + running_arch.target + "/" + running_arch.arch
-      frequency_search_file = tmp_dir + "/" + log_path + "/" + frequency_search_filename
-      try:
-        with open(frequency_search_file, "r") as file:
-          lines = file.readlines()
-          if len(lines) >= 1:
-            summary_line = lines[-1]
-            print(running_arch.display_name + ": " + summary_line, end="")
-      except:
-        pass
-    print()
+    print_fmax_summary(job_list, work_path)
 
 
 ######################################
@@ -478,7 +535,14 @@ def main(args, settings=None):
   overwrite = args.overwrite
   noask = args.noask
 
-  run_synthesis(run_config_settings_filename, arch_path, tool, work_path, target_path, overwrite, noask)
+  # Results are exported while jobs are running, unless they are not exported at all,
+  # with the benchmark settings used by the final export
+  result_path = None if args.noexport else settings.result_path
+
+  run_synthesis(
+    run_config_settings_filename, arch_path, tool, work_path, target_path, overwrite, noask,
+    result_path, settings.use_benchmark, settings.benchmark_file
+  )
 
 
 if __name__ == "__main__":
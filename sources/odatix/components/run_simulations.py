@@ -26,7 +26,8 @@ import argparse
 import subprocess
 
 import odatix.lib.printc as printc
-from odatix.lib.replace_params import replace_params
+from odatix.lib.replace_params import replace_param_blocks, ParamBlock
+from odatix.lib.trash import Trash, trash_dirname
 from odatix.lib.parallel_job_handler import ParallelJobHandler, ParallelJob
 from odatix.lib.settings import OdatixSettings
 from odatix.lib.simulation_handler import SimulationHandler
@@ -147,11 +148,13 @@ def run_simulations(run_config_settings_filename, arch_path, sim_path, work_path
 
   job_list = []
 
+  trash = Trash(os.path.join(work_path, trash_dirname))
+
   def prepare_job(sim_instance):
     
     if True:
       # create directory
-      create_dir(sim_instance.tmp_dir)
+      create_dir(sim_instance.tmp_dir, trash)
 
       # copy simulation sources
       copytree(sim_instance.source_sim_dir, sim_instance.tmp_dir, dirs_exist_ok = True)
@@ -169,36 +172,18 @@ def run_simulations(run_config_settings_filename, arch_path, sim_path, work_path
       if not sim_instance.architecture.generate_rtl:
         copytree(sim_instance.architecture.rtl_path, sim_instance.tmp_dir + '/' + 'rtl', dirs_exist_ok = True)
 
-      # replace parameters
-      if sim_instance.architecture.use_parameters:
-        #printc.subheader("Replace parameters")
-        param_target_file = sim_instance.tmp_dir + '/' + sim_instance.architecture.param_target_filename
-        param_filename = arch_path + '/' + sim_instance.architecture.arch_name + '.txt'
-        replace_params(
-          base_text_file=param_target_file, 
-          replacement_text_file=param_filename, 
-          output_file=param_target_file, 
-          start_delimiter=sim_instance.architecture.start_delimiter, 
-          stop_delimiter=sim_instance.architecture.stop_delimiter, 
-          replace_all_occurrences=False,
-          silent=True
-        )
-        #print()
-
-      # replace parameters again (override)
+      # replace parameters (architecture, then override) in a single pass per file
+      param_filename = arch_path + '/' + sim_instance.architecture.arch_name + '.txt'
+      param_blocks = sim_instance.architecture.get_param_blocks(sim_instance.tmp_dir, param_filename)
       if sim_instance.override_parameters:
-        #printc.subheader("Replace parameters")
-        param_target_file = sim_instance.tmp_dir + '/' + sim_instance.override_param_target_filename
-        param_file = sim_instance.tmp_dir + '/' + sim_instance.override_param_filename
-        replace_params(
-          base_text_file=param_target_file, 
-          replacement_text_file=param_file, 
-          output_file=param_target_file, 
-          start_delimiter=sim_instance.override_start_delimiter, 
-          stop_delimiter=sim_instance.override_stop_delimiter, 
-          replace_all_occurrences=False,
-          silent=True
-        )
+        param_blocks.append(ParamBlock.from_file(
+          target_file=sim_instance.tmp_dir + '/' + sim_instance.override_param_target_filename,
+          replacement_text_file=sim_instance.tmp_dir + '/' + sim_instance.override_param_filename,
+          start_delimiter=sim_instance.override_start_delimiter,
+          stop_delimiter=sim_instance.override_stop_delimiter
+        ))
+      if param_blocks:
+        replace_param_blocks(param_blocks, silent=True)
 
       # run simulation command
       command = (
@@ -240,6 +225,8 @@ def run_simulations(run_config_settings_filename, arch_path, sim_path, work_path
   )
   job_exit_success = parallel_jobs.run()
 
+  trash.shutdown()
+
 ######################################
 # Main
 ######################################
@@ -0,0 +1,294 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Read-only JSON API of the result explorer, answered from the loaded results:
+#
+# GET /api/v1/tools
+#   Result files with their targets, architectures, metrics and units.
+#
+# GET /api/v1/results
+#   Configurations, filtered and paginated with the query parameters:
+#   - tool: tools to include (repeatable or comma separated, default: all)
+#   - target: targets to include (repeatable or comma separated, default: all)
+#   - arch: glob pattern of architectures (repeatable, ex: arch=Example*)
+#   - config: glob pattern of configurations (repeatable, ex: config=*_32)
+#   - range: metric range 'metric:min:max', a bound can be empty (repeatable, ex: range=Fmax:100:)
+#   - columns: metrics to return (repeatable or comma separated, default: all)
+#   - offset, limit: pagination (default: 0 and 1000, at most 10000)
+#
+# Responses have an ETag, changing when the result files change, and are
+# compressed with gzip when the client accepts it.
+
+import gzip
+import json
+import fnmatch
+import hashlib
+import numpy as np
+from flask import request, Response
+
+from odatix.explorer.result_index import key_columns
+
+api_prefix = "/api/v1"
+
+DEFAULT_LIMIT = 1000
+MAX_LIMIT = 10000
+
+# smallest response compressed with gzip, in bytes
+min_compress_size = 1024
+
+
+class ApiError(Exception):
+  pass
+
+
+def get_list(name):
+  """
+  Return the values of a query parameter, repeated or comma separated.
+  """
+  values = []
+  for value in request.args.getlist(name):
+    values += [item.strip() for item in value.split(",") if item.strip()]
+  return values
+
+
+def get_int(name, default, minimum, maximum=None):
+  value = request.args.get(name)
+  if value is None:
+    return default
+  try:
+    value = int(value)
+  except ValueError:
+    raise ApiError("'" + name + "' must be an integer")
+  if value < minimum or (maximum is not None and value > maximum):
+    raise ApiError("'" + name + "' must be in [" + str(minimum) + ", " + (str(maximum) if maximum is not None else "") + "]")
+  return value
+
+
+def get_ranges(metrics):
+  """
+  Return the (metric, min, max) of the 'range' query parameters.
+  """
+  ranges = []
+  for value in request.args.getlist("range"):
+    metric, _, bounds = value.rpartition(":")
+    metric, _, lower = metric.rpartition(":")
+    if not metric:
+      raise ApiError("'range' must be 'metric:min:max', got '" + value + "'")
+    if metric not in metrics:
+      raise ApiError("unknown metric '" + metric + "'")
+    try:
+      lower = float(lower) if lower else None
+      upper = float(bounds) if bounds else None
+    except ValueError:
+      raise ApiError("bounds of 'range' must be numbers, got '" + value + "'")
+    ranges.append((metric, lower, upper))
+  return ranges
+
+
+def to_json_value(value):
+  if isinstance(value, np.generic):
+    return value.item()
+  return str(value)
+
+
+def get_etag(explorer, yaml_files):
+  """
+  Return the ETag of the request, derived from the query and the signatures of the result files it is answered from.
+  """
+  signatures = [(yaml_file, explorer.file_signatures.get(yaml_file)) for yaml_file in sorted(yaml_files)]
+  query = sorted((key, value) for key, values in request.args.lists() for value in values)
+  return hashlib.sha1(repr((request.path, query, signatures)).encode()).hexdigest()
+
+
+def get_not_modified(explorer, yaml_files):
+  """
+  Return a 304 response if the client already has the response of the request, or None.
+  """
+  etag = get_etag(explorer, yaml_files)
+  if etag not in request.if_none_match:
+    return None
+  response = Response(status=304)
+  response.set_etag(etag)
+  return response
+
+
+def make_response(explorer, payload, yaml_files, status=200):
+  """
+  Return the JSON response of a payload, gzip compressed if accepted.
+  """
+  body = json.dumps(payload, default=to_json_value, allow_nan=False).encode()
+  response = Response(body, status=status, mimetype="application/json")
+  response.headers["Vary"] = "Accept-Encoding"
+  if status == 200:
+    response.set_etag(get_etag(explorer, yaml_files))
+  if len(body) >= min_compress_size and "gzip" in request.headers.get("Accept-Encoding", ""):
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers["Content-Encoding"] = "gzip"
+  return response
+
+
+def get_tools(explorer):
+  """
+  Return the valid result files by tool name.
+  """
+  tools = {}
+  for yaml_file in explorer.valid_yaml_files:
+    tool = yaml_file[len(explorer.yaml_prefix):-len(".yml")]
+    tools[tool] = yaml_file
+  return tools
+
+
+def select_rows(explorer, yaml_file, targets, arch_patterns, config_patterns, ranges):
+  """
+  Return the rows of a result file matching the filters, using its result index.
+  """
+  df = explorer.dfs.get(yaml_file)
+  index = explorer.indexes.get(yaml_file)
+  if df is None or index is None:
+    return None
+  selected = []
+  for target in index.targets:
+    if targets and target not in targets:
+      continue
+    architectures = [
+      architecture
+      for architecture in index.architectures[target]
+      if not arch_patterns or any(fnmatch.fnmatchcase(architecture, pattern) for pattern in arch_patterns)
+    ]
+    if not architectures:
+      continue
+    numeric_frame = index.get_numeric_frame(target, architectures)
+    mask = np.ones(len(numeric_frame), dtype=bool)
+    if config_patterns:
+      mask &= numeric_frame["Configuration"].map(
+        lambda config: any(fnmatch.fnmatchcase(str(config), pattern) for pattern in config_patterns)
+      ).to_numpy(dtype=bool)
+    for metric, lower, upper in ranges:
+      if metric not in numeric_frame.columns:
+        mask[:] = False
+        continue
+      values = numeric_frame[metric].to_numpy(dtype=float)
+      if lower is not None:
+        mask &= values >= lower
+      if upper is not None:
+        mask &= values <= upper
+    selected.append(numeric_frame.index[mask])
+  if not selected:
+    return df.iloc[0:0]
+  # Rows are returned with their original values, numeric frames are only used to filter
+  return df.loc[selected[0].append(selected[1:])]
+
+
+def setup_routes(explorer):
+  server = explorer.app.server
+
+  @server.route(api_prefix + "/tools")
+  def api_tools():
+    tools = get_tools(explorer)
+    not_modified = get_not_modified(explorer, tools.values())
+    if not_modified is not None:
+      return not_modified
+    payload = {"tools": []}
+    for tool, yaml_file in tools.items():
+      index = explorer.indexes.get(yaml_file)
+      signature = explorer.file_signatures.get(yaml_file)
+      if index is None:
+        continue
+      payload["tools"].append(
+        {
+          "tool": tool,
+          "file": yaml_file,
+          "modified": signature[0] / 1e9 if signature else None,
+          "targets": index.targets,
+          "architectures": index.architectures,
+          "metrics": index.metrics,
+          "units": index.units,
+        }
+      )
+    return make_response(explorer, payload, tools.values())
+
+  @server.route(api_prefix + "/results")
+  def api_results():
+    tools = get_tools(explorer)
+    try:
+      selected_tools = get_list("tool") or list(tools)
+      unknown_tools = [tool for tool in selected_tools if tool not in tools]
+      if unknown_tools:
+        raise ApiError("unknown tool '" + unknown_tools[0] + "'")
+      yaml_files = [tools[tool] for tool in selected_tools]
+      metrics = []
+      for yaml_file in yaml_files:
+        index = explorer.indexes.get(yaml_file)
+        if index is not None:
+          metrics += [metric for metric in index.metrics if metric not in metrics]
+
+      columns = get_list("columns") or metrics
+      unknown_columns = [column for column in columns if column not in metrics]
+      if unknown_columns:
+        raise ApiError("unknown metric '" + unknown_columns[0] + "'")
+      ranges = get_ranges(metrics)
+      offset = get_int("offset", 0, 0)
+      limit = get_int("limit", DEFAULT_LIMIT, 1, MAX_LIMIT)
+    except ApiError as e:
+      return make_response(explorer, {"error": str(e)}, [], status=400)
+    # The result files are not queried if the client already has the response
+    not_modified = get_not_modified(explorer, yaml_files)
+    if not_modified is not None:
+      return not_modified
+
+    targets = set(get_list("target"))
+    arch_patterns = request.args.getlist("arch")
+    config_patterns = request.args.getlist("config")
+
+    frames = []
+    for tool, yaml_file in zip(selected_tools, yaml_files):
+      df = select_rows(explorer, yaml_file, targets, arch_patterns, config_patterns, ranges)
+      if df is None or df.empty:
+        continue
+      df = df.reindex(columns=[column for column in key_columns + columns])
+      df.insert(0, "Tool", tool)
+      frames.append(df)
+
+    total = sum(len(df) for df in frames)
+    rows = []
+    # Only the rows of the requested page are converted
+    start = offset
+    for df in frames:
+      if len(rows) >= limit:
+        break
+      if start >= len(df):
+        start -= len(df)
+        continue
+      page = df.iloc[start:start + limit - len(rows)]
+      start = 0
+      page = page.astype(object).where(page.notna(), None)
+      rows += page.to_dict("records")
+
+    next_offset = offset + len(rows)
+    payload = {
+      "total": total,
+      "offset": offset,
+      "limit": limit,
+      "next_offset": next_offset if next_offset < total else None,
+      "columns": ["Tool"] + key_columns + columns,
+      "rows": rows,
+    }
+    return make_response(explorer, payload, yaml_files)
@@ -0,0 +1,196 @@
+/**********************************************************************
+ *                                Odatix                                *
+ **********************************************************************
+ *
+ * Copyright (C) 2022 Jonathan Saussereau
+ *
+ * This file is part of Odatix.
+ * Odatix is free software: you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation, either version 3 of the License, or
+ * (at your option) any later version.
+ *
+ * Odatix is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+ */
+
+/*
+ * Display settings applied in the browser on the figures built by the server,
+ * so that showing an architecture or toggling a display setting does not
+ * need a request to the server.
+ * Traces of architectures carry the architecture name in 'meta.architecture'
+ * (and their maximum in 'meta.max' for radar charts), figures carry their
+ * title in 'layout.meta.title'.
+ */
+
+(function () {
+  function getRadialMax(data) {
+    let max = null;
+    data.forEach(function (trace) {
+      if (!trace.meta || trace.visible === false) {
+        return;
+      }
+      const r = trace.meta.max;
+      if (typeof r === "number" && isFinite(r) && (max === null || r > max)) {
+        max = r;
+      }
+    });
+    return max === null ? 1 : max;
+  }
+
+  /*
+   * Return a copy of 'figure' with the display settings applied.
+   * Settings set to null are left as built by the server.
+   */
+  function patchFigure(figure, settings) {
+    if (!figure || !figure.data) {
+      return window.dash_clientside.no_update;
+    }
+    // Figures with too many points have no labels
+    const showLabels = settings.showLabels && !(figure.layout && figure.layout.meta && figure.layout.meta.labels === false);
+    const data = figure.data.map(function (trace) {
+      if (!trace.meta || trace.meta.architecture === undefined) {
+        return trace;
+      }
+      const patched = Object.assign({}, trace);
+      patched.visible = !settings.hidden.has(trace.meta.architecture);
+      if (trace.mode !== undefined && settings.showLines !== null) {
+        patched.mode = settings.showLines ? "lines+markers" : "markers";
+        if (showLabels) {
+          patched.mode += "+text";
+        }
+      }
+      return patched;
+    });
+
+    const layout = Object.assign({}, figure.layout);
+    if (settings.background !== null) {
+      layout.paper_bgcolor = settings.background;
+    }
+    if (settings.showLegend !== null) {
+      layout.showlegend = settings.showLegend;
+    }
+    if (settings.showTitle !== null && layout.meta && layout.meta.title !== undefined) {
+      layout.title = Object.assign({}, layout.title, { text: settings.showTitle ? layout.meta.title : "" });
+    }
+    if (layout.polar && layout.polar.radialaxis && layout.polar.radialaxis.range) {
+      const radialaxis = Object.assign({}, layout.polar.radialaxis, { range: [0, getRadialMax(data)] });
+      layout.polar = Object.assign({}, layout.polar, { radialaxis: radialaxis });
+    }
+    return Object.assign({}, figure, { data: data, layout: layout });
+  }
+
+  function patchConfig(config, format) {
+    if (!config) {
+      return window.dash_clientside.no_update;
+    }
+    const options = Object.assign({}, config.toImageButtonOptions, { format: format });
+    return Object.assign({}, config, { toImageButtonOptions: options });
+  }
+
+  function isChecked(value, option) {
+    return Array.isArray(value) && value.indexOf(option) !== -1;
+  }
+
+  window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    odatix: {
+      // Inputs: show all and hide all clicks, values of the rendered legend checklists,
+      // states: hidden architectures, architectures matching the legend search and ids of the checklists
+      update_hidden: function (showClicks, hideClicks, values, hidden, architectures, ids) {
+        const triggered = window.dash_clientside.callback_context.triggered.map(function (item) {
+          return item.prop_id.split(".")[0];
+        });
+        const hiddenSet = new Set(hidden || []);
+        if (triggered.indexOf("show-all") !== -1) {
+          (architectures || []).forEach(function (architecture) {
+            hiddenSet.delete(architecture);
+          });
+        } else if (triggered.indexOf("hide-all") !== -1) {
+          (architectures || []).forEach(function (architecture) {
+            hiddenSet.add(architecture);
+          });
+        } else {
+          // a checklist was clicked, or the legend page was rendered
+          ids.forEach(function (id, i) {
+            if (isChecked(values[i], id.index)) {
+              hiddenSet.delete(id.index);
+            } else {
+              hiddenSet.add(id.index);
+            }
+          });
+        }
+        const newHidden = Array.from(hiddenSet).sort();
+        const newValues = ids.map(function (id) {
+          return hiddenSet.has(id.index) ? [] : [id.index];
+        });
+        const unchanged = JSON.stringify(newHidden) === JSON.stringify((hidden || []).slice().sort());
+        return [unchanged ? window.dash_clientside.no_update : newHidden, newValues];
+      },
+
+      // Inputs: display settings and hidden architectures, states: figure and config
+      update_xy: function (toggleLegend, toggleTitle, toggleLines, dlFormat, background, hidden, figure, config) {
+        const settings = {
+          hidden: new Set(hidden || []),
+          showLegend: isChecked(toggleLegend, "show_legend"),
+          showTitle: isChecked(toggleTitle, "show_title"),
+          showLines: isChecked(toggleLines, "show_lines"),
+          showLabels: false,
+          background: background,
+        };
+        return [patchFigure(figure, settings), patchConfig(config, dlFormat)];
+      },
+
+      // Inputs: display settings and hidden architectures, states: figure and config
+      update_vs: function (toggleLegend, toggleTitle, toggleLines, toggleLabels, dlFormat, background, hidden, figure, config) {
+        const settings = {
+          hidden: new Set(hidden || []),
+          showLegend: isChecked(toggleLegend, "show_legend"),
+          showTitle: isChecked(toggleTitle, "show_title"),
+          showLines: isChecked(toggleLines, "show_lines"),
+          showLabels: Array.isArray(toggleLabels) && toggleLabels.length > 0,
+          background: background,
+        };
+        return [patchFigure(figure, settings), patchConfig(config, dlFormat)];
+      },
+
+      // Inputs: display settings, states: figure and config
+      // (hidden architectures are left out of the figure by the server, as they are not part of the front)
+      update_pareto: function (toggleLegend, toggleTitle, dlFormat, background, figure, config) {
+        const settings = {
+          hidden: new Set(),
+          showLegend: isChecked(toggleLegend, "show_legend"),
+          showTitle: isChecked(toggleTitle, "show_title"),
+          showLines: null,
+          showLabels: false,
+          background: background,
+        };
+        return [patchFigure(figure, settings), patchConfig(config, dlFormat)];
+      },
+
+      // Inputs: display settings and hidden architectures, states: all figures and configs of the page
+      update_radar: function (toggleTitle, toggleLines, dlFormat, background, hidden, figures, configs) {
+        const settings = {
+          hidden: new Set(hidden || []),
+          showLegend: null,
+          showTitle: isChecked(toggleTitle, "show_title"),
+          showLines: isChecked(toggleLines, "show_lines"),
+          showLabels: false,
+          background: background,
+        };
+        return [
+          figures.map(function (figure) {
+            return patchFigure(figure, settings);
+          }),
+          configs.map(function (config) {
+            return patchConfig(config, dlFormat);
+          }),
+        ];
+      },
+    },
+  });
+})();
@@ -0,0 +1,104 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+# number of points of a figure above which traces are drawn with WebGL instead of SVG
+webgl_threshold = 20000
+
+# number of points of a figure above which point labels cannot be shown
+label_threshold = 2000
+
+# number of bins along x of a decimated trace, each bin keeps its minimum and maximum y
+decimation_bins = 1000
+
+
+def get_scatter(point_count):
+  """
+  Return the scatter trace class to use for a figure of 'point_count' points.
+  """
+  return go.Scattergl if point_count > webgl_threshold else go.Scatter
+
+
+def to_numeric(values):
+  return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=float)
+
+
+def decimate(x_values, y_values, bins=decimation_bins):
+  """
+  Return the sorted positions of the points to draw so that a trace keeps at most
+  two points per bin along x: the points with the minimum and maximum y of the bin.
+  Points are kept as is, so hover information stays exact. Returns None if the
+  trace is small enough to be drawn entirely.
+  'x_values' may be None for categorical x axes: positions are binned instead.
+  """
+  count = len(y_values)
+  if count <= 2 * bins:
+    return None
+
+  y = to_numeric(y_values)
+  x = np.arange(count, dtype=float) if x_values is None else to_numeric(x_values)
+  positions = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+  if len(positions) <= 2 * bins:
+    return positions.tolist()
+
+  x = x[positions]
+  y = y[positions]
+  x_min, x_max = x.min(), x.max()
+  if x_max > x_min:
+    bin_ids = np.minimum(((x - x_min) / (x_max - x_min) * bins).astype(np.int64), bins - 1)
+  else:
+    bin_ids = np.zeros(len(x), dtype=np.int64)
+
+  # Sort by bin, then by y: the first point of a bin has the minimum y and the last one the maximum y
+  order = np.lexsort((y, bin_ids))
+  sorted_bins = bin_ids[order]
+  first = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+  last = np.r_[first[1:] - 1, len(order) - 1]
+  kept = np.unique(np.concatenate((order[first], order[last])))
+  return positions[kept].tolist()
+
+
+def select(values, positions):
+  if positions is None:
+    return values
+  return [values[position] for position in positions]
+
+
+def add_decimation_note(fig, shown_count, point_count):
+  """
+  Tell in the figure that only part of the points is drawn.
+  """
+  if shown_count >= point_count:
+    return
+  fig.add_annotation(
+    text="Showing {} of {} points (minimum and maximum per bin)".format(shown_count, point_count),
+    xref="paper",
+    yref="paper",
+    x=1,
+    y=1,
+    xanchor="right",
+    yanchor="bottom",
+    showarrow=False,
+    font=dict(size=10, color="#6a737d"),
+  )
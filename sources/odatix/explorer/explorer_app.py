@@ -21,6 +21,7 @@
 
 import os
 import sys
+import threading
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
@@ -31,6 +32,13 @@ from flask import jsonify
 import odatix.explorer.page_xy as page_xy
 import odatix.explorer.page_vs as page_vs
 import odatix.explorer.page_radar as page_radar
+import odatix.explorer.page_pareto as page_pareto
+import odatix.explorer.legend as legend
+import odatix.explorer.api as api
+from odatix.explorer.figure_cache import FigureCache, DEFAULT_CACHE_SIZE
+from odatix.explorer.result_index import ResultIndex
+from odatix.explorer.result_watcher import ResultWatcher
+import odatix.explorer.result_snapshot as result_snapshot
 
 import odatix.lib.printc as printc
 from odatix.lib.utils import internal_error
@@ -39,12 +47,19 @@ import odatix.lib.term_mode as term_mode
 script_name = os.path.basename(__file__)
 error_logfile = "odatix-explorer_error.log"
 
+# C YAML loader of libyaml, much faster on large result files, if PyYAML was built with it
+yaml_loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# time between two checks for updated result files when the result directory cannot be watched, in seconds
+reload_interval = 2
+
 class ResultExplorer:
-  def __init__(self, result_path="results", yaml_prefix="results_", old_settings=None, safe_mode=False):
+  def __init__(self, result_path="results", yaml_prefix="results_", old_settings=None, safe_mode=False, cache_size=DEFAULT_CACHE_SIZE, watch=True):
     self.result_path = result_path
     self.yaml_prefix = yaml_prefix
     self.old_settings = old_settings
     self.safe_mode = safe_mode
+    self.watch = watch
 
     # Check paths
     if not os.path.exists(result_path):
@@ -54,16 +69,26 @@ class ResultExplorer:
       sys.exit(-1)
 
     # Initialize additional instance variables here
-    self.yaml_files = [
-      file for file in os.listdir(self.result_path) if file.endswith(".yml") and file.startswith(yaml_prefix)
-    ]
+    self.yaml_files = self.list_yaml_files()
     self.valid_yaml_files = []
-    self.all_data = {}
     self.dfs = {}
     self.units = {}
+    self.indexes = {}
+    self.file_signatures = {}
+    self.file_versions = {}
+    self.data_version = 0
+    self.figure_cache = FigureCache(cache_size * 1024 * 1024)
+    self.reload_lock = threading.Lock()
+    self.all_architectures = []
+    self.architecture_indexes = {}
+    self.all_configurations = []
+    self.watcher = ResultWatcher(self.result_path, self.reload_yaml_files, reload_interval)
 
-    # Load and validate YAML files
-    self.load_yaml_files()
+    # Load and validate YAML files in the background, the server starts once the first valid file is loaded
+    self.first_file_loaded = threading.Event()
+    self.loader = threading.Thread(target=self.load_yaml_files, name="odatix-result-loader", daemon=True)
+    self.loader.start()
+    self.first_file_loaded.wait()
 
     if not self.valid_yaml_files:
       printc.error(
@@ -71,15 +96,11 @@ class ResultExplorer:
       )
       sys.exit(-1)
 
-    self.all_architectures = sorted(
-      set(architecture for df in self.dfs.values() for architecture in df["Architecture"].unique())
-    )
-    self.all_configurations = sorted(set(config for df in self.dfs.values() for config in df["Configuration"].unique()))
-
     self.app = dash.Dash(__name__)
     self.app.title = "Odatix"
 
     self.app.server.register_error_handler(Exception, self.handle_flask_exception)
+    api.setup_routes(self)
 
     self.setup_layout()
     self.setup_callbacks()
@@ -94,36 +115,141 @@ class ResultExplorer:
     if not self.safe_mode:
       os._exit(-1)
 
+  def list_yaml_files(self):
+    return sorted(file for file in os.listdir(self.result_path) if self.is_yaml_file(file))
+
+  def is_yaml_file(self, file):
+    return file.endswith(".yml") and file.startswith(self.yaml_prefix)
+
   def load_yaml_files(self):
     """
-    Load and validate YAML files from the specified path.
+    Load and validate YAML files from the specified path, then watch the path
+    for updated files if 'watch' is set. Runs in a background thread.
     """
-    for yaml_file in self.yaml_files:
-      file_path = os.path.join(self.result_path, yaml_file)
-      try:
+    try:
+      for yaml_file in self.yaml_files:
+        with self.reload_lock:
+          self.file_signatures[yaml_file] = self.get_file_signature(yaml_file)
+          valid = self.load_yaml_file(yaml_file)
+        if valid:
+          self.first_file_loaded.set()
+    finally:
+      self.first_file_loaded.set()
+    if self.watch:
+      self.watcher.start()
+
+  def load_yaml_file(self, yaml_file):
+    """
+    Load and validate a YAML file. Returns True if it is a valid result file.
+    The previous results of the file are kept if it is not valid.
+    """
+    file_path = os.path.join(self.result_path, yaml_file)
+    signature = self.file_signatures.get(yaml_file)
+    try:
+      # Parsing the YAML file is only needed if it changed since its snapshot was saved
+      snapshot = result_snapshot.load_snapshot(file_path, signature)
+      if snapshot is not None:
+        units, df = snapshot
+      else:
         data, units = self.get_yaml_data(file_path)
         df = self.update_dataframe(data)
-        if df is None:
-          printc.warning('YAML file  "' + yaml_file + '" is empty or corrupted, skipping...', script_name=script_name)
-          printc.note(
-            'Run fmax synthesis with the correct settings to generate "' + yaml_file + '"', script_name=script_name
-          )
-        else:
-          self.all_data[yaml_file] = data
-          self.units[yaml_file] = units
-          self.valid_yaml_files.append(yaml_file)
-          self.dfs[yaml_file] = df
-      except:
-        printc.warning(
-          'YAML file  "' + yaml_file + '" is not a valid result file, skipping...', script_name=script_name
+        if df is not None:
+          result_snapshot.save_snapshot(file_path, signature, units, df)
+      if df is None:
+        printc.warning('YAML file  "' + yaml_file + '" is empty or corrupted, skipping...', script_name=script_name)
+        printc.note(
+          'Run fmax synthesis with the correct settings to generate "' + yaml_file + '"', script_name=script_name
         )
+        return False
+      index = ResultIndex(df, units)
+    except:
+      printc.warning(
+        'YAML file  "' + yaml_file + '" is not a valid result file, skipping...', script_name=script_name
+      )
+      return False
+
+    # The file is fully loaded and indexed before its previous results are replaced.
+    # Its version is updated last, so figures built from the previous results are never cached under the new version.
+    self.units[yaml_file] = units
+    self.dfs[yaml_file] = df
+    self.indexes[yaml_file] = index
+    if yaml_file not in self.valid_yaml_files:
+      self.valid_yaml_files = self.valid_yaml_files + [yaml_file]
+    self.update_architectures()
+    self.file_versions[yaml_file] = self.file_versions.get(yaml_file, 0) + 1
+    self.data_version += 1
+    return True
+
+  def remove_yaml_file(self, yaml_file):
+    """
+    Forget the results of a deleted YAML file.
+    """
+    if yaml_file not in self.valid_yaml_files:
+      return
+    self.valid_yaml_files = [file for file in self.valid_yaml_files if file != yaml_file]
+    for results in (self.indexes, self.dfs, self.units):
+      results.pop(yaml_file, None)
+    result_snapshot.remove_snapshot(os.path.join(self.result_path, yaml_file))
+    self.update_architectures()
+    self.file_versions[yaml_file] = self.file_versions.get(yaml_file, 0) + 1
+    self.data_version += 1
+
+  def update_architectures(self):
+    """
+    Update the lists of architectures and configurations of all the result files.
+    Each architecture keeps its color index once assigned, so colors do not change on reload.
+    """
+    dfs = list(self.dfs.values())
+    all_architectures = sorted(set(architecture for df in dfs for architecture in df["Architecture"].unique()))
+    for architecture in all_architectures:
+      if architecture not in self.architecture_indexes:
+        self.architecture_indexes[architecture] = len(self.architecture_indexes)
+    self.all_architectures = all_architectures
+    self.all_configurations = sorted(set(config for df in dfs for config in df["Configuration"].unique()))
+
+  def get_color(self, architecture):
+    return legend.get_color(self.architecture_indexes.get(architecture, 0))
+
+  def get_file_signature(self, yaml_file):
+    try:
+      stat = os.stat(os.path.join(self.result_path, yaml_file))
+    except OSError:
+      return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+  def reload_yaml_files(self, yaml_files=None):
+    """
+    Reload the YAML files written since they were loaded, such as the results
+    exported while synthesis jobs are running. Called by the result watcher with
+    the names of the files that may have changed, or None to check all files.
+    'data_version' and 'file_versions' are incremented on each change.
+    """
+    with self.reload_lock:
+      if yaml_files is None:
+        try:
+          yaml_files = set(self.list_yaml_files())
+        except OSError:
+          return
+        yaml_files.update(self.file_signatures)
+      for yaml_file in sorted(yaml_files):
+        if not self.is_yaml_file(yaml_file):
+          continue
+        signature = self.get_file_signature(yaml_file)
+        if signature == self.file_signatures.get(yaml_file):
+          continue
+        if signature is None:
+          self.file_signatures.pop(yaml_file, None)
+          self.remove_yaml_file(yaml_file)
+          continue
+        self.file_signatures[yaml_file] = signature
+        self.load_yaml_file(yaml_file)
 
   def get_yaml_data(self, file_path):
     """
     Load YAML data from a file.
     """
     with open(file_path, "r") as file:
-      yaml_content = yaml.safe_load(file)
+      yaml_content = yaml.load(file, Loader=yaml_loader)
       units = yaml_content.get("units", {})
       synth_results = yaml_content.get("fmax_results", {})
       return synth_results, units
@@ -181,12 +307,15 @@ class ResultExplorer:
         return page_vs.layout(self)
       elif pathname == "/radar":
         return page_radar.layout(self)
+      elif pathname == "/pareto":
+        return page_pareto.layout(self)
       else:
         return page_xy.layout(self)
 
     page_xy.setup_callbacks(self)
     page_vs.setup_callbacks(self)
     page_radar.setup_callbacks(self)
+    page_pareto.setup_callbacks(self)
 
   def run(self):
     self.app.run(
@@ -0,0 +1,142 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import threading
+from collections import OrderedDict
+import numpy as np
+from plotly.basedatatypes import BaseFigure
+from dash.development.base_component import Component
+
+# default memory budget of the figure cache, in MiB
+DEFAULT_CACHE_SIZE = 256
+
+# trace properties holding one value per point
+array_properties = ["x", "y", "z", "r", "theta", "text", "hovertext", "customdata", "ids"]
+
+# estimated size of a value, or of an item of a list, in bytes
+item_size = 64
+
+# estimated size of a figure without its traces, in bytes
+figure_size = 4 * 1024
+
+
+def make_key(*inputs):
+  """
+  Build a hashable cache key from callback inputs (lists and sets of values included).
+  """
+  key = []
+  for value in inputs:
+    if isinstance(value, (set, frozenset)):
+      value = tuple(sorted(value))
+    elif isinstance(value, list):
+      value = tuple(value)
+    key.append(value)
+  return tuple(key)
+
+
+def get_array_size(values):
+  if isinstance(values, np.ndarray):
+    return values.nbytes
+  if isinstance(values, (list, tuple)):
+    return len(values) * item_size
+  return 0
+
+
+def estimate_size(value):
+  """
+  Estimate the memory used by a cached value (figures, dash components, or lists and
+  tuples of them) from the length of the arrays of its traces, without serializing it.
+  """
+  if value is None:
+    return 0
+  if isinstance(value, BaseFigure):
+    size = figure_size
+    for trace in value.data:
+      for name in array_properties:
+        size += get_array_size(getattr(trace, name, None))
+      marker = getattr(trace, "marker", None)
+      if marker is not None:
+        size += get_array_size(getattr(marker, "color", None)) + get_array_size(getattr(marker, "size", None))
+    return size
+  if isinstance(value, Component):
+    return item_size + estimate_size(list(value.to_plotly_json()["props"].values()))
+  if isinstance(value, dict):
+    return item_size + sum(estimate_size(item) for item in value.values())
+  if isinstance(value, (list, tuple)):
+    return item_size + sum(estimate_size(item) for item in value)
+  if isinstance(value, str):
+    return item_size + len(value)
+  return item_size
+
+
+class FigureCache:
+  """
+  Least recently used cache of the figures built by the explorer pages.
+  Keys are expected to include the version of the result file the figure was built
+  from, so figures of reloaded files are never served. The cache is bounded by the
+  estimated size of the figures (see estimate_size).
+  """
+  def __init__(self, max_size=DEFAULT_CACHE_SIZE * 1024 * 1024):
+    self.max_size = max_size
+    self.size = 0
+    self.entries = OrderedDict()
+    self.lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+  def get(self, key):
+    with self.lock:
+      entry = self.entries.get(key)
+      if entry is None:
+        self.misses += 1
+        return None
+      self.entries.move_to_end(key)
+      self.hits += 1
+      return entry[0]
+
+  def set(self, key, value):
+    size = estimate_size(value)
+    if size > self.max_size:
+      return
+    with self.lock:
+      if key in self.entries:
+        self.size -= self.entries.pop(key)[1]
+      self.entries[key] = (value, size)
+      self.size += size
+      while self.size > self.max_size:
+        _, (_, old_size) = self.entries.popitem(last=False)
+        self.size -= old_size
+
+  def get_or_build(self, key, build):
+    """
+    Return the cached value of 'key', or build it with 'build()' and cache it.
+    """
+    value = self.get(key)
+    if value is None:
+      value = build()
+      if value is not None:
+        self.set(key, value)
+    return value
+
+  def clear(self):
+    with self.lock:
+      self.entries.clear()
+      self.size = 0
@@ -19,32 +19,58 @@
 # along with Odatix. If not, see <https://www.gnu.org/licenses/>.
 #
 
+import fnmatch
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output, State
+from dash.dependencies import Input, Output, State, ClientsideFunction, ALL
 import plotly.express as px
 import re
 
 plot_colors = px.colors.qualitative.Plotly
 
+# number of architectures shown on one page of the legend
+legend_page_size = 50
 
-def create_legend_items(explorer, page_name=""):
-  legend_items = [
-    create_legend_item(
-      architecture=architecture, line_style="2px dashed", color=plot_colors[i % len(plot_colors)], page_name=page_name
-    )
-    for i, architecture in enumerate(explorer.all_architectures)
-  ]
-  return legend_items
+
+def create_legend(page_name=""):
+  """
+  Searchable legend of the architectures of the selected target. Only one page
+  of items is rendered, the hidden architectures are kept in a store.
+  """
+  return html.Div(
+    [
+      dcc.Input(
+        id=f"legend-search-{page_name}",
+        type="search",
+        placeholder="Search architectures (ex: Example* or counter)",
+        debounce=True,
+        className="legend-search",
+      ),
+      html.Div(id=f"legend-items-{page_name}", style={"margin-top": "15px", "margin-bottom": "10px"}),
+      html.Div(
+        [
+          html.Button("<", id=f"legend-previous-{page_name}", n_clicks=0),
+          html.Span(id=f"legend-page-info-{page_name}"),
+          html.Button(">", id=f"legend-next-{page_name}", n_clicks=0, style={"margin-left": "5px"}),
+        ],
+        className="legend-pager",
+      ),
+      dcc.Store(id=f"legend-page-{page_name}", data=0),
+      dcc.Store(id=f"legend-architectures-{page_name}", data=[]),
+      dcc.Store(id=f"hidden-architectures-{page_name}", data=[]),
+    ],
+    id="custom-legend",
+    style={"margin-top": "15px", "margin-bottom": "15px"},
+  )
 
 
-def create_legend_item(architecture, line_style, color, page_name=""):
+def create_legend_item(architecture, line_style, color, page_name="", visible=True):
   return html.Div(
     [
       dcc.Checklist(
-        id=f"checklist-{architecture}-{page_name}",
+        id={"type": f"checklist-{page_name}", "index": architecture},
         options=[{"label": "", "value": architecture}],
-        value=[architecture],
+        value=[architecture] if visible else [],
         inline=True,
         style={"display": "inline-block", "margin-right": "10px", "text-wrap": "wrap"},
       ),
@@ -71,45 +97,94 @@ def create_legend_item(architecture, line_style, color, page_name=""):
       ),
       html.Div(f"{architecture}", style={"display": "inline-block", "margin-left": "5px"}),
     ],
-    id=f"legend-item-{architecture}-{page_name}",
     style={"display": "block", "margin-bottom": "5px"},
   )
 
 
-def setup_callbacks(explorer, page_name):
-  @explorer.app.callback(
-    [Output(f"checklist-{architecture}-{page_name}", "value") for architecture in explorer.all_architectures],
-    [Input("show-all", "n_clicks"), Input("hide-all", "n_clicks")],
-    [State(f"checklist-{architecture}-{page_name}", "value") for architecture in explorer.all_architectures],
-  )
-  def update_checklist_states(show_all_clicks, hide_all_clicks, *current_values):
-    ctx = dash.callback_context
-    if not ctx.triggered:
-      return current_values
+def match_search(architecture, search):
+  if not search:
+    return True
+  search = search.strip().lower()
+  if any(char in search for char in "*?["):
+    return fnmatch.fnmatchcase(architecture.lower(), search)
+  return search in architecture.lower()
 
-    button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-    if button_id == "show-all":
-      return [[architecture] for architecture in explorer.all_architectures]
-    elif button_id == "hide-all":
-      return [[] for _ in explorer.all_architectures]
-
-    return current_values
 
+def setup_callbacks(explorer, page_name):
   @explorer.app.callback(
-    [Output(f"legend-item-{architecture}-{page_name}", "style") for architecture in explorer.all_architectures],
-    [Input(f"target-dropdown-{page_name}", "value"), Input("yaml-dropdown", "value")],
+    [
+      Output(f"legend-items-{page_name}", "children"),
+      Output(f"legend-page-info-{page_name}", "children"),
+      Output(f"legend-page-{page_name}", "data"),
+      Output(f"legend-architectures-{page_name}", "data"),
+    ],
+    [
+      Input("yaml-dropdown", "value"),
+      Input(f"target-dropdown-{page_name}", "value"),
+      Input(f"legend-search-{page_name}", "value"),
+      Input(f"legend-previous-{page_name}", "n_clicks"),
+      Input(f"legend-next-{page_name}", "n_clicks"),
+    ],
+    [State(f"legend-page-{page_name}", "data"), State(f"hidden-architectures-{page_name}", "data")],
   )
-  def update_legend_visibility(selected_target, selected_yaml):
-    if not selected_yaml or selected_yaml not in explorer.dfs:
-      return [{"display": "none"} for _ in explorer.all_architectures]
-
-    architectures_for_target = explorer.dfs[selected_yaml][explorer.dfs[selected_yaml]["Target"] == selected_target][
-      "Architecture"
-    ].unique()
-    return [
-      {"display": "block" if architecture in architectures_for_target else "none"}
+  def update_legend(selected_yaml, selected_target, search, previous_clicks, next_clicks, page, hidden):
+    if not selected_yaml or selected_yaml not in explorer.indexes:
+      return [], "", 0, []
+
+    architectures_for_target = explorer.indexes[selected_yaml].architecture_sets.get(selected_target, set())
+    architectures = [
+      architecture
       for architecture in explorer.all_architectures
+      if architecture in architectures_for_target and match_search(architecture, search)
+    ]
+
+    ctx = dash.callback_context
+    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else ""
+    if triggered_id == f"legend-previous-{page_name}":
+      page = (page or 0) - 1
+    elif triggered_id == f"legend-next-{page_name}":
+      page = (page or 0) + 1
+    else:
+      page = 0
+    page_count = max(1, (len(architectures) + legend_page_size - 1) // legend_page_size)
+    page = min(max(page, 0), page_count - 1)
+
+    hidden = set(hidden or [])
+    start = page * legend_page_size
+    items = [
+      create_legend_item(
+        architecture=architecture,
+        line_style="2px dashed",
+        color=explorer.get_color(architecture),
+        page_name=page_name,
+        visible=architecture not in hidden,
+      )
+      for architecture in architectures[start:start + legend_page_size]
     ]
+    if architectures:
+      page_info = " {}-{} of {} ".format(start + 1, start + len(items), len(architectures))
+    else:
+      page_info = " No architecture "
+    return items, page_info, page, architectures
+
+  # Checklists, show all and hide all only change the hidden architectures in the browser (see assets/clientside.js)
+  explorer.app.clientside_callback(
+    ClientsideFunction(namespace="odatix", function_name="update_hidden"),
+    [
+      Output(f"hidden-architectures-{page_name}", "data"),
+      Output({"type": f"checklist-{page_name}", "index": ALL}, "value"),
+    ],
+    [
+      Input("show-all", "n_clicks"),
+      Input("hide-all", "n_clicks"),
+      Input({"type": f"checklist-{page_name}", "index": ALL}, "value"),
+    ],
+    [
+      State(f"hidden-architectures-{page_name}", "data"),
+      State(f"legend-architectures-{page_name}", "data"),
+      State({"type": f"checklist-{page_name}", "index": ALL}, "id"),
+    ],
+  )
 
 
 def get_color(i):
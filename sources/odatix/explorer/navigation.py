@@ -42,6 +42,7 @@ def top_bar(page_name=""):
           dcc.Link("XY", href="/xy", className="nav-link"),
           dcc.Link("VS", href="/vs", className="nav-link"),
           dcc.Link("Radar", href="/radar", className="nav-link"),
+          dcc.Link("Pareto", href="/pareto", className="nav-link"),
           # dcc.Link('Help', href='/help', className='nav-link')
         ],
         className="nav-links",
@@ -0,0 +1,424 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import dash
+from dash import dcc, html
+from dash.dependencies import Input, Output, State, ClientsideFunction
+import plotly.graph_objs as go
+
+import odatix.explorer.legend as legend
+import odatix.explorer.navigation as navigation
+import odatix.explorer.figure_cache as figure_cache
+import odatix.explorer.decimation as decimation
+import odatix.lib.pareto as pareto
+
+page_name = "pareto"
+
+# number of metrics that can be selected as objectives, the first two are plotted
+max_objectives = 4
+
+# number of configurations of the front listed in the table
+max_table_rows = 200
+
+
+def objective_selector(i, metric, direction):
+  return html.Div(
+    className="title-dropdown",
+    children=[
+      html.Div(className="dropdown-label", children=[html.Label("Metric " + str(i + 1))]),
+      dcc.Dropdown(id=f"pareto-metric-{i}", value=metric, style={"width": "160px"}),
+      dcc.Dropdown(
+        id=f"pareto-direction-{i}",
+        options=[{"label": "Max", "value": pareto.MAXIMIZE}, {"label": "Min", "value": pareto.MINIMIZE}],
+        value=direction,
+        clearable=False,
+        style={"width": "80px", "margin-left": "5px"},
+      ),
+    ],
+  )
+
+
+def layout(explorer):
+  # Default objectives: maximize the first metric, minimize the second one
+  metrics = explorer.indexes[explorer.valid_yaml_files[0]].metrics if explorer.valid_yaml_files else []
+  default_metrics = ["Fmax"] if "Fmax" in metrics else metrics[:1]
+  default_metrics += [metric for metric in metrics if metric not in default_metrics][: 2 - len(default_metrics)]
+  default_metrics += [None] * (max_objectives - len(default_metrics))
+
+  return html.Div(
+    [
+      navigation.top_bar(page_name),
+      navigation.side_bar(
+        content=html.Div(
+          id=f"sidebar-content-{page_name}",
+          className="sidebar-content-holder",
+          children=[
+            html.H2("Data"),
+            html.Div(
+              className="title-dropdown",
+              children=[
+                html.Div(className="dropdown-label", children=[html.Label("YAML File")]),
+                dcc.Dropdown(
+                  id="yaml-dropdown",
+                  options=[{"label": yaml_file, "value": yaml_file} for yaml_file in explorer.valid_yaml_files],
+                  value=explorer.valid_yaml_files[0] if explorer.valid_yaml_files else None,
+                ),
+              ],
+            ),
+            html.Div(
+              className="title-dropdown",
+              children=[
+                html.Div(className="dropdown-label", children=[html.Label("Target")]),
+                dcc.Dropdown(
+                  id=f"target-dropdown-{page_name}",
+                  value=explorer.dfs[explorer.valid_yaml_files[0]]["Target"].iloc[0]
+                  if explorer.valid_yaml_files
+                  else None,
+                ),
+              ],
+            ),
+            html.H2("Objectives"),
+            html.Div(
+              [
+                objective_selector(i, default_metrics[i], pareto.MAXIMIZE if i == 0 else pareto.MINIMIZE)
+                for i in range(max_objectives)
+              ]
+            ),
+            html.H2("Architectures"),
+            html.Div(
+              [
+                html.Div(
+                  [
+                    html.Button("Show All", id="show-all", n_clicks=0),
+                    html.Button("Hide All", id="hide-all", n_clicks=0),
+                  ]
+                ),
+                legend.create_legend(page_name),
+              ],
+              style={"display": "inline-block", "margin-left": "20px"},
+            ),
+            html.H2("Display Settings"),
+            html.Div(
+              className="toggle-container",
+              children=[
+                dcc.Checklist(
+                  id="toggle-legend",
+                  options=[{"label": " Show Legend", "value": "show_legend"}],
+                  value=["show_legend"],
+                  labelStyle={"display": "block", "font-weight": "515", "margin-bottom": "5px"},
+                ),
+                dcc.Checklist(
+                  id="toggle-title",
+                  options=[{"label": " Show Title", "value": "show_title"}],
+                  value=["show_title"],
+                  labelStyle={"display": "block", "font-weight": "515", "margin-bottom": "5px"},
+                ),
+                dcc.Checklist(
+                  id="toggle-front-only",
+                  options=[{"label": " Show Pareto Front Only", "value": "front_only"}],
+                  value=[""],
+                  labelStyle={"display": "block", "font-weight": "515", "margin-bottom": "5px"},
+                ),
+              ],
+            ),
+            html.H2("Export Settings"),
+            html.Div(
+              className="title-dropdown",
+              children=[
+                html.Div(className="dropdown-label", children=[html.Label("Download Format")]),
+                dcc.Dropdown(
+                  id="dl-format-dropdown",
+                  options=[
+                    {"label": "SVG", "value": "svg"},
+                    {"label": "PNG", "value": "png"},
+                    {"label": "JPEG", "value": "jpeg"},
+                    {"label": "WEBP", "value": "webp"},
+                  ],
+                  value="svg",
+                ),
+              ],
+              style={"margin-bottom": "5px"},
+            ),
+            html.Div(
+              className="title-dropdown",
+              children=[
+                html.Div(className="dropdown-label", children=[html.Label("Background Color")]),
+                dcc.Dropdown(
+                  id="background-dropdown",
+                  options=[
+                    {"label": "Transparent", "value": "rgba(255, 255, 255, 0)"},
+                    {"label": "White", "value": "rgba(255, 255, 255, 255)"},
+                  ],
+                  value="rgba(255, 255, 255, 0)",
+                ),
+              ],
+            ),
+          ],
+        ),
+        page_name=page_name,
+      ),
+      html.Div(
+        id=f"content-{page_name}",
+        children=[
+          html.Div(
+            [html.Div(id=f"graph-{page_name}", style={"width": "100%", "height": "100%"}, className="graph-container")],
+            style={"width": "100%", "height": "100%"},
+          ),
+          html.Div(id=f"table-{page_name}", className="pareto-table"),
+        ],
+        className="content",
+        style={
+          "marginLeft": navigation.side_bar_width,
+          "width": "calc(100%-" + navigation.side_bar_width + ")",
+          "height": "100%",
+        },
+      ),
+    ],
+    style={"width": "100%", "height": "100vh", "display": "flex", "flexDirection": "column"},
+  )
+
+
+def get_pareto_front(explorer, selected_yaml, selected_target, metrics, directions, architectures):
+  """
+  Return the rows of the given architectures of a target with numeric metrics,
+  and the boolean mask of the non-dominated rows for the given objectives.
+  """
+  df = explorer.indexes[selected_yaml].get_numeric_frame(selected_target, architectures)
+  values = pareto.to_maximization(df[metrics].to_numpy(dtype=float), directions)
+  return df, pareto.pareto_mask(values)
+
+
+def make_figure(explorer, selected_yaml, selected_target, metrics, directions, hidden, front_only):
+  """
+  Build the figure of the first two objectives of the visible architectures of a target,
+  with their Pareto front over all the objectives highlighted, and the table of the front.
+  """
+  index = explorer.indexes[selected_yaml]
+  architectures = [
+    architecture
+    for architecture in explorer.all_architectures
+    if architecture in index.architecture_sets[selected_target] and architecture not in hidden
+  ]
+  df, front_mask = get_pareto_front(explorer, selected_yaml, selected_target, metrics, directions, architectures)
+
+  units = explorer.units[selected_yaml]
+  displays = [metric.replace("_", " ") for metric in metrics]
+  display_units = [legend.unit_to_html(units.get(metric, "")) for metric in metrics]
+  axis_titles = [
+    display + " (" + unit + ")" if unit else display for display, unit in zip(displays, display_units)
+  ]
+  objectives = ", ".join(
+    ("max " if direction == pareto.MAXIMIZE else "min ") + display for display, direction in zip(displays, directions)
+  )
+  title = "Pareto Front (" + objectives + ")"
+
+  point_count = int(front_mask.sum()) if front_only else len(df)
+  Scatter = decimation.get_scatter(point_count)
+  hovertemplate = "<br>".join(
+    ["Architecture: %{fullData.name}", "Configuration: %{text}"]
+    + [
+      display + ": %{customdata[" + str(i) + "]} " + unit
+      for i, (display, unit) in enumerate(zip(displays, display_units))
+    ]
+    + ["<extra></extra>"]
+  )
+
+  fig = go.Figure()
+  architecture_column = df["Architecture"].to_numpy()
+  for architecture in architectures:
+    architecture_mask = architecture_column == architecture
+    for on_front in (False, True):
+      if front_only and not on_front:
+        continue
+      df_points = df[architecture_mask & (front_mask == on_front)]
+      if df_points.empty:
+        continue
+      customdata = df_points[metrics].to_numpy()
+      fig.add_trace(
+        Scatter(
+          x=df_points[metrics[0]],
+          y=df_points[metrics[1]],
+          mode="markers",
+          marker=dict(
+            size=12 if on_front else 7,
+            color=explorer.get_color(architecture),
+            opacity=1 if on_front else 0.3,
+            line=dict(width=1.5 if on_front else 0, color="#24292e"),
+          ),
+          name=architecture,
+          legendgroup=architecture,
+          showlegend=on_front or not front_mask[architecture_mask].any(),
+          meta=dict(architecture=architecture),
+          text=df_points["Configuration"],
+          customdata=customdata,
+          hovertemplate=hovertemplate,
+        )
+      )
+
+  # With two objectives, the front is a staircase in the plane of the figure
+  df_front = df[front_mask]
+  if len(metrics) == 2 and not df_front.empty:
+    df_front = df_front.sort_values(metrics[0])
+    fig.add_trace(
+      Scatter(
+        x=df_front[metrics[0]],
+        y=df_front[metrics[1]],
+        mode="lines",
+        line=dict(shape="vh" if directions[0] == pareto.MAXIMIZE else "hv", color="#24292e", dash="dot"),
+        name="Pareto front",
+        hoverinfo="skip",
+      )
+    )
+
+  fig.update_layout(
+    showlegend=True,
+    xaxis_title=axis_titles[0],
+    yaxis_title=axis_titles[1],
+    title=title,
+    title_x=0.5,
+    meta=dict(title=title),
+    autosize=True,
+  )
+  column_titles = [
+    display + " (" + units[metric] + ")" if units.get(metric) else display for metric, display in zip(metrics, displays)
+  ]
+  return fig, make_table(df_front, metrics, directions, column_titles)
+
+
+def make_table(df_front, metrics, directions, column_titles):
+  """
+  Table of the configurations of the front, sorted by the first objective.
+  """
+  df_front = df_front.sort_values(metrics[0], ascending=directions[0] == pareto.MINIMIZE)
+  rows = [
+    html.Tr([html.Td(row["Architecture"]), html.Td(row["Configuration"])] + [html.Td(row[metric]) for metric in metrics])
+    for _, row in df_front.head(max_table_rows).iterrows()
+  ]
+  if len(df_front) > max_table_rows:
+    caption = "First {} of {} configurations of the Pareto front".format(max_table_rows, len(df_front))
+  else:
+    caption = "{} configurations on the Pareto front".format(len(df_front))
+  header = html.Tr([html.Th("Architecture"), html.Th("Configuration")] + [html.Th(title) for title in column_titles])
+  return html.Table([html.Caption(caption), html.Thead(header), html.Tbody(rows)])
+
+
+def setup_callbacks(explorer):
+  @explorer.app.callback(
+    [Output(f"pareto-metric-{i}", "options") for i in range(max_objectives)]
+    + [Output(f"target-dropdown-{page_name}", "options")],
+    Input("yaml-dropdown", "value"),
+  )
+  def update_dropdowns(selected_yaml):
+    if not selected_yaml or selected_yaml not in explorer.dfs:
+      return [[] for _ in range(max_objectives)] + [[]]
+
+    index = explorer.indexes[selected_yaml]
+    available_metrics = [{"label": metric.replace("_", " "), "value": metric} for metric in index.metrics]
+    available_targets = [{"label": target, "value": target} for target in index.targets]
+
+    return [available_metrics for _ in range(max_objectives)] + [available_targets]
+
+  @explorer.app.callback(
+    [Output(f"graph-{page_name}", "children"), Output(f"table-{page_name}", "children")],
+    [
+      Input("yaml-dropdown", "value"),
+      Input(f"target-dropdown-{page_name}", "value"),
+      Input(f"hidden-architectures-{page_name}", "data"),
+      Input("toggle-front-only", "value"),
+    ]
+    + [Input(f"pareto-metric-{i}", "value") for i in range(max_objectives)]
+    + [Input(f"pareto-direction-{i}", "value") for i in range(max_objectives)],
+  )
+  def update_graph(selected_yaml, selected_target, hidden, toggle_front_only, *objectives):
+    try:
+      if not selected_yaml or selected_yaml not in explorer.dfs:
+        return html.Div(className="error", children=[html.Div("Please select a YAML file.")]), None
+
+      index = explorer.indexes[selected_yaml]
+      if not selected_target or not index.has_target(selected_target):
+        return html.Div(className="error", children=[html.Div("Please select a valid target.")]), None
+
+      # Unselected objectives are ignored, a metric selected twice is only used once
+      metrics, directions = [], []
+      for metric, direction in zip(objectives[:max_objectives], objectives[max_objectives:]):
+        if metric is not None and index.has_metric(metric) and metric not in metrics:
+          metrics.append(metric)
+          directions.append(direction)
+      if len(metrics) < 2:
+        return html.Div(className="error", children=[html.Div("Please select at least two different metrics.")]), None
+
+      front_only = "front_only" in (toggle_front_only or [])
+
+      # Figures are cached, so that going back to previous settings does not build them again
+      key = figure_cache.make_key(
+        page_name,
+        selected_yaml,
+        explorer.file_versions.get(selected_yaml),
+        selected_target,
+        set(hidden or []),
+        metrics,
+        directions,
+        front_only,
+      )
+      fig, table = explorer.figure_cache.get_or_build(
+        key,
+        lambda: make_figure(explorer, selected_yaml, selected_target, metrics, directions, set(hidden or []), front_only),
+      )
+
+      filename = "Odatix-{}-{}-{}-{}".format(
+        os.path.splitext(selected_yaml)[0], selected_target, page_name, "-".join(metrics)
+      )
+      graph = html.Div(
+        [
+          dcc.Graph(
+            id=f"figure-{page_name}",
+            figure=fig,
+            style={"width": "100%", "height": "100%"},
+            config={
+              "displayModeBar": True,
+              "displaylogo": False,
+              "modeBarButtonsToRemove": ["lasso", "select"],
+              "toImageButtonOptions": {"format": "svg", "scale": "3", "filename": filename},
+            },
+          )
+        ],
+        style={"width": "100%", "height": "100%", "display": "inline-block", "vertical-align": "top"},
+      )
+      return graph, table
+    except Exception as e:
+      return html.Div(className="error", children=[html.Div("Unexpected error: " + str(e))]), None
+
+  # Display settings only change the figure in the browser
+  explorer.app.clientside_callback(
+    ClientsideFunction(namespace="odatix", function_name="update_pareto"),
+    [Output(f"figure-{page_name}", "figure"), Output(f"figure-{page_name}", "config")],
+    [
+      Input("toggle-legend", "value"),
+      Input("toggle-title", "value"),
+      Input("dl-format-dropdown", "value"),
+      Input("background-dropdown", "value"),
+    ],
+    [State(f"figure-{page_name}", "figure"), State(f"figure-{page_name}", "config")],
+  )
+
+  legend.setup_callbacks(explorer, page_name)
+  navigation.setup_sidebar_callbacks(explorer, page_name)
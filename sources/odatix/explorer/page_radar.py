@@ -23,20 +23,19 @@ import os
 import re
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State, ClientsideFunction, ALL
 import pandas as pd
 import plotly.graph_objs as go
 
 import odatix.explorer.legend as legend
 import odatix.explorer.navigation as navigation
+import odatix.explorer.figure_cache as figure_cache
 from odatix.lib.utils import safe_df_append
 
 page_name = "radar"
 
 
 def layout(explorer):
-  legend_items = legend.create_legend_items(explorer, page_name)
-
   return html.Div(
     [
       navigation.top_bar(page_name),
@@ -82,7 +81,7 @@ def layout(explorer):
                     html.Button("Hide All", id="hide-all", n_clicks=0),
                   ]
                 ),
-                html.Div(legend_items, id="custom-legend", style={"margin-top": "15px", "margin-bottom": "15px"}),
+                legend.create_legend(page_name),
               ],
               style={"display": "inline-block", "margin-left": "20px"},
             ),
@@ -179,32 +178,33 @@ def layout(explorer):
   )
 
 
-def make_legend_chart(df, all_architectures, visible_architectures, toggle_title, background, mode):
+def make_legend_chart(df, all_architectures, visible_architectures, colors):
   fig = go.Figure()
 
   if not visible_architectures:
     return None
 
-  for i, architecture in enumerate(all_architectures):
+  for architecture in all_architectures:
     if architecture in visible_architectures:
       df_architecture = df[df["Architecture"] == architecture]
       fig.add_trace(
         go.Scatterpolar(
           r=[None],
           theta=df_architecture["Configuration"],
-          mode=mode,
+          mode="lines+markers",
           name=architecture,
-          marker_color=legend.get_color(i),
+          meta=dict(architecture=architecture),
+          marker_color=colors[architecture],
         )
       )
 
   fig.update_layout(
     polar_bgcolor="rgba(255, 255, 255, 0)",
-    paper_bgcolor=background,
     showlegend=True,
     margin=dict(l=60, r=60, t=60, b=60),
-    title="Legend" if "show_title" in toggle_title else "",
+    title="Legend",
     title_x=0.5,
+    meta=dict(title="Legend"),
     polar=dict(radialaxis=dict(visible=False), angularaxis=dict(visible=False)),
     autosize=True,
     legend_x=0,
@@ -223,11 +223,9 @@ def make_radar_chart(
   all_configurations,
   all_architectures,
   visible_architectures,
+  colors,
   legend_dropdown,
-  toggle_title,
   toggle_close,
-  background,
-  mode,
 ):
   df.loc[:, metric] = pd.to_numeric(df[metric], errors="coerce")
   df = df.dropna(subset=[metric])
@@ -254,7 +252,7 @@ def make_radar_chart(
     )
   )
 
-  for i, architecture in enumerate(all_architectures):
+  for architecture in all_architectures:
     if architecture in visible_architectures:
       df_architecture = df[df["Architecture"] == architecture]
       if "close_line" in toggle_close:
@@ -265,9 +263,11 @@ def make_radar_chart(
         go.Scatterpolar(
           r=df_architecture[metric],
           theta=df_architecture["Configuration"],
-          mode=mode,
+          mode="lines+markers",
           name=architecture,
-          marker_color=legend.get_color(i),
+          # The maximum lets the browser scale the radial axis to the visible architectures
+          meta=dict(architecture=architecture, max=float(df_architecture[metric].max()) if not df_architecture.empty else None),
+          marker_color=colors[architecture],
           hovertemplate="<br>".join(
             [
               "Architecture: %{fullData.name}",
@@ -281,12 +281,12 @@ def make_radar_chart(
 
   fig.update_layout(
     # template='plotly_dark',
-    paper_bgcolor=background,
     polar=dict(radialaxis=dict(visible=True, range=[0, df[metric].max() if not df[metric].empty else 1])),
     showlegend="show_legend" in legend_dropdown,
     margin=dict(l=60, r=60, t=60, b=60),
-    title=metric_display if "show_title" in toggle_title else None,
+    title=metric_display,
     title_x=0.5,
+    meta=dict(title=metric_display),
     width=840 if "show_legend" in legend_dropdown else 475,
     height=475,
   )
@@ -294,7 +294,7 @@ def make_radar_chart(
   return fig
 
 
-def make_figure_div(fig, filename, dl_format, remove_zoom=False):
+def make_figure_div(fig, filename, index, remove_zoom=False):
   if fig is not None:
     to_remove = ["lasso", "select"]
     if remove_zoom:
@@ -302,13 +302,14 @@ def make_figure_div(fig, filename, dl_format, remove_zoom=False):
     return html.Div(
       [
         dcc.Graph(
+          id={"type": f"figure-{page_name}", "index": index},
           figure=fig,
           style={"width": "100%"},
           config={
             "displayModeBar": True,
             "displaylogo": False,
             "modeBarButtonsToRemove": to_remove,
-            "toImageButtonOptions": {"format": dl_format, "scale": "3", "filename": filename},
+            "toImageButtonOptions": {"format": "svg", "scale": "3", "filename": filename},
           },
         )
       ],
@@ -318,24 +319,22 @@ def make_figure_div(fig, filename, dl_format, remove_zoom=False):
     return html.Div([html.Div([], style={"width": "475px"})], style={"flex": "0 0 auto", "margin": "0px"})
 
 
-def make_all_radar_charts(
+def make_all_radar_figures(
   df,
   units,
   metrics,
   all_configurations,
   all_architectures,
   visible_architectures,
+  colors,
   yaml_name,
   legend_dropdown,
-  toggle_title,
-  toggle_lines,
   toggle_close,
-  dl_format,
-  background,
 ):
-  radar_charts = []
-
-  mode = "lines+markers" if "show_lines" in toggle_lines else "markers"
+  """
+  Return the (index, filename, figure) of the chart of each metric, and of the separate legend.
+  """
+  radar_figures = []
 
   for metric in metrics:
     fig = make_radar_chart(
@@ -345,23 +344,60 @@ def make_all_radar_charts(
       all_configurations,
       all_architectures,
       visible_architectures,
+      colors,
       legend_dropdown,
-      toggle_title,
       toggle_close,
-      background,
-      mode,
     )
     filename = "Odatix-{}-{}-{}".format(yaml_name, page_name, metric)
-    radar_charts.append(make_figure_div(fig, filename, dl_format))
+    radar_figures.append((metric, filename, fig))
 
   # Add legend chart
   if "separate_legend" in legend_dropdown:
-    legend_fig = make_legend_chart(df, all_architectures, visible_architectures, toggle_title, background, mode)
-    radar_charts.append(
-      make_figure_div(legend_fig, "Odatix-" + str(page_name) + "-legend", dl_format, remove_zoom=True)
-    )
-
-  return radar_charts
+    legend_fig = make_legend_chart(df, all_architectures, visible_architectures, colors)
+    radar_figures.append(("legend", "Odatix-" + str(page_name) + "-legend", legend_fig))
+
+  return radar_figures
+
+
+def make_target_radar_charts(explorer, selected_yaml, selected_target, legend_dropdown, toggle_close):
+  """
+  Build the charts of all the architectures of a target.
+  Visibility of architectures and display settings are applied in the browser (see assets/clientside.js).
+  """
+  radar_figures = make_target_radar_figures(explorer, selected_yaml, selected_target, legend_dropdown, toggle_close)
+  return [
+    make_figure_div(fig, filename, index, remove_zoom=index == "legend") for index, filename, fig in radar_figures
+  ]
+
+
+def make_target_radar_figures(explorer, selected_yaml, selected_target, legend_dropdown, toggle_close):
+  """
+  Return the (index, filename, figure) of the charts of all the architectures of a target.
+  """
+  index = explorer.indexes[selected_yaml]
+  architectures = index.architecture_sets[selected_target]
+  filtered_df = index.get_numeric_frame(selected_target, architectures)
+
+  unique_configurations = index.get_configurations(selected_target, architectures)
+
+  metrics = index.metrics
+  all_architectures = explorer.all_architectures
+  colors = {architecture: explorer.get_color(architecture) for architecture in architectures}
+
+  yaml_name = os.path.splitext(selected_yaml)[0] + "-" + selected_target
+
+  return make_all_radar_figures(
+    filtered_df,
+    explorer.units[selected_yaml],
+    metrics,
+    unique_configurations,
+    all_architectures,
+    architectures,
+    colors,
+    yaml_name,
+    legend_dropdown,
+    toggle_close,
+  )
 
 
 def setup_callbacks(explorer):
@@ -370,77 +406,29 @@ def setup_callbacks(explorer):
     [
       Input("yaml-dropdown", "value"),
       Input(f"target-dropdown-{page_name}", "value"),
-      Input("show-all", "n_clicks"),
-      Input("hide-all", "n_clicks"),
       Input("legend-dropdown", "value"),
-      Input("toggle-title", "value"),
-      Input("toggle-lines", "value"),
       Input("toggle-close-line", "value"),
-      Input("dl-format-dropdown", "value"),
-      Input("background-dropdown", "value"),
-    ]
-    + [Input(f"checklist-{architecture}-{page_name}", "value") for architecture in explorer.all_architectures],
+    ],
   )
-  def update_radar_charts(
-    selected_yaml,
-    selected_target,
-    show_all,
-    hide_all,
-    legend_dropdown,
-    toggle_title,
-    toggle_lines,
-    toggle_close,
-    dl_format,
-    background,
-    *checklist_values,
-  ):
+  def update_radar_charts(selected_yaml, selected_target, legend_dropdown, toggle_close):
     try:
       if not selected_yaml or selected_yaml not in explorer.dfs:
         return html.Div(className="error", children=[html.Div("Please select a YAML file.")])
 
-      if not selected_target or selected_target not in explorer.dfs[selected_yaml]["Target"].values:
+      if not selected_target or not explorer.indexes[selected_yaml].has_target(selected_target):
         return html.Div(className="error", children=[html.Div("Please select a valid target.")])
 
-      ctx = dash.callback_context
-      triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
-
-      if triggered_id in ["show-all", "hide-all"]:
-        visible_architectures = set(explorer.all_architectures if triggered_id == "show-all" else [])
-      else:
-        visible_architectures = set(
-          architecture for i, architecture in enumerate(explorer.all_architectures) if checklist_values[i]
-        )
-
-      filtered_df = explorer.dfs[selected_yaml][
-        (explorer.dfs[selected_yaml]["Target"] == selected_target)
-        & (explorer.dfs[selected_yaml]["Architecture"].isin(visible_architectures))
-      ]
-
-      unique_configurations = sorted(filtered_df["Configuration"].unique())
-
-      metrics = [col for col in filtered_df.columns if col not in ["Target", "Architecture", "Configuration"]]
-      all_configurations = explorer.all_configurations
-      all_architectures = explorer.all_architectures
-
-      for metric in metrics:
-        filtered_df.loc[:, metric] = pd.to_numeric(filtered_df[metric], errors="coerce")
-
-      yaml_name = os.path.splitext(selected_yaml)[0] + "-" + selected_target
-
-      radar_charts = make_all_radar_charts(
-        filtered_df,
-        explorer.units[selected_yaml],
-        metrics,
-        unique_configurations,
-        all_architectures,
-        visible_architectures,
-        yaml_name,
+      # Charts are cached, so that going back to previous settings does not build them again
+      key = figure_cache.make_key(
+        page_name,
+        selected_yaml,
+        explorer.file_versions.get(selected_yaml),
+        selected_target,
         legend_dropdown,
-        toggle_title,
-        toggle_lines,
         toggle_close,
-        dl_format,
-        background,
+      )
+      radar_charts = explorer.figure_cache.get_or_build(
+        key, lambda: make_target_radar_charts(explorer, selected_yaml, selected_target, legend_dropdown, toggle_close)
       )
 
       return html.Div(radar_charts, style={"display": "flex", "flex-wrap": "wrap", "justify-content": "space-evenly"})
@@ -452,10 +440,29 @@ def setup_callbacks(explorer):
     if not selected_yaml or selected_yaml not in explorer.dfs:
       return [], []
 
-    df = explorer.dfs[selected_yaml]
-    available_targets = [{"label": target, "value": target} for target in df["Target"].unique()]
+    available_targets = [{"label": target, "value": target} for target in explorer.indexes[selected_yaml].targets]
 
     return available_targets
 
+  # Display settings only change the charts in the browser
+  explorer.app.clientside_callback(
+    ClientsideFunction(namespace="odatix", function_name="update_radar"),
+    [
+      Output({"type": f"figure-{page_name}", "index": ALL}, "figure"),
+      Output({"type": f"figure-{page_name}", "index": ALL}, "config"),
+    ],
+    [
+      Input("toggle-title", "value"),
+      Input("toggle-lines", "value"),
+      Input("dl-format-dropdown", "value"),
+      Input("background-dropdown", "value"),
+      Input(f"hidden-architectures-{page_name}", "data"),
+    ],
+    [
+      State({"type": f"figure-{page_name}", "index": ALL}, "figure"),
+      State({"type": f"figure-{page_name}", "index": ALL}, "config"),
+    ],
+  )
+
   legend.setup_callbacks(explorer, page_name)
   navigation.setup_sidebar_callbacks(explorer, page_name)
@@ -23,18 +23,18 @@ import os
 import re
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import plotly.graph_objs as go
 
 import odatix.explorer.legend as legend
 import odatix.explorer.navigation as navigation
+import odatix.explorer.figure_cache as figure_cache
+import odatix.explorer.decimation as decimation
 
 page_name = "vs"
 
 
 def layout(explorer):
-  legend_items = legend.create_legend_items(explorer, page_name)
-
   return html.Div(
     [
       navigation.top_bar(page_name),
@@ -90,7 +90,7 @@ def layout(explorer):
                     html.Button("Hide All", id="hide-all", n_clicks=0),
                   ]
                 ),
-                html.Div(legend_items, id="custom-legend", style={"margin-top": "15px", "margin-bottom": "15px"}),
+                legend.create_legend(page_name),
               ],
               style={"display": "inline-block", "margin-left": "20px"},
             ),
@@ -181,6 +181,97 @@ def layout(explorer):
   )
 
 
+def make_figure(explorer, selected_yaml, selected_metric_x, selected_metric_y, selected_target):
+  """
+  Build the figure of all the architectures of a target.
+  Visibility of architectures and display settings are applied in the browser (see assets/clientside.js).
+  """
+  selected_metric_x_display = selected_metric_x.replace("_", " ") if selected_metric_x is not None else ""
+  selected_metric_y_display = selected_metric_y.replace("_", " ") if selected_metric_y is not None else ""
+
+  unit_x = legend.unit_to_html(explorer.units[selected_yaml].get(selected_metric_x, ""))
+  unit_y = legend.unit_to_html(explorer.units[selected_yaml].get(selected_metric_y, ""))
+
+  selected_metric_x_display_unit = (
+    selected_metric_x_display + " (" + unit_x + ")" if unit_x else selected_metric_x_display
+  )
+  selected_metric_y_display_unit = (
+    selected_metric_y_display + " (" + unit_y + ")" if unit_y else selected_metric_y_display
+  )
+
+  index = explorer.indexes[selected_yaml]
+  architectures = index.architecture_sets[selected_target]
+
+  traces = []
+  point_count = 0
+  for architecture in explorer.all_architectures:
+    if architecture in architectures:
+      table = index.get_table(selected_target, architecture)
+      if table is None:
+        x_values, y_values, config_names = [], [], []
+      else:
+        x_values = table[selected_metric_x].tolist()
+        y_values = table[selected_metric_y].tolist()
+        config_names = table.index.tolist()
+      point_count += len(x_values)
+
+      # Large sweeps only keep the minimum and maximum y of each bin along x
+      positions = decimation.decimate(x_values, y_values)
+      traces.append(
+        (
+          architecture,
+          decimation.select(x_values, positions),
+          decimation.select(y_values, positions),
+          decimation.select(config_names, positions),
+        )
+      )
+
+  shown_count = sum(len(x_values) for _, x_values, _, _ in traces)
+  Scatter = decimation.get_scatter(shown_count)
+
+  fig = go.Figure()
+  for architecture, x_values, y_values, config_names in traces:
+    fig.add_trace(
+      Scatter(
+        x=x_values,
+        y=y_values,
+        mode="lines+markers",
+        line=dict(dash="dot"),
+        marker=dict(size=10, color=explorer.get_color(architecture)),
+        name=architecture,
+        meta=dict(architecture=architecture),
+        connectgaps=True,
+        text=config_names,
+        textposition="top center",
+        hovertemplate="<br>".join(
+          [
+            "Architecture: %{fullData.name}",
+            "Configuration: %{text}",
+            selected_metric_x_display + ": %{x} " + unit_x,
+            selected_metric_y_display + ": %{y} " + unit_y,
+            "<extra></extra>",
+          ]
+        ),
+      )
+    )
+
+  decimation.add_decimation_note(fig, shown_count, point_count)
+
+  fig.update_layout(
+    showlegend=False,
+    xaxis_title=selected_metric_x_display_unit,
+    yaxis_title=selected_metric_y_display_unit,
+    xaxis=dict(range=[0, None]),
+    yaxis=dict(range=[0, None]),
+    title=selected_metric_y_display + " vs " + selected_metric_x_display,
+    title_x=0.5,
+    # Labels of too many points would hide the figure
+    meta=dict(title=selected_metric_y_display + " vs " + selected_metric_x_display, labels=shown_count <= decimation.label_threshold),
+    autosize=True,
+  )
+  return fig
+
+
 def setup_callbacks(explorer):
   @explorer.app.callback(
     [
@@ -194,10 +285,9 @@ def setup_callbacks(explorer):
     if not selected_yaml or selected_yaml not in explorer.dfs:
       return [], [], []
 
-    df = explorer.dfs[selected_yaml]
-    metrics_from_yaml = explorer.update_metrics(explorer.all_data[selected_yaml])
-    available_metrics = [{"label": metric.replace("_", " "), "value": metric} for metric in metrics_from_yaml]
-    available_targets = [{"label": target, "value": target} for target in df["Target"].unique()]
+    index = explorer.indexes[selected_yaml]
+    available_metrics = [{"label": metric.replace("_", " "), "value": metric} for metric in index.metrics]
+    available_targets = [{"label": target, "value": target} for target in index.targets]
 
     return available_metrics, available_metrics, available_targets
 
@@ -208,125 +298,42 @@ def setup_callbacks(explorer):
       Input("metric-x-dropdown", "value"),
       Input("metric-y-dropdown", "value"),
       Input(f"target-dropdown-{page_name}", "value"),
-      Input("show-all", "n_clicks"),
-      Input("hide-all", "n_clicks"),
-      Input("toggle-legend", "value"),
-      Input("toggle-title", "value"),
-      Input("toggle-lines", "value"),
-      Input("toggle-labels", "value"),
-      Input("dl-format-dropdown", "value"),
-      Input("background-dropdown", "value"),
-    ]
-    + [Input(f"checklist-{architecture}-{page_name}", "value") for architecture in explorer.all_architectures],
+    ],
   )
-  def update_graph(
-    selected_yaml,
-    selected_metric_x,
-    selected_metric_y,
-    selected_target,
-    show_all,
-    hide_all,
-    toggle_legend,
-    toggle_title,
-    toggle_lines,
-    toggle_labels,
-    dl_format,
-    background,
-    *checklist_values,
-  ):
+  def update_graph(selected_yaml, selected_metric_x, selected_metric_y, selected_target):
     try:
       if not selected_yaml or selected_yaml not in explorer.dfs:
         return html.Div(className="error", children=[html.Div("Please select a YAML file.")])
 
-      if not selected_target or selected_target not in explorer.dfs[selected_yaml]["Target"].values:
+      if not selected_target or not explorer.indexes[selected_yaml].has_target(selected_target):
         return html.Div(className="error", children=[html.Div("Please select a valid target.")])
 
-      selected_metric_x_display = selected_metric_x.replace("_", " ") if selected_metric_x is not None else ""
-      selected_metric_y_display = selected_metric_y.replace("_", " ") if selected_metric_y is not None else ""
+      index = explorer.indexes[selected_yaml]
+      if selected_metric_x is None or not index.has_metric(selected_metric_x):
+        return html.Div(className="error", children=[html.Div("Please select a valid x metric.")])
+      if selected_metric_y is None or not index.has_metric(selected_metric_y):
+        return html.Div(className="error", children=[html.Div("Please select a valid y metric.")])
 
-      unit_x = legend.unit_to_html(explorer.units[selected_yaml].get(selected_metric_x, ""))
-      unit_y = legend.unit_to_html(explorer.units[selected_yaml].get(selected_metric_y, ""))
-
-      selected_metric_x_display_unit = (
-        selected_metric_x_display + " (" + unit_x + ")" if unit_x else selected_metric_x_display
+      # Figures are cached, so that going back to previous settings does not build them again
+      key = figure_cache.make_key(
+        page_name,
+        selected_yaml,
+        explorer.file_versions.get(selected_yaml),
+        selected_metric_x,
+        selected_metric_y,
+        selected_target,
       )
-      selected_metric_y_display_unit = (
-        selected_metric_y_display + " (" + unit_y + ")" if unit_y else selected_metric_y_display
+      fig = explorer.figure_cache.get_or_build(
+        key, lambda: make_figure(explorer, selected_yaml, selected_metric_x, selected_metric_y, selected_target)
       )
 
-      ctx = dash.callback_context
-      triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
-
-      if triggered_id in ["show-all", "hide-all"]:
-        visible_architectures = set(explorer.all_architectures if triggered_id == "show-all" else [])
-      else:
-        visible_architectures = set(
-          architecture for i, architecture in enumerate(explorer.all_architectures) if checklist_values[i]
-        )
-
-      filtered_df = explorer.dfs[selected_yaml][
-        (explorer.dfs[selected_yaml]["Target"] == selected_target)
-        & (explorer.dfs[selected_yaml]["Architecture"].isin(visible_architectures))
-      ]
-
-      fig = go.Figure()
-      for i, architecture in enumerate(explorer.all_architectures):
-        if architecture in visible_architectures:
-          df_architecture = filtered_df[filtered_df["Architecture"] == architecture]
-
-          if selected_metric_x is None or selected_metric_x not in df_architecture.columns:
-            return html.Div(className="error", children=[html.Div("Please select a valid x metric.")])
-          if selected_metric_y is None or selected_metric_y not in df_architecture.columns:
-            return html.Div(className="error", children=[html.Div("Please select a valid y metric.")])
-
-          x_values = df_architecture[selected_metric_x].tolist()
-          y_values = df_architecture[selected_metric_y].tolist()
-          config_names = df_architecture["Configuration"].tolist()
-
-          mode = "lines+markers" if "show_lines" in toggle_lines else "markers"
-          if toggle_labels:
-            mode += "+text"
-
-          fig.add_trace(
-            go.Scatter(
-              x=x_values,
-              y=y_values,
-              mode=mode,
-              line=dict(dash="dot") if "show_lines" in toggle_lines else None,
-              marker=dict(size=10, color=legend.get_color(i)),
-              name=architecture,
-              connectgaps=True,
-              text=config_names,
-              textposition="top center",
-              hovertemplate="<br>".join(
-                [
-                  "Architecture: %{fullData.name}",
-                  "Configuration: %{text}",
-                  selected_metric_x_display + ": %{x} " + unit_x,
-                  selected_metric_y_display + ": %{y} " + unit_y,
-                  "<extra></extra>",
-                ]
-              ),
-            )
-          )
-
-      fig.update_layout(
-        paper_bgcolor=background,
-        showlegend="show_legend" in toggle_legend,
-        xaxis_title=selected_metric_x_display_unit,
-        yaxis_title=selected_metric_y_display_unit,
-        xaxis=dict(range=[0, None]),
-        yaxis=dict(range=[0, None]),
-        title=selected_metric_y_display + " vs " + selected_metric_x_display if "show_title" in toggle_title else None,
-        title_x=0.5,
-        autosize=True,
-      )
       filename = "Odatix-{}-{}-{}-vs-{}".format(
         os.path.splitext(selected_yaml)[0], selected_target, selected_metric_y, selected_metric_x
       )
       return html.Div(
         [
           dcc.Graph(
+            id=f"figure-{page_name}",
             figure=fig,
             style={"width": "100%", "height": "100%"},
             config={
@@ -334,7 +341,7 @@ def setup_callbacks(explorer):
               "displaylogo": False,
               "modeBarButtonsToRemove": ["lasso", "select"],
               "toImageButtonOptions": {
-                "format": dl_format,
+                "format": "svg",
                 "scale": "3",
                 "filename": filename,
               },
@@ -346,5 +353,21 @@ def setup_callbacks(explorer):
     except Exception as e:
       return html.Div(className="error", children=[html.Div("Unexpected error: " + str(e))])
 
+  # Display settings only change the figure in the browser
+  explorer.app.clientside_callback(
+    ClientsideFunction(namespace="odatix", function_name="update_vs"),
+    [Output(f"figure-{page_name}", "figure"), Output(f"figure-{page_name}", "config")],
+    [
+      Input("toggle-legend", "value"),
+      Input("toggle-title", "value"),
+      Input("toggle-lines", "value"),
+      Input("toggle-labels", "value"),
+      Input("dl-format-dropdown", "value"),
+      Input("background-dropdown", "value"),
+      Input(f"hidden-architectures-{page_name}", "data"),
+    ],
+    [State(f"figure-{page_name}", "figure"), State(f"figure-{page_name}", "config")],
+  )
+
   legend.setup_callbacks(explorer, page_name)
   navigation.setup_sidebar_callbacks(explorer, page_name)
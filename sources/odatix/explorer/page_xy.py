@@ -23,18 +23,18 @@ import os
 import re
 import dash
 from dash import dcc, html
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State, ClientsideFunction
 import plotly.graph_objs as go
 
 import odatix.explorer.legend as legend
 import odatix.explorer.navigation as navigation
+import odatix.explorer.figure_cache as figure_cache
+import odatix.explorer.decimation as decimation
 
 page_name = "xy"
 
 
 def layout(explorer):
-  legend_items = legend.create_legend_items(explorer, page_name)
-
   return html.Div(
     [
       navigation.top_bar(page_name),
@@ -83,7 +83,7 @@ def layout(explorer):
                     html.Button("Hide All", id="hide-all", n_clicks=0),
                   ]
                 ),
-                html.Div(legend_items, id="custom-legend", style={"margin-top": "15px", "margin-bottom": "15px"}),
+                legend.create_legend(page_name),
               ],
               style={"display": "inline-block", "margin-left": "20px"},
             ),
@@ -181,6 +181,81 @@ def layout(explorer):
   )
 
 
+def make_figure(explorer, selected_yaml, selected_metric, selected_target, display_mode):
+  """
+  Build the figure of all the architectures of a target.
+  Visibility of architectures and display settings are applied in the browser (see assets/clientside.js).
+  """
+  selected_metric_display = selected_metric.replace("_", " ") if selected_metric is not None else ""
+
+  unit = legend.unit_to_html(explorer.units[selected_yaml].get(selected_metric, ""))
+  selected_metric_display_unit = selected_metric_display + " (" + unit + ")" if unit else selected_metric_display
+
+  index = explorer.indexes[selected_yaml]
+  architectures = index.architecture_sets[selected_target]
+  unique_configurations = index.get_configurations(selected_target, architectures)
+
+  traces = []
+  for architecture in explorer.all_architectures:
+    if architecture in architectures:
+      y_values = index.get_values(selected_target, architecture, selected_metric, unique_configurations)
+      # Large sweeps only keep the minimum and maximum of each bin of configurations
+      positions = decimation.decimate(None, y_values)
+      traces.append((architecture, decimation.select(unique_configurations, positions), decimation.select(y_values, positions)))
+
+  point_count = len(unique_configurations) * len(traces)
+  shown_count = sum(len(y_values) for _, _, y_values in traces)
+  Scatter = decimation.get_scatter(shown_count)
+
+  fig = go.Figure()
+
+  if display_mode == "points":
+    for architecture, x_values, y_values in traces:
+      fig.add_trace(
+        Scatter(
+          x=x_values,
+          y=y_values,
+          mode="lines+markers",
+          line=dict(dash="dot"),
+          marker=dict(size=10, color=explorer.get_color(architecture)),
+          name=architecture,
+          meta=dict(architecture=architecture),
+          connectgaps=True,
+          hovertemplate="<br>".join(
+            [
+              "Architecture: %{fullData.name}",
+              "Configuration: %{x}",
+              selected_metric_display + ": %{y} " + unit,
+              "<extra></extra>",
+            ]
+          ),
+        )
+      )
+  elif display_mode == "bars":
+    for architecture, x_values, y_values in traces:
+      fig.add_trace(
+        go.Bar(
+          x=x_values, y=y_values, marker=dict(color=explorer.get_color(architecture)), name=architecture, meta=dict(architecture=architecture)
+        )
+      )
+
+  decimation.add_decimation_note(fig, shown_count, point_count)
+  fig.update_layout(
+    showlegend=False,
+    xaxis_title="Configuration",
+    yaxis_title=selected_metric_display_unit,
+    yaxis=dict(range=[0, None]),
+    title=selected_metric_display,
+    title_x=0.5,
+    meta=dict(title=selected_metric_display),
+    autosize=True,
+  )
+  if shown_count < point_count:
+    # Decimated traces keep different configurations, the axis keeps the order of all of them
+    fig.update_xaxes(categoryorder="array", categoryarray=unique_configurations)
+  return fig
+
+
 def setup_callbacks(explorer):
   @explorer.app.callback(
     [Output("metric-dropdown", "options"), Output(f"target-dropdown-{page_name}", "options")],
@@ -190,10 +265,9 @@ def setup_callbacks(explorer):
     if not selected_yaml or selected_yaml not in explorer.dfs:
       return [], []
 
-    df = explorer.dfs[selected_yaml]
-    metrics_from_yaml = explorer.update_metrics(explorer.all_data[selected_yaml])
-    available_metrics = [{"label": metric.replace("_", " "), "value": metric} for metric in metrics_from_yaml]
-    available_targets = [{"label": target, "value": target} for target in df["Target"].unique()]
+    index = explorer.indexes[selected_yaml]
+    available_metrics = [{"label": metric.replace("_", " "), "value": metric} for metric in index.metrics]
+    available_targets = [{"label": target, "value": target} for target in index.targets]
 
     return available_metrics, available_targets
 
@@ -203,135 +277,47 @@ def setup_callbacks(explorer):
       Input("yaml-dropdown", "value"),
       Input("metric-dropdown", "value"),
       Input(f"target-dropdown-{page_name}", "value"),
-      Input("show-all", "n_clicks"),
-      Input("hide-all", "n_clicks"),
-      Input("toggle-legend", "value"),
-      Input("toggle-title", "value"),
-      Input("toggle-lines", "value"),
       Input("display-mode-dropdown", "value"),
-      Input("dl-format-dropdown", "value"),
-      Input("background-dropdown", "value"),
-    ]
-    + [Input(f"checklist-{architecture}-{page_name}", "value") for architecture in explorer.all_architectures],
+    ],
   )
-  def update_graph(
-    selected_yaml,
-    selected_metric,
-    selected_target,
-    show_all,
-    hide_all,
-    toggle_legend,
-    toggle_title,
-    toggle_lines,
-    display_mode,
-    dl_format,
-    background,
-    *checklist_values,
-  ):
+  def update_graph(selected_yaml, selected_metric, selected_target, display_mode):
     try:
       if not selected_yaml or selected_yaml not in explorer.dfs:
         return html.Div(className="error", children=[html.Div("Please select a YAML file.")])
 
-      if not selected_target or selected_target not in explorer.dfs[selected_yaml]["Target"].values:
+      if not selected_target or not explorer.indexes[selected_yaml].has_target(selected_target):
         return html.Div(className="error", children=[html.Div("Please select a valid target.")])
 
-      selected_metric_display = selected_metric.replace("_", " ") if selected_metric is not None else ""
-
-      unit = legend.unit_to_html(explorer.units[selected_yaml].get(selected_metric, ""))
-      selected_metric_display_unit = selected_metric_display + " (" + unit + ")" if unit else selected_metric_display
-
-      ctx = dash.callback_context
-      triggered_id = ctx.triggered[0]["prop_id"].split(".")[0]
+      if selected_metric is None or not explorer.indexes[selected_yaml].has_metric(selected_metric):
+        return html.Div(className="error", children=[html.Div("Please select a valid metric.")])
 
-      if triggered_id in ["show-all", "hide-all"]:
-        visible_architectures = set(explorer.all_architectures if triggered_id == "show-all" else [])
-      else:
-        visible_architectures = set(
-          architecture for i, architecture in enumerate(explorer.all_architectures) if checklist_values[i]
-        )
-
-      filtered_df = explorer.dfs[selected_yaml][
-        (explorer.dfs[selected_yaml]["Target"] == selected_target)
-        & (explorer.dfs[selected_yaml]["Architecture"].isin(visible_architectures))
-      ]
-
-      unique_configurations = sorted(filtered_df["Configuration"].unique())
-
-      fig = go.Figure()
-
-      if display_mode == "points":
-        for i, architecture in enumerate(explorer.all_architectures):
-          if architecture in visible_architectures:
-            df_architecture = filtered_df[filtered_df["Architecture"] == architecture]
-            if selected_metric is None or selected_metric not in df_architecture.columns:
-              return html.Div(className="error", children=[html.Div("Please select a valid metric.")])
-            else:
-              y_values = [
-                df_architecture[df_architecture["Configuration"] == config][selected_metric].values[0]
-                if config in df_architecture["Configuration"].values
-                else None
-                for config in unique_configurations
-              ]
-
-            mode = "lines+markers" if "show_lines" in toggle_lines else "markers"
-
-            fig.add_trace(
-              go.Scatter(
-                x=unique_configurations,
-                y=y_values,
-                mode=mode,
-                line=dict(dash="dot") if "show_lines" in toggle_lines else None,
-                marker=dict(size=10, color=legend.get_color(i)),
-                name=architecture,
-                connectgaps=True,
-                hovertemplate="<br>".join(
-                  [
-                    "Architecture: %{fullData.name}",
-                    "Configuration: %{x}",
-                    selected_metric_display + ": %{y} " + unit,
-                    "<extra></extra>",
-                  ]
-                ),
-              )
-            )
-      elif display_mode == "bars":
-        for i, architecture in enumerate(explorer.all_architectures):
-          if architecture in visible_architectures:
-            df_architecture = filtered_df[filtered_df["Architecture"] == architecture]
-            y_values = [
-              df_architecture[df_architecture["Configuration"] == config][selected_metric].values[0]
-              if config in df_architecture["Configuration"].values
-              else None
-              for config in unique_configurations
-            ]
-
-            fig.add_trace(
-              go.Bar(x=unique_configurations, y=y_values, marker=dict(color=legend.get_color(i)), name=architecture)
-            )
-
-      fig.update_layout(
-        paper_bgcolor=background,
-        showlegend="show_legend" in toggle_legend,
-        xaxis_title="Configuration",
-        yaxis_title=selected_metric_display_unit,
-        yaxis=dict(range=[0, None]),
-        title=selected_metric_display if "show_title" in toggle_title else None,
-        title_x=0.5,
-        autosize=True,
+      # Figures are cached, so that going back to previous settings does not build them again
+      key = figure_cache.make_key(
+        page_name,
+        selected_yaml,
+        explorer.file_versions.get(selected_yaml),
+        selected_metric,
+        selected_target,
+        display_mode,
+      )
+      fig = explorer.figure_cache.get_or_build(
+        key, lambda: make_figure(explorer, selected_yaml, selected_metric, selected_target, display_mode)
       )
+
       filename = "Odatix-{}-{}-{}-{}".format(
         os.path.splitext(selected_yaml)[0], selected_target, page_name, selected_metric
       )
       return html.Div(
         [
           dcc.Graph(
+            id=f"figure-{page_name}",
             figure=fig,
             style={"width": "100%", "height": "100%"},
             config={
               "displayModeBar": True,
               "displaylogo": False,
               "modeBarButtonsToRemove": ["lasso", "select"],
-              "toImageButtonOptions": {"format": dl_format, "scale": "3", "filename": filename},
+              "toImageButtonOptions": {"format": "svg", "scale": "3", "filename": filename},
             },
           )
         ],
@@ -340,5 +326,20 @@ def setup_callbacks(explorer):
     except Exception as e:
       return html.Div(className="error", children=[html.Div("Unexpected error: " + str(e))])
 
+  # Display settings only change the figure in the browser
+  explorer.app.clientside_callback(
+    ClientsideFunction(namespace="odatix", function_name="update_xy"),
+    [Output(f"figure-{page_name}", "figure"), Output(f"figure-{page_name}", "config")],
+    [
+      Input("toggle-legend", "value"),
+      Input("toggle-title", "value"),
+      Input("toggle-lines", "value"),
+      Input("dl-format-dropdown", "value"),
+      Input("background-dropdown", "value"),
+      Input(f"hidden-architectures-{page_name}", "data"),
+    ],
+    [State(f"figure-{page_name}", "figure"), State(f"figure-{page_name}", "config")],
+  )
+
   legend.setup_callbacks(explorer, page_name)
   navigation.setup_sidebar_callbacks(explorer, page_name)
@@ -0,0 +1,245 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import html
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import odatix.lib.printc as printc
+from odatix.explorer.explorer_app import ResultExplorer
+import odatix.explorer.page_xy as page_xy
+import odatix.explorer.page_vs as page_vs
+import odatix.explorer.page_radar as page_radar
+
+script_name = os.path.basename(__file__)
+
+report_formats = ["html", "svg", "png"]
+image_formats = ["svg", "png"]
+DEFAULT_FORMATS = ["html", "svg"]
+DEFAULT_OUTPUT = "report"
+DEFAULT_JOBS = os.cpu_count() or 1
+
+figures_dir = "figures"
+index_file = "index.html"
+
+# size of the exported images of xy and vs figures, in pixels (radar charts have their own size)
+image_width = 1200
+image_height = 700
+
+page_titles = {"xy": "XY", "vs": "VS", "radar": "Radar"}
+
+# explorer of the worker processes, inherited from the main process when processes are forked
+report_explorer = None
+
+######################################
+# Figures
+######################################
+
+def list_tasks(explorer):
+  """
+  Return the figures to export: (page, result file, target, metric or metric pair).
+  Radar charts of a target are built together.
+  """
+  tasks = []
+  for yaml_file in explorer.valid_yaml_files:
+    index = explorer.indexes[yaml_file]
+    for target in index.targets:
+      for metric in index.metrics:
+        tasks.append(("xy", yaml_file, target, metric))
+      for metric_x, metric_y in itertools.combinations(index.metrics, 2):
+        tasks.append(("vs", yaml_file, target, (metric_x, metric_y)))
+      tasks.append(("radar", yaml_file, target, None))
+  return tasks
+
+def build_figures(explorer, page, yaml_file, target, item):
+  """
+  Return the (filename, figure) of a task, with the default display settings of its page.
+  """
+  yaml_name = os.path.splitext(yaml_file)[0]
+  if page == "xy":
+    fig = page_xy.make_figure(explorer, yaml_file, item, target, "points")
+    return [("Odatix-{}-{}-{}-{}".format(yaml_name, target, page, item), fig)]
+  if page == "vs":
+    metric_x, metric_y = item
+    fig = page_vs.make_figure(explorer, yaml_file, metric_x, metric_y, target)
+    # Markers and labels, as shown by default in the browser
+    labels = fig.layout.meta.get("labels", True) if fig.layout.meta else True
+    fig.update_traces(mode="markers+text" if labels else "markers")
+    return [("Odatix-{}-{}-{}-vs-{}".format(yaml_name, target, metric_y, metric_x), fig)]
+  radar_figures = page_radar.make_target_radar_figures(explorer, yaml_file, target, ["separate_legend"], [""])
+  figures = []
+  for index, filename, fig in radar_figures:
+    if fig is None:
+      continue
+    if index == "legend":
+      filename = "Odatix-{}-{}-{}-legend".format(yaml_name, target, page)
+    figures.append((filename, fig))
+  return figures
+
+def get_title(fig, filename):
+  meta = fig.layout.meta
+  if isinstance(meta, dict) and meta.get("title"):
+    return meta["title"]
+  return filename
+
+def init_worker(result_path, yaml_prefix):
+  global report_explorer
+  if report_explorer is None:
+    report_explorer = load_explorer(result_path, yaml_prefix)
+
+def export_task(args):
+  """
+  Build and write the figures of a task. Returns the task, the (title, filename, written formats)
+  of its figures and an error message or None.
+  """
+  task, output, formats = args
+  page, yaml_file, target, item = task
+  figure_path = os.path.join(output, figures_dir)
+  exported = []
+  try:
+    for filename, fig in build_figures(report_explorer, page, yaml_file, target, item):
+      filename = filename.replace(os.sep, "_")
+      written = []
+      for format in formats:
+        file = os.path.join(figure_path, filename + "." + format)
+        if format == "html":
+          fig.write_html(file, include_plotlyjs="directory", config={"displaylogo": False})
+        else:
+          size = {} if page == "radar" else {"width": image_width, "height": image_height}
+          fig.write_image(file, format=format, scale=1 if format == "svg" else 2, **size)
+        written.append(format)
+      exported.append((get_title(fig, filename), filename, written))
+    return task, exported, None
+  except Exception as e:
+    return task, exported, str(e)
+
+######################################
+# Index
+######################################
+
+def write_index(output, results, formats):
+  """
+  Write the index page of the report, with a section per result file and target.
+  """
+  image_format = next((format for format in formats if format in image_formats), None)
+  lines = [
+    "<!DOCTYPE html>",
+    "<html>",
+    "<head>",
+    '<meta charset="utf-8">',
+    "<title>Odatix Report</title>",
+    "<style>",
+    "body { font-family: sans-serif; margin: 30px; color: #24292e; }",
+    ".figures { display: flex; flex-wrap: wrap; gap: 15px; }",
+    ".figure { border: 1px solid #d1d5da; border-radius: 6px; padding: 10px; width: 320px; }",
+    ".figure img { width: 100%; }",
+    "</style>",
+    "</head>",
+    "<body>",
+    "<h1>Odatix Report</h1>",
+  ]
+  for yaml_file, target_results in results.items():
+    lines.append("<h2>" + html.escape(yaml_file) + "</h2>")
+    for target, page_results in target_results.items():
+      lines.append("<h3>" + html.escape(target) + "</h3>")
+      for page, figures in page_results.items():
+        lines.append("<h4>" + page_titles[page] + "</h4>")
+        lines.append('<div class="figures">')
+        for title, filename, written in figures:
+          link_format = "html" if "html" in written else (written[0] if written else None)
+          card = ""
+          if image_format in written:
+            card += '<img src="' + html.escape(figures_dir + "/" + filename + "." + image_format) + '" loading="lazy">'
+          card += "<div>" + html.escape(str(title)) + "</div>"
+          if link_format is not None:
+            card = '<a href="' + html.escape(figures_dir + "/" + filename + "." + link_format) + '">' + card + "</a>"
+          lines.append('<div class="figure">' + card + "</div>")
+        lines.append("</div>")
+  lines += ["</body>", "</html>"]
+  with open(os.path.join(output, index_file), "w") as f:
+    f.write("\n".join(lines) + "\n")
+
+######################################
+# Report
+######################################
+
+def load_explorer(result_path, yaml_prefix="results_"):
+  explorer = ResultExplorer(result_path=result_path, yaml_prefix=yaml_prefix, watch=False)
+  explorer.loader.join()
+  return explorer
+
+def has_image_export():
+  try:
+    import kaleido
+    return True
+  except ImportError:
+    return False
+
+def export_report(result_path, output=DEFAULT_OUTPUT, formats=DEFAULT_FORMATS, jobs=DEFAULT_JOBS, yaml_prefix="results_"):
+  """
+  Write the figures of every result file, target and metric (or metric pair) of the
+  explorer pages, in parallel worker processes, and an index page linking them.
+  """
+  global report_explorer
+
+  formats = [format for format in formats if format in report_formats]
+  if any(format in image_formats for format in formats) and not has_image_export():
+    printc.warning("Could not export figures as images: missing optional dependency", script_name=script_name)
+    printc.note("Install kaleido to export figures in " + " and ".join(image_formats) + " formats", script_name=script_name)
+    formats = [format for format in formats if format not in image_formats]
+  if not formats:
+    return False
+
+  report_explorer = load_explorer(result_path, yaml_prefix)
+  tasks = list_tasks(report_explorer)
+  os.makedirs(os.path.join(output, figures_dir), exist_ok=True)
+
+  args = [(task, output, formats) for task in tasks]
+  jobs = max(1, min(jobs, len(tasks)))
+  if jobs <= 1:
+    task_results = map(export_task, args)
+    executor = None
+  else:
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(result_path, yaml_prefix))
+    task_results = executor.map(export_task, args, chunksize=max(1, len(tasks) // (jobs * 4)))
+
+  # Results are grouped by result file, target and page, in the order of the tasks
+  results = {}
+  figure_count = 0
+  errors = 0
+  try:
+    for (page, yaml_file, target, item), exported, error in task_results:
+      if error is not None:
+        errors += 1
+        printc.error("Could not export " + page + " figure of " + yaml_file + " (" + target + "): " + error, script_name=script_name)
+      results.setdefault(yaml_file, {}).setdefault(target, {}).setdefault(page, []).extend(exported)
+      figure_count += len(exported)
+  finally:
+    if executor is not None:
+      executor.shutdown()
+
+  write_index(output, results, formats)
+  printc.say(
+    "{} figures written to \"{}\" ({})".format(figure_count, os.path.join(output, index_file), ", ".join(formats)),
+    script_name=script_name,
+  )
+  return errors == 0
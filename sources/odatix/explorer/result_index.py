@@ -0,0 +1,98 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pandas as pd
+
+key_columns = ["Target", "Architecture", "Configuration"]
+
+
+class ResultIndex:
+  """
+  Lookup structures of a result file, built once when the file is loaded so
+  that callbacks do not filter the whole dataframe:
+  - metrics: metric names, in order of first appearance
+  - targets: targets, in file order
+  - architectures[target]: architectures of a target, in file order
+  - tables[(target, architecture)]: metrics of an architecture, indexed by configuration
+  - numeric_frames[target]: rows of a target with numeric metrics
+  """
+  def __init__(self, df, units=None):
+    self.units = units if units is not None else {}
+    self.metrics = [column for column in df.columns if column not in key_columns]
+    self.targets = []
+    self.architectures = {}
+    self.tables = {}
+    self.numeric_frames = {}
+
+    for target, df_target in df.groupby("Target", sort=False):
+      self.targets.append(target)
+      self.architectures[target] = []
+      for architecture, df_architecture in df_target.groupby("Architecture", sort=False):
+        self.architectures[target].append(architecture)
+        self.tables[(target, architecture)] = df_architecture.drop(columns=["Target", "Architecture"]).set_index("Configuration")
+
+      numeric_frame = df_target.copy()
+      for metric in self.metrics:
+        numeric_frame[metric] = pd.to_numeric(numeric_frame[metric], errors="coerce")
+      self.numeric_frames[target] = numeric_frame
+
+    self.target_set = set(self.targets)
+    self.architecture_sets = {target: set(architectures) for target, architectures in self.architectures.items()}
+
+  def has_target(self, target):
+    return target in self.target_set
+
+  def has_metric(self, metric):
+    return metric in self.metrics
+
+  def get_table(self, target, architecture):
+    """
+    Return the metrics of an architecture for a target, indexed by configuration, or None.
+    """
+    return self.tables.get((target, architecture))
+
+  def get_values(self, target, architecture, metric, configurations):
+    """
+    Return the values of a metric for the given configurations, None where missing.
+    """
+    table = self.tables.get((target, architecture))
+    if table is None or metric not in table.columns:
+      return [None for _ in configurations]
+    values = dict(zip(table.index, table[metric].tolist()))
+    return [values.get(config) for config in configurations]
+
+  def get_configurations(self, target, architectures):
+    """
+    Return the sorted configurations of a target found in any of the architectures.
+    """
+    configurations = set()
+    for architecture in architectures:
+      table = self.tables.get((target, architecture))
+      if table is not None:
+        configurations.update(table.index)
+    return sorted(configurations)
+
+  def get_numeric_frame(self, target, architectures):
+    """
+    Return the rows of a target for the given architectures, with numeric metrics.
+    """
+    df = self.numeric_frames[target]
+    return df[df["Architecture"].isin(architectures)]
@@ -0,0 +1,82 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import pickle
+import pandas as pd
+
+# increment when the content of snapshots changes
+snapshot_version = 1
+
+
+def get_snapshot_file(yaml_path):
+  """
+  Return the path of the snapshot of a result file: a hidden file next to it.
+  """
+  directory, basename = os.path.split(yaml_path)
+  return os.path.join(directory, "." + basename + ".snapshot")
+
+
+def get_snapshot_key(signature):
+  return (snapshot_version, pd.__version__, signature)
+
+
+def load_snapshot(yaml_path, signature):
+  """
+  Return the units and dataframe saved for a result file with the given
+  signature (modification time and size), or None if there is no valid snapshot.
+  """
+  if signature is None:
+    return None
+  try:
+    with open(get_snapshot_file(yaml_path), "rb") as f:
+      snapshot = pickle.load(f)
+    if snapshot["key"] != get_snapshot_key(signature):
+      return None
+    return snapshot["units"], snapshot["df"]
+  except Exception:
+    return None
+
+
+def save_snapshot(yaml_path, signature, units, df):
+  """
+  Save the units and dataframe of a result file, skipped if the result directory is not writable.
+  """
+  if signature is None:
+    return
+  snapshot_file = get_snapshot_file(yaml_path)
+  tmp_file = snapshot_file + ".tmp"
+  try:
+    with open(tmp_file, "wb") as f:
+      pickle.dump({"key": get_snapshot_key(signature), "units": units, "df": df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, snapshot_file)
+  except Exception:
+    try:
+      os.remove(tmp_file)
+    except OSError:
+      pass
+
+
+def remove_snapshot(yaml_path):
+  try:
+    os.remove(get_snapshot_file(yaml_path))
+  except OSError:
+    pass
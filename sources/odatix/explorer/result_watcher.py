@@ -0,0 +1,165 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import sys
+import errno
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+# inotify event masks (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+watch_mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+event_header = struct.Struct("iIII")
+
+# time to wait for other events once a file changed, in seconds, so that a burst of writes causes one reload
+settle_time = 0.2
+
+
+def load_inotify():
+  """
+  Return the C library if it provides inotify, None otherwise.
+  """
+  if not sys.platform.startswith("linux"):
+    return None
+  try:
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+  except (OSError, AttributeError):
+    return None
+
+
+class ResultWatcher:
+  """
+  Watch a result directory in a background thread and call 'on_change(files)'
+  with the names of the files that may have changed, or with None when the
+  whole directory must be checked again.
+  Uses inotify on Linux, and calls 'on_change(None)' every 'interval' seconds
+  on other systems or when inotify is not available.
+  """
+  def __init__(self, path, on_change, interval=2):
+    self.path = path
+    self.on_change = on_change
+    self.interval = interval
+    self.mode = None
+    self.removed = False
+    self.stop_event = threading.Event()
+    self.thread = None
+
+  def start(self):
+    fd = self.open_inotify()
+    if fd is None:
+      self.mode = "polling"
+      target, args = self.poll, ()
+    else:
+      self.mode = "inotify"
+      target, args = self.watch, (fd,)
+    self.thread = threading.Thread(target=target, args=args, name="odatix-result-watcher", daemon=True)
+    self.thread.start()
+
+  def stop(self):
+    self.stop_event.set()
+    if self.thread is not None:
+      self.thread.join()
+
+  def open_inotify(self):
+    libc = load_inotify()
+    if libc is None:
+      return None
+    fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    if fd < 0:
+      return None
+    if libc.inotify_add_watch(fd, os.fsencode(self.path), watch_mask) < 0:
+      os.close(fd)
+      return None
+    return fd
+
+  def read_events(self, fd):
+    """
+    Return the names of the files of the pending events, or None if events were lost.
+    Sets 'removed' if the directory itself was moved or deleted.
+    """
+    names = set()
+    while True:
+      try:
+        buffer = os.read(fd, 65536)
+      except OSError as e:
+        if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+          return names
+        raise
+      offset = 0
+      while offset + event_header.size <= len(buffer):
+        _, mask, _, length = event_header.unpack_from(buffer, offset)
+        offset += event_header.size
+        name = buffer[offset:offset + length].rstrip(b"\0")
+        offset += length
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+          self.removed = True
+        if mask & IN_Q_OVERFLOW:
+          names = None
+        elif name and names is not None:
+          names.add(os.fsdecode(name))
+
+  def watch(self, fd):
+    try:
+      # Files written before the watch was added
+      self.on_change(None)
+      while not self.stop_event.is_set():
+        if not select.select([fd], [], [], self.interval)[0]:
+          continue
+        names = self.read_events(fd)
+        # Wait for the end of a burst of writes
+        while names is not None and select.select([fd], [], [], settle_time)[0]:
+          more_names = self.read_events(fd)
+          names = None if more_names is None else names | more_names
+        if names is None:
+          # Events were lost: check every file
+          self.on_change(None)
+        elif names:
+          self.on_change(names)
+        if self.removed:
+          break
+    finally:
+      os.close(fd)
+    # The watched directory was moved or deleted: poll its path instead
+    if not self.stop_event.is_set():
+      self.mode = "polling"
+      self.poll()
+
+  def poll(self):
+    while not self.stop_event.wait(self.interval):
+      self.on_change(None)
@@ -29,17 +29,20 @@ from os.path import isfile
 from os.path import isdir
 
 from odatix.lib.utils import *
+from odatix.lib.architecture_index import ArchitectureIndex
+from odatix.lib.replace_params import ParamBlock
 import odatix.lib.printc as printc
 
 script_name = os.path.basename(__file__)
 
 odatix_path_pattern = re.compile(r"\$odatix")
+config_pattern = re.compile(r"\$config")
 
 class Architecture:
   def __init__(self, arch_name, arch_display_name, lib_name, target, tmp_script_path, tmp_report_path, tmp_dir, design_path, rtl_path, log_path, arch_path,
                clock_signal, reset_signal, top_level_module, top_level_filename, use_parameters, start_delimiter, stop_delimiter,
                file_copy_enable, file_copy_source, file_copy_dest, script_copy_enable, script_copy_source, 
-               fmax_lower_bound, fmax_upper_bound, param_target_filename, generate_rtl, generate_command, constraint_filename, install_path):
+               fmax_lower_bound, fmax_upper_bound, param_target_filename, generate_rtl, generate_command, constraint_filename, install_path, param_blocks=None):
     self.arch_name = arch_name
     self.arch_display_name = arch_display_name
     self.lib_name = lib_name
@@ -70,6 +73,26 @@ class Architecture:
     self.generate_command = generate_command
     self.constraint_filename = constraint_filename
     self.install_path = install_path
+    self.param_blocks = param_blocks if param_blocks is not None else []
+
+  def get_param_blocks(self, tmp_dir, param_filename):
+    blocks = []
+    if self.use_parameters:
+      blocks.append(ParamBlock.from_file(
+        target_file=os.path.join(tmp_dir, self.param_target_filename),
+        replacement_text_file=param_filename,
+        start_delimiter=self.start_delimiter,
+        stop_delimiter=self.stop_delimiter
+      ))
+    for block in self.param_blocks:
+      blocks.append(ParamBlock.from_file(
+        target_file=os.path.join(tmp_dir, block['param_target_file']),
+        replacement_text_file=block['param_file'],
+        start_delimiter=block['start_delimiter'],
+        stop_delimiter=block['stop_delimiter'],
+        replace_all_occurrences=block['replace_all']
+      ))
+    return blocks
 
   def write_yaml(arch, config_file): 
     yaml_data = {
@@ -102,7 +125,8 @@ class Architecture:
       'generate_rtl': arch.generate_rtl,
       'generate_command': arch.generate_command,
       'constraint_filename': arch.constraint_filename,
-      'install_path': arch.install_path
+      'install_path': arch.install_path,
+      'param_blocks': arch.param_blocks
     }
       
     with open(config_file, 'w') as f:
@@ -147,7 +171,8 @@ class Architecture:
         generate_rtl          = read_from_list("generate_rtl", yaml_data, config_file, script_name=script_name),
         generate_command      = read_from_list("generate_command", yaml_data, config_file, script_name=script_name),
         constraint_filename   = read_from_list("constraint_filename", yaml_data, config_file, script_name=script_name),
-        install_path          = read_from_list("install_path", yaml_data, config_file, script_name=script_name)
+        install_path          = read_from_list("install_path", yaml_data, config_file, script_name=script_name),
+        param_blocks          = read_from_list("param_blocks", yaml_data, config_file, raise_if_missing=False, print_error=False, type=list, script_name=script_name) or []
       )
     except (KeyNotInListError, BadValueInListError):
       return None
@@ -155,7 +180,7 @@ class Architecture:
 
 class ArchitectureHandler:
 
-  def __init__(self, work_path, arch_path, script_path, work_script_path, work_report_path, log_path, process_group, eda_target_filename, fmax_status_filename, frequency_search_filename, param_settings_filename, valid_status, valid_frequency_search, default_fmax_lower_bound, default_fmax_upper_bound, overwrite):
+  def __init__(self, work_path, arch_path, script_path, work_script_path, work_report_path, log_path, process_group, eda_target_filename, fmax_status_filename, frequency_search_filename, param_settings_filename, valid_status, valid_frequency_search, default_fmax_lower_bound, default_fmax_upper_bound, overwrite, index_file=None):
     self.work_path = work_path
     self.arch_path = arch_path
     self.script_path = script_path
@@ -179,6 +204,8 @@ class ArchitectureHandler:
     self.overwrite = overwrite
     self.reset_lists()
 
+    self.index = ArchitectureIndex(index_file)
+
     self.odatix_path = os.path.realpath(os.path.join(self.script_path, ".."))
 
   def reset_lists(self):
@@ -197,69 +224,70 @@ class ArchitectureHandler:
 
     only_one_target = len(targets) == 1
       
-    with open(self.eda_target_filename, 'r') as f:
-      try:
-        settings_data = yaml.load(f, Loader=yaml.loader.SafeLoader)
-      except Exception as e:
-        printc.error("Settings file \"" + self.eda_target_filename + "\" is not a valid YAML file", script_name)
-        printc.cyan("error details: ", end="", script_name=script_name)
-        print(str(e))
-        sys.exit(-1)
-      
-      try:
-        script_copy_enable = read_from_list('script_copy_enable', settings_data, self.eda_target_filename, type=bool, optional=True, script_name=script_name)
-        if script_copy_enable:
-          script_copy_source = read_from_list('script_copy_source', settings_data, self.eda_target_filename, optional=True, script_name=script_name)        
-          script_copy_source = os.path.realpath(re.sub(odatix_path_pattern, self.odatix_path, script_copy_source))
-          if not os.path.isfile(script_copy_source):
-            printc.note("The script source file \"" + script_copy_source + "\" specified in \"" + self.eda_target_filename + "\" does not exist. Script copy disabled.", script_name)
-            raise BadValueInListError
-        else:
+    try:
+      settings_data = self.index.get_settings(self.eda_target_filename)
+    except Exception as e:
+      printc.error("Settings file \"" + self.eda_target_filename + "\" is not a valid YAML file", script_name)
+      printc.cyan("error details: ", end="", script_name=script_name)
+      print(str(e))
+      sys.exit(-1)
+    
+    try:
+      script_copy_enable = read_from_list('script_copy_enable', settings_data, self.eda_target_filename, type=bool, optional=True, script_name=script_name)
+      if script_copy_enable:
+        script_copy_source = read_from_list('script_copy_source', settings_data, self.eda_target_filename, optional=True, script_name=script_name)        
+        script_copy_source = os.path.realpath(re.sub(odatix_path_pattern, self.odatix_path, script_copy_source))
+        if not os.path.isfile(script_copy_source):
+          printc.note("The script source file \"" + script_copy_source + "\" specified in \"" + self.eda_target_filename + "\" does not exist. Script copy disabled.", script_name)
           raise BadValueInListError
-      except (KeyNotInListError, BadValueInListError):
-        script_copy_enable = False
-        script_copy_source = "/dev/null"
+      else:
+        raise BadValueInListError
+    except (KeyNotInListError, BadValueInListError):
+      script_copy_enable = False
+      script_copy_source = "/dev/null"
 
-      try:
-        target_settings = read_from_list("target_settings", settings_data, self.eda_target_filename, optional=True, print_error=False, script_name=script_name)
-      except (KeyNotInListError, BadValueInListError):
-        target_settings = {}
+    try:
+      target_settings = read_from_list("target_settings", settings_data, self.eda_target_filename, optional=True, print_error=False, script_name=script_name)
+    except (KeyNotInListError, BadValueInListError):
+      target_settings = {}
 
-      for target in targets:
-        # Overwrite existing script copy settings if there are target specific settings
-        if target_settings != {}:
+    for target in targets:
+      # Overwrite existing script copy settings if there are target specific settings
+      if target_settings != {}:
+        try:
+          this_target_settings = read_from_list(target, target_settings, self.eda_target_filename, optional=True, parent="target_settings", script_name=script_name)
+        except (KeyNotInListError, BadValueInListError):
+          this_target_settings = {}
+          pass
+        if this_target_settings != {}:
           try:
-            this_target_settings = read_from_list(target, target_settings, self.eda_target_filename, optional=True, parent="target_settings", script_name=script_name)
+            script_copy_enable = read_from_list('script_copy_enable', this_target_settings, self.eda_target_filename, type=bool, optional=True, parent="target_settings/" + target, script_name=script_name)
+            if script_copy_enable:
+              script_copy_source = read_from_list('script_copy_source', this_target_settings, self.eda_target_filename, optional=True, parent="target_settings/" + target, script_name=script_name)        
+              script_copy_source = os.path.realpath(re.sub(odatix_path_pattern, self.odatix_path, script_copy_source))
+
+              if not os.path.isfile(script_copy_source):
+                printc.note("The script source file \"" + script_copy_source + "\" specified in \"" + self.eda_target_filename + "\" does not exist. Script copy disabled.", script_name)
+                raise BadValueInListError
           except (KeyNotInListError, BadValueInListError):
-            this_target_settings = {}
-            pass
-          if this_target_settings != {}:
-            try:
-              script_copy_enable = read_from_list('script_copy_enable', this_target_settings, self.eda_target_filename, type=bool, optional=True, parent="target_settings/" + target, script_name=script_name)
-              if script_copy_enable:
-                script_copy_source = read_from_list('script_copy_source', this_target_settings, self.eda_target_filename, optional=True, parent="target_settings/" + target, script_name=script_name)        
-                script_copy_source = os.path.realpath(re.sub(odatix_path_pattern, self.odatix_path, script_copy_source))
-
-                if not os.path.isfile(script_copy_source):
-                  printc.note("The script source file \"" + script_copy_source + "\" specified in \"" + self.eda_target_filename + "\" does not exist. Script copy disabled.", script_name)
-                  raise BadValueInListError
-            except (KeyNotInListError, BadValueInListError):
-              script_copy_enable = False
-              script_copy_source = "/dev/null"
-
-        for arch in architectures:
-          architecture_instance = self.get_architecture(
-            arch = arch,
-            target = target, 
-            only_one_target = only_one_target, 
-            script_copy_enable = script_copy_enable, 
-            script_copy_source = script_copy_source,
-            synthesis = True,
-            constraint_filename = constraint_filename,
-            install_path = install_path
-          )
-          if architecture_instance is not None:
-            self.architecture_instances.append(architecture_instance)
+            script_copy_enable = False
+            script_copy_source = "/dev/null"
+
+      for arch in architectures:
+        architecture_instance = self.get_architecture(
+          arch = arch,
+          target = target, 
+          only_one_target = only_one_target, 
+          script_copy_enable = script_copy_enable, 
+          script_copy_source = script_copy_source,
+          synthesis = True,
+          constraint_filename = constraint_filename,
+          install_path = install_path
+        )
+        if architecture_instance is not None:
+          self.architecture_instances.append(architecture_instance)
+
+    self.index.save()
 
     return self.architecture_instances
   
@@ -317,74 +345,74 @@ class ArchitectureHandler:
 
     # get settings variables
     settings_filename = self.arch_path + '/' + arch_param_dir + '/' + self.param_settings_filename
-    with open(settings_filename, 'r') as f:
-      try:
-        settings_data = yaml.load(f, Loader=yaml.loader.SafeLoader)
-      except Exception as e:
-        printc.error("Settings file \"" + settings_filename + "\" is not a valid YAML file", script_name)
-        printc.cyan("error details: ", end="", script_name=script_name)
-        print(str(e))
-        self.banned_arch_param.append(arch_param_dir)
-        self.error_archs.append(arch_display_name)
-        return None # if an identifier is missing
-      try:
-        rtl_path           = read_from_list('rtl_path', settings_data, settings_filename, script_name=script_name)
-        top_level_filename = read_from_list('top_level_file', settings_data, settings_filename, script_name=script_name)
-        top_level_module   = read_from_list('top_level_module', settings_data, settings_filename, script_name=script_name)
-        clock_signal       = read_from_list('clock_signal', settings_data, settings_filename, script_name=script_name)
-        reset_signal       = read_from_list('reset_signal', settings_data, settings_filename, script_name=script_name)
-        file_copy_enable   = read_from_list('file_copy_enable', settings_data, settings_filename, type=bool, script_name=script_name)
-        file_copy_source   = read_from_list('file_copy_source', settings_data, settings_filename, script_name=script_name)
-        file_copy_dest     = read_from_list('file_copy_dest', settings_data, settings_filename, script_name=script_name)
-      except (KeyNotInListError, BadValueInListError):
-        self.banned_arch_param.append(arch_param_dir)
-        self.error_archs.append(arch_display_name)
-        return None # if an identifier is missing
+    try:
+      settings_data = self.index.get_settings(settings_filename)
+    except Exception as e:
+      printc.error("Settings file \"" + settings_filename + "\" is not a valid YAML file", script_name)
+      printc.cyan("error details: ", end="", script_name=script_name)
+      print(str(e))
+      self.banned_arch_param.append(arch_param_dir)
+      self.error_archs.append(arch_display_name)
+      return None # if an identifier is missing
 
-      use_parameters, start_delimiter, stop_delimiter = self.get_use_parameters(arch, arch_display_name, settings_data, settings_filename, no_configuration, arch_param_dir=arch_param_dir)
-      if use_parameters is None or start_delimiter is None or stop_delimiter is None:
-        return None
+    try:
+      rtl_path           = read_from_list('rtl_path', settings_data, settings_filename, script_name=script_name)
+      top_level_filename = read_from_list('top_level_file', settings_data, settings_filename, script_name=script_name)
+      top_level_module   = read_from_list('top_level_module', settings_data, settings_filename, script_name=script_name)
+      clock_signal       = read_from_list('clock_signal', settings_data, settings_filename, script_name=script_name)
+      reset_signal       = read_from_list('reset_signal', settings_data, settings_filename, script_name=script_name)
+      file_copy_enable   = read_from_list('file_copy_enable', settings_data, settings_filename, type=bool, script_name=script_name)
+      file_copy_source   = read_from_list('file_copy_source', settings_data, settings_filename, script_name=script_name)
+      file_copy_dest     = read_from_list('file_copy_dest', settings_data, settings_filename, script_name=script_name)
+    except (KeyNotInListError, BadValueInListError):
+      self.banned_arch_param.append(arch_param_dir)
+      self.error_archs.append(arch_display_name)
+      return None # if an identifier is missing
+
+    use_parameters, start_delimiter, stop_delimiter = self.get_use_parameters(arch, arch_display_name, settings_data, settings_filename, no_configuration, arch_param_dir=arch_param_dir)
+    if use_parameters is None or start_delimiter is None or stop_delimiter is None:
+      return None
 
-      generate_command = ""
+    generate_command = ""
+    try:
+      generate_rtl = read_from_list('generate_rtl', settings_data, settings_filename, type=bool, optional=True, print_error=False, script_name=script_name)
+    except (KeyNotInListError, BadValueInListError):
+      generate_rtl = False
+
+    if generate_rtl:
       try:
-        generate_rtl = read_from_list('generate_rtl', settings_data, settings_filename, type=bool, optional=True, print_error=False, script_name=script_name)
+        generate_command = read_from_list('generate_command', settings_data, settings_filename, print_error=False, script_name=script_name)
+        generate_rtl = True
       except (KeyNotInListError, BadValueInListError):
+        printc.error("Cannot find key \"generate_command\" in \"" + settings_filename + "\" while generate_rtl=true", script_name)
+        self.banned_arch_param.append(arch_param_dir)
+        self.error_archs.append(arch_display_name)
         generate_rtl = False
+        return None
 
+    try:
+      design_path = read_from_list('design_path', settings_data, settings_filename, optional=True, print_error=False, script_name=script_name)
+    except (KeyNotInListError, BadValueInListError):
+      design_path = -1
       if generate_rtl:
-        try:
-          generate_command = read_from_list('generate_command', settings_data, settings_filename, print_error=False, script_name=script_name)
-          generate_rtl = True
-        except (KeyNotInListError, BadValueInListError):
-          printc.error("Cannot find key \"generate_command\" in \"" + settings_filename + "\" while generate_rtl=true", script_name)
-          self.banned_arch_param.append(arch_param_dir)
-          self.error_archs.append(arch_display_name)
-          generate_rtl = False
-          return None
-
-      try:
-        design_path = read_from_list('design_path', settings_data, settings_filename, optional=True, print_error=False, script_name=script_name)
-      except (KeyNotInListError, BadValueInListError):
-        design_path = -1
-        if generate_rtl:
-          printc.error("Cannot find key \"design_path\" in \"" + settings_filename + "\" while generate_rtl=true", script_name)
-          self.banned_arch_param.append(arch_param_dir)
-          return None
-      
-      try:
-        param_target_filename = read_from_list('param_target_file', settings_data, settings_filename, optional=True, print_error=False, script_name=script_name)
-        if design_path == -1:
-          printc.error("Cannot find key \"design_path\" in \"" + settings_filename + "\" while param_target_file is defined", script_name)
-          self.banned_arch_param.append(arch_param_dir)
-          return None
-        # check if param target file path exists
-        param_target_file = design_path + '/' + param_target_filename
-        if not isfile(param_target_file): 
-          printc.error("The parameter target file \"" + param_target_filename + "\" specified in \"" + settings_filename + "\" does not exist", script_name)
-          self.banned_arch_param.append(arch_param_dir)
-          return None
-      except (KeyNotInListError, BadValueInListError):
-        param_target_filename = 'rtl/' + top_level_filename
+        printc.error("Cannot find key \"design_path\" in \"" + settings_filename + "\" while generate_rtl=true", script_name)
+        self.banned_arch_param.append(arch_param_dir)
+        return None
+    
+    try:
+      param_target_filename = read_from_list('param_target_file', settings_data, settings_filename, optional=True, print_error=False, script_name=script_name)
+      if design_path == -1:
+        printc.error("Cannot find key \"design_path\" in \"" + settings_filename + "\" while param_target_file is defined", script_name)
+        self.banned_arch_param.append(arch_param_dir)
+        return None
+      # check if param target file path exists
+      param_target_file = design_path + '/' + param_target_filename
+      if not isfile(param_target_file): 
+        printc.error("The parameter target file \"" + param_target_filename + "\" specified in \"" + settings_filename + "\" does not exist", script_name)
+        self.banned_arch_param.append(arch_param_dir)
+        return None
+    except (KeyNotInListError, BadValueInListError):
+      param_target_filename = 'rtl/' + top_level_filename
 
     if not generate_rtl:
       # check if rtl path exists
@@ -402,35 +430,34 @@ class ArchitectureHandler:
         self.error_archs.append(arch_display_name)
         return None
 
-      # check if the top level module name exists in the top level file, at least
-      f = open(top_level, "r")
-      if top_level_module not in f.read():
+      # check if the top level module, clock and reset names exist in the top level file, at least
+      try:
+        module_found, clock_found, reset_found = self.index.find_in_file(top_level, [top_level_module, clock_signal, reset_signal])
+      except Exception as e:
+        printc.error("Could not read top level file \"" + top_level + "\"", script_name)
+        printc.cyan("error details: ", end="", script_name=script_name)
+        print(str(e))
+        self.banned_arch_param.append(arch_param_dir)
+        self.error_archs.append(arch_display_name)
+        return None
+
+      if not module_found:
         printc.error("There is no occurence of top level module name \"" + top_level_module + "\" in top level file \"" + top_level + "\"", script_name)
         self.banned_arch_param.append(arch_param_dir)
         self.error_archs.append(arch_display_name)
-        f.close()
         return None
-      f.close()
       
-      # check if the top clock name exists in the top level file, at least
-      f = open(top_level, "r")
-      if clock_signal not in f.read():
+      if not clock_found:
         printc.error("There is no occurence of clock signal name \"" + clock_signal + "\" in top level file \"" + top_level + "\"", script_name)
         self.banned_arch_param.append(arch_param_dir)
         self.error_archs.append(arch_display_name)
-        f.close()
         return None
-      f.close()
       
-      # check if the top reset name exists in the top level file, at least
-      f = open(top_level, "r")
-      if clock_signal not in f.read():
+      if not reset_found:
         printc.error("There is no occurence of reset signal name \"" + reset_signal + "\" in top level file \"" + top_level + "\"", script_name)
         self.banned_arch_param.append(arch_param_dir)
         self.error_archs.append(arch_display_name)
-        f.close()
         return None
-      f.close()
 
     # check if param file exists
     if not no_configuration:
@@ -440,6 +467,11 @@ class ArchitectureHandler:
         self.error_archs.append(arch_display_name)
         return None
 
+    # get additional parameter blocks
+    param_blocks = self.get_param_blocks(arch_display_name, settings_data, settings_filename, no_configuration, arch_param_dir, arch_suffix)
+    if param_blocks is None:
+      return None
+
     # optional settings
     formatted_bound = ""
     fmax_lower_bound_ok = False
@@ -590,7 +622,8 @@ class ArchitectureHandler:
       stop_delimiter=stop_delimiter,
       generate_command=generate_command,
       constraint_filename=constraint_filename,
-      install_path=install_path
+      install_path=install_path,
+      param_blocks=param_blocks
     )
 
     return arch_instance
@@ -643,6 +676,47 @@ class ArchitectureHandler:
 
     return use_parameters, start_delimiter, stop_delimiter
 
+  def get_param_blocks(self, arch_display_name, settings_data, settings_filename, no_configuration, arch_param_dir, config_name):
+    param_blocks = []
+    block_list = read_from_list('param_blocks', settings_data, settings_filename, optional=True, raise_if_missing=False, print_error=False, script_name=script_name)
+    if not block_list or no_configuration:
+      return param_blocks
+
+    if not isinstance(block_list, list):
+      printc.error("Key \"param_blocks\" in \"" + settings_filename + "\" should be a list", script_name)
+      self.banned_arch_param.append(arch_param_dir)
+      self.error_archs.append(arch_display_name)
+      return None
+
+    for i, block in enumerate(block_list):
+      parent = "param_blocks[" + str(i) + "]"
+      try:
+        param_target_file = read_from_list('param_target_file', block, settings_filename, parent=parent, script_name=script_name)
+        param_file = read_from_list('param_file', block, settings_filename, parent=parent, script_name=script_name)
+        start_delimiter = read_from_list('start_delimiter', block, settings_filename, parent=parent, script_name=script_name)
+        stop_delimiter = read_from_list('stop_delimiter', block, settings_filename, parent=parent, script_name=script_name)
+      except (KeyNotInListError, BadValueInListError, TypeError):
+        self.banned_arch_param.append(arch_param_dir)
+        self.error_archs.append(arch_display_name)
+        return None
+      replace_all = read_from_list('replace_all', block, settings_filename, optional=True, raise_if_missing=False, print_error=False, type=bool, parent=parent, script_name=script_name)
+
+      # check if the parameter file of this configuration exists
+      param_file = os.path.join(self.arch_path, arch_param_dir, config_pattern.sub(lambda match: config_name, param_file))
+      if not isfile(param_file):
+        printc.error("The parameter file \"" + param_file + "\" specified in \"" + settings_filename + "\" does not exist", script_name)
+        self.error_archs.append(arch_display_name)
+        return None
+
+      param_blocks.append({
+        'param_target_file': param_target_file,
+        'param_file': param_file,
+        'start_delimiter': start_delimiter,
+        'stop_delimiter': stop_delimiter,
+        'replace_all': replace_all
+      })
+    return param_blocks
+
   def print_summary(self):
     ArchitectureHandler.print_arch_list(self.new_archs, "New architectures", printc.colors.ENDC)
     ArchitectureHandler.print_arch_list(self.incomplete_archs, "Incomplete results (will be overwritten)", printc.colors.YELLOW)
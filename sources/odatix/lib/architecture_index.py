@@ -0,0 +1,116 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import yaml
+import pickle
+
+import odatix.lib.printc as printc
+
+script_name = os.path.basename(__file__)
+
+index_version = 1
+
+class ArchitectureIndex:
+  """
+  Cache of parsed settings files and top level file checks, shared by all the
+  configurations and targets of a run. Entries are invalidated when the
+  modification time or the size of the file changes.
+  """
+  def __init__(self, cache_file=None):
+    self.cache_file = cache_file
+    self.settings = {}
+    self.occurrences = {}
+    self.modified = False
+    self.load()
+
+  @staticmethod
+  def get_signature(filename):
+    stat = os.stat(filename)
+    return (stat.st_mtime_ns, stat.st_size)
+
+  def load(self):
+    if self.cache_file is None or not os.path.isfile(self.cache_file):
+      return
+    try:
+      with open(self.cache_file, "rb") as f:
+        data = pickle.load(f)
+      if data.get("version") == index_version:
+        self.settings = data["settings"]
+        self.occurrences = data["occurrences"]
+    except Exception:
+      # A corrupted cache is simply rebuilt
+      self.settings = {}
+      self.occurrences = {}
+
+  def save(self):
+    if self.cache_file is None or not self.modified:
+      return
+    tmp_file = self.cache_file + ".tmp"
+    try:
+      cache_dir = os.path.dirname(self.cache_file)
+      if cache_dir != "":
+        os.makedirs(cache_dir, exist_ok=True)
+      with open(tmp_file, "wb") as f:
+        pickle.dump({"version": index_version, "settings": self.settings, "occurrences": self.occurrences}, f, protocol=pickle.HIGHEST_PROTOCOL)
+      os.replace(tmp_file, self.cache_file)
+      self.modified = False
+    except Exception as e:
+      printc.warning('Could not write architecture index "' + self.cache_file + '": ' + str(e), script_name)
+
+  def get_settings(self, filename):
+    """
+    Return the parsed content of a yaml settings file.
+    Raises OSError if the file cannot be read, and yaml.YAMLError if it is not valid.
+    """
+    filename = os.path.realpath(filename)
+    signature = ArchitectureIndex.get_signature(filename)
+    entry = self.settings.get(filename)
+    if entry is not None and entry[0] == signature:
+      return entry[1]
+
+    with open(filename, "r") as f:
+      data = yaml.load(f, Loader=yaml.loader.SafeLoader)
+    self.settings[filename] = (signature, data)
+    self.modified = True
+    return data
+
+  def find_in_file(self, filename, names):
+    """
+    Return a list telling, for each name, if it occurs in the file.
+    The file is read at most once as long as it is not modified.
+    """
+    filename = os.path.realpath(filename)
+    signature = ArchitectureIndex.get_signature(filename)
+    entry = self.occurrences.get(filename)
+    if entry is None or entry[0] != signature:
+      entry = (signature, {})
+      self.occurrences[filename] = entry
+
+    found = entry[1]
+    missing = [name for name in names if name not in found]
+    if missing:
+      with open(filename, "r") as f:
+        content = f.read()
+      for name in missing:
+        found[name] = name in content
+      self.modified = True
+    return [found[name] for name in names]
@@ -0,0 +1,79 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import ast
+import functools
+
+# Functions that can be called in operations
+functions = {
+  "abs": abs,
+  "min": min,
+  "max": max,
+  "round": round,
+  "pow": pow,
+  "int": int,
+  "float": float,
+}
+
+# ast.Num is replaced by ast.Constant since python 3.8
+constant_nodes = tuple(getattr(ast, name) for name in ("Constant", "Num") if hasattr(ast, name))
+
+allowed_nodes = (
+  ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call, ast.keyword, ast.Name, ast.Load,
+  ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.UAdd, ast.USub, ast.Not, ast.And, ast.Or,
+  ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+) + constant_nodes
+
+class UnsafeOperationError(ValueError):
+  pass
+
+class Operation:
+  """
+  Arithmetic expression on metrics, parsed and checked once.
+  Only arithmetic, comparisons, conditional expressions, numbers, metric
+  names and the calls listed in 'functions' are accepted.
+  """
+  def __init__(self, op_str):
+    self.op_str = op_str
+    tree = ast.parse(op_str.strip(), mode="eval")
+    names = []
+    for node in ast.walk(tree):
+      if not isinstance(node, allowed_nodes):
+        raise UnsafeOperationError("unsupported syntax '" + type(node).__name__ + "'")
+      if isinstance(node, ast.Call) and not (isinstance(node.func, ast.Name) and node.func.id in functions):
+        raise UnsafeOperationError("only calls to " + ", ".join(functions) + " are allowed")
+      if isinstance(node, constant_nodes) and not isinstance(getattr(node, "value", getattr(node, "n", None)), (int, float)):
+        raise UnsafeOperationError("only numeric constants are allowed")
+      if isinstance(node, ast.Name) and node.id not in functions and node.id not in names:
+        names.append(node.id)
+    self.names = names
+    self.code = compile(tree, "<operation>", "eval")
+
+  def evaluate(self, values):
+    """
+    Evaluate the operation with the metric values of 'values'.
+    Raises NameError if a metric is missing.
+    """
+    return eval(self.code, {"__builtins__": {}}, dict(functions, **values))
+
+@functools.lru_cache(maxsize=None)
+def get_operation(op_str):
+  return Operation(op_str)
@@ -147,12 +147,13 @@ class ParallelJob:
 ######################################
 
 class ParallelJobHandler:
-  def __init__(self, job_list, nb_jobs=4, process_group=True, auto_exit=False, log_size_limit=100):
+  def __init__(self, job_list, nb_jobs=4, process_group=True, auto_exit=False, log_size_limit=100, retire_callback=None):
     self.job_list = job_list
     self.nb_jobs = nb_jobs
     self.process_group = process_group
     self.auto_exit = auto_exit
     self.log_size_limit = log_size_limit
+    self.retire_callback = retire_callback
 
     self.version = read_version()
 
@@ -405,6 +406,8 @@ class ParallelJobHandler:
     self.running_job_list.remove(job)
     job.progress = progress
     self.retired_job_list.append(job)
+    if self.retire_callback is not None:
+      self.retire_callback(job)
 
   def terminate_all_jobs(self):
     for job in self.running_job_list:
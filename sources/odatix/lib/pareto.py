@@ -0,0 +1,255 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import bisect
+import numpy as np
+
+# All the functions below work on maximization problems.
+# Use to_maximization() to flip the objectives that should be minimized.
+
+MAXIMIZE = "max"
+MINIMIZE = "min"
+
+# number of points compared at once by the skyline of more than 3 objectives
+block_size = 256
+
+# number of points with the best normalized sum of objectives removing the points they
+# dominate before the skyline of more than 3 objectives
+nb_pivots = 32
+
+def to_maximization(values, directions):
+  """
+  Flip the sign of the columns that should be minimized.
+  """
+  values = np.asarray(values, dtype=float)
+  signs = np.array([-1.0 if direction == MINIMIZE else 1.0 for direction in directions])
+  return values * signs
+
+def pareto_mask(values):
+  """
+  Return a boolean mask of the non-dominated rows of 'values' (maximization).
+  Rows containing NaN are never part of the front.
+  """
+  values = np.asarray(values, dtype=float)
+  nb_points = values.shape[0]
+  mask = np.zeros(nb_points, dtype=bool)
+  if nb_points == 0:
+    return mask
+
+  valid = ~np.isnan(values).any(axis=1)
+  indexes = np.nonzero(valid)[0]
+  if len(indexes) == 0:
+    return mask
+
+  # Sort by decreasing first objective: a point can only be dominated by points before it
+  points = values[indexes]
+  order = np.lexsort(tuple(-points[:, i] for i in reversed(range(points.shape[1]))))
+  points = points[order]
+  indexes = indexes[order]
+
+  if points.shape[1] == 2:
+    # Skyline scan: keep points strictly improving the second objective
+    best = np.maximum.accumulate(points[:, 1])
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = points[1:, 1] > best[:-1]
+    mask[indexes[keep]] = True
+    return mask
+
+  if points.shape[1] == 3:
+    keep = skyline_3d(points)
+  else:
+    keep = get_uncovered_by_pivots(points)
+    remaining = np.nonzero(keep)[0]
+    keep[remaining] = skyline_split(points[remaining])
+  mask[indexes[keep]] = True
+  return mask
+
+def get_uncovered_by_pivots(points):
+  """
+  Return the mask of the rows of points sorted in decreasing order that are not covered by
+  one of the pivots before them: a few points good on all objectives, which usually remove
+  most of the points that are not on the front in a single numpy operation per pivot.
+  """
+  span = np.ptp(points, axis=0)
+  span[span == 0] = 1
+  scores = ((points - points.min(axis=0)) / span).sum(axis=1)
+  pivots = np.argsort(-scores, kind="stable")[:nb_pivots]
+  keep = np.ones(len(points), dtype=bool)
+  positions = np.arange(len(points))
+  for pivot in pivots:
+    keep &= ~(np.all(points <= points[pivot], axis=1) & (positions > pivot))
+  return keep
+
+class Staircase:
+  """
+  Non-dominated points of 2 objectives, sorted by increasing first objective
+  (so decreasing second objective): dominance checks are binary searches.
+  """
+  def __init__(self):
+    self.y = []
+    self.z = []
+
+  def covers(self, y, z):
+    """
+    Check if a point of the staircase is at least as good as (y, z) on both objectives.
+    """
+    index = bisect.bisect_left(self.y, y)
+    return index < len(self.y) and self.z[index] >= z
+
+  def add(self, y, z):
+    """
+    Add a point not covered by the staircase, removing the points it dominates.
+    """
+    upper = bisect.bisect_right(self.y, y)
+    lower = upper
+    while lower > 0 and self.z[lower - 1] <= z:
+      lower -= 1
+    self.y[lower:upper] = [y]
+    self.z[lower:upper] = [z]
+
+def skyline_3d(points):
+  """
+  Return the mask of the non-dominated rows of 3 objectives sorted in decreasing order:
+  a point is dominated, or a duplicate, if a point before it is at least as good on the
+  last two objectives. O(n log n).
+  """
+  keep = np.zeros(len(points), dtype=bool)
+  staircase = Staircase()
+  for i, (y, z) in enumerate(points[:, 1:].tolist()):
+    if not staircase.covers(y, z):
+      keep[i] = True
+      staircase.add(y, z)
+  return keep
+
+def skyline_split(points):
+  """
+  Return the mask of the non-dominated rows of points sorted in decreasing order, for
+  any number of objectives. Divide and conquer: the fronts of both halves are computed,
+  then the front of the second half is filtered by the front of the first half, as
+  points can only be dominated by points before them.
+  """
+  if len(points) <= block_size:
+    return skyline_blocks(points)
+  middle = len(points) // 2
+  keep = np.concatenate([skyline_split(points[:middle]), skyline_split(points[middle:])])
+  first = np.nonzero(keep[:middle])[0]
+  second = middle + np.nonzero(keep[middle:])[0]
+  keep[second[get_covered(points[first], points[second])]] = False
+  return keep
+
+def get_covered(front, points):
+  """
+  Return the mask of the rows of 'points' for which a row of 'front' is at least as good
+  on all objectives, knowing that rows of 'front' are at least as good on the first one.
+  """
+  if points.shape[1] == 4:
+    # Sweep by decreasing second objective, points of the front first on ties,
+    # with the staircase of the front on the last two objectives
+    values = np.vstack([front, points])
+    is_point = np.arange(len(values)) >= len(front)
+    order = np.lexsort((is_point, -values[:, 1]))
+    covered = np.zeros(len(values), dtype=bool)
+    staircase = Staircase()
+    for i, z, w in zip(order.tolist(), values[order, 2].tolist(), values[order, 3].tolist()):
+      if staircase.covers(z, w):
+        covered[i] = True
+      elif i < len(front):
+        staircase.add(z, w)
+    return covered[len(front):]
+
+  covered = np.zeros(len(points), dtype=bool)
+  for start in range(0, len(front), block_size):
+    front_block = front[start:start + block_size]
+    covered |= np.all(front_block[:, np.newaxis, :] >= points[np.newaxis, :, :], axis=2).any(axis=0)
+  return covered
+
+def skyline_blocks(points):
+  """
+  Return the mask of the non-dominated rows of a few points sorted in decreasing order:
+  a point can only be dominated by the points before it, compared in a single numpy operation.
+  """
+  covered = np.triu(np.all(points[:, np.newaxis, :] >= points[np.newaxis, :, :], axis=2), k=1)
+  return ~covered.any(axis=0)
+
+def hypervolume(points, reference):
+  """
+  Exact hypervolume dominated by 'points' and bounded by 'reference' (maximization).
+  """
+  points = np.asarray(points, dtype=float)
+  reference = np.asarray(reference, dtype=float)
+  if len(points) == 0:
+    return 0.0
+  points = points[np.all(points > reference, axis=1)]
+  if len(points) == 0:
+    return 0.0
+  points = points[pareto_mask(points)]
+  return _hypervolume(points, reference)
+
+def _hypervolume(points, reference):
+  if points.shape[1] == 1:
+    return float(np.max(points[:, 0]) - reference[0])
+
+  # Slice along the last objective
+  order = np.argsort(-points[:, -1])
+  points = points[order]
+  volume = 0.0
+  for i in range(len(points)):
+    lower = points[i + 1, -1] if i + 1 < len(points) else reference[-1]
+    height = points[i, -1] - lower
+    if height <= 0:
+      continue
+    volume += height * _hypervolume(points[: i + 1, :-1], reference[:-1])
+  return volume
+
+def hypervolume_improvement(candidates, front, reference, nb_samples=4096, rng=None):
+  """
+  Estimate the hypervolume improvement brought by each candidate point over 'front'.
+  The estimation uses a Monte Carlo sampling shared by all candidates.
+  """
+  candidates = np.asarray(candidates, dtype=float)
+  front = np.asarray(front, dtype=float).reshape(-1, candidates.shape[1])
+  reference = np.asarray(reference, dtype=float)
+  if len(candidates) == 0:
+    return np.zeros(0)
+  if rng is None:
+    rng = np.random.RandomState()
+
+  upper = np.max(np.vstack([candidates, front, reference[np.newaxis, :]]), axis=0)
+  box = upper - reference
+  if np.any(box <= 0):
+    return np.zeros(len(candidates))
+  volume = float(np.prod(box))
+
+  samples = reference + rng.random_sample((nb_samples, len(reference))) * box
+
+  # Samples already dominated by the current front do not count
+  if len(front) > 0:
+    dominated = np.zeros(nb_samples, dtype=bool)
+    for point in front:
+      dominated |= np.all(samples <= point, axis=1)
+    samples = samples[~dominated]
+  if len(samples) == 0:
+    return np.zeros(len(candidates))
+
+  improvement = np.empty(len(candidates))
+  for i, candidate in enumerate(candidates):
+    improvement[i] = np.count_nonzero(np.all(samples <= candidate, axis=1))
+  return improvement * volume / nb_samples
@@ -24,11 +24,63 @@ import re
 
 BAD_VALUE = ' /   '
 
+# size of the blocks read when scanning a file from its end
+block_size = 1024 * 1024
+
 def get_re_group_from_file(file, pattern, group_id, bad_value=BAD_VALUE):
-  if os.path.exists(file):
-    for i, line in enumerate(open(file)):
-      for match in re.finditer(pattern, line):
-        parts = pattern.search(match.group())
-        if group_id <= len(parts.groups()):
-          return parts.group(group_id)
-  return bad_value
+  value = scan_file(file, [(pattern, group_id)])[0]
+  return bad_value if value is None else value
+
+def search_line(line, patterns, values):
+  # Try the patterns not found yet on a line, returns the number of new values
+  found = 0
+  for i, (pattern, group_id) in enumerate(patterns):
+    if values[i] is None:
+      match = pattern.search(line)
+      if match and group_id <= len(match.groups()):
+        values[i] = match.group(group_id)
+        found += 1
+  return found
+
+def read_lines_backward(f):
+  # Yield the lines of a binary file, last line first
+  f.seek(0, os.SEEK_END)
+  position = f.tell()
+  remainder = b""
+  while position > 0:
+    size = min(block_size, position)
+    position -= size
+    f.seek(position)
+    lines = (f.read(size) + remainder).split(b"\n")
+    # The first line may continue in the previous block
+    remainder = lines.pop(0)
+    for line in reversed(lines):
+      yield line
+  yield remainder
+
+def scan_file(file, patterns, from_end=False):
+  """
+  Search each (pattern, group_id) of 'patterns' line by line, in a single
+  pass over the file, which stops as soon as all patterns are found.
+  With 'from_end', the file is read backward so that the last occurrence is
+  returned, without reading the beginning of large logs.
+  Returns the list of matched groups, None for the patterns not found.
+  """
+  patterns = [(re.compile(pattern) if isinstance(pattern, str) else pattern, group_id) for pattern, group_id in patterns]
+  values = [None] * len(patterns)
+  if not os.path.exists(file) or not patterns:
+    return values
+  remaining = len(patterns)
+  if from_end:
+    with open(file, "rb") as f:
+      for line in read_lines_backward(f):
+        remaining -= search_line(line.decode(errors="replace"), patterns, values)
+        if remaining == 0:
+          break
+  else:
+    with open(file, "r", errors="replace") as f:
+      for line in f:
+        remaining -= search_line(line, patterns, values)
+        if remaining == 0:
+          break
+  return values
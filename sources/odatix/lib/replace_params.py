@@ -23,11 +23,32 @@ import os
 import re
 import sys
 import argparse
+import functools
+from collections import OrderedDict
 
 import odatix.lib.printc as printc
 
 script_name = os.path.basename(__file__)
 
+class ParamBlock:
+    """
+    Replacement of the content found between two delimiters in a target file.
+    """
+    def __init__(self, target_file, replacement_text, start_delimiter, stop_delimiter, replace_all_occurrences=False, source=""):
+        self.target_file = target_file
+        self.replacement_text = replacement_text
+        self.start_delimiter = start_delimiter
+        self.stop_delimiter = stop_delimiter
+        self.replace_all_occurrences = replace_all_occurrences
+        self.source = source
+        self.pattern = get_pattern(start_delimiter, stop_delimiter)
+        self.match_count = 0
+
+    @staticmethod
+    def from_file(target_file, replacement_text_file, start_delimiter, stop_delimiter, replace_all_occurrences=False):
+        replacement_text = read_file(replacement_text_file)
+        return ParamBlock(target_file, replacement_text, start_delimiter, stop_delimiter, replace_all_occurrences, source=replacement_text_file)
+
 def read_file(file_path):
     try:
         with open(file_path, 'r') as file:
@@ -45,34 +66,71 @@ def write_file(file_path, content):
         printc.error("could not write output file \"" + file_path + "\": " + str(e), script_name)
         sys.exit(1)
 
+@functools.lru_cache(maxsize=None)
+def get_pattern(start_delim, stop_delim):
+    return re.compile(re.escape(start_delim) + '.*?' + re.escape(stop_delim), flags=re.DOTALL)
+
+def apply_block(text, block):
+    replacement = block.start_delimiter + block.replacement_text + block.stop_delimiter
+    count = 0 if block.replace_all_occurrences else 1
+    new_text, block.match_count = block.pattern.subn(lambda match: replacement, text, count=count)
+    return new_text
+
 def replace_content(base_text, replacement_text, start_delim, stop_delim, replace_all_occurrences):
-    pattern = re.escape(start_delim) + '.*?' + re.escape(stop_delim)
+    block = ParamBlock(None, replacement_text, start_delim, stop_delim, replace_all_occurrences)
+    new_text = apply_block(base_text, block)
+    return new_text, block.match_count > 0
+
+def print_not_found(block):
+    printc.warning("could not find pattern \"", script_name=script_name, end="")
+    printc.red(block.start_delimiter, end="")
+    printc.grey("[…]", end="")
+    printc.red(block.stop_delimiter, end="")
+    printc.yellow("\" in \"" + block.target_file + "\"")
+
+def replace_param_blocks(blocks, silent=False):
+    """
+    Apply all the blocks in one pass per target file: each file is read once and
+    written once, blocks being applied in the given order.
+    Returns the list of blocks that did not match.
+    """
+    blocks_by_file = OrderedDict()
+    for block in blocks:
+        blocks_by_file.setdefault(block.target_file, []).append(block)
+
+    not_found = []
+    for target_file, file_blocks in blocks_by_file.items():
+        base_text = read_file(target_file)
+        new_text = base_text
+        for block in file_blocks:
+            new_text = apply_block(new_text, block)
+            if block.match_count == 0:
+                print_not_found(block)
+                not_found.append(block)
+
+        if new_text != base_text:
+            write_file(target_file, new_text)
+
+        if not silent:
+            matched = sum(1 for block in file_blocks if block.match_count > 0)
+            printc.say(str(matched) + "/" + str(len(file_blocks)) + " parameter blocks replaced in \"" + target_file + "\"", script_name)
 
-    match_found = re.search(pattern, base_text, flags=re.DOTALL) is not None
-    
-    if replace_all_occurrences:
-        new_text = re.sub(pattern, start_delim + replacement_text + stop_delim, base_text, flags=re.DOTALL)
-    else:
-        new_text = re.sub(pattern, start_delim + replacement_text + stop_delim, base_text, count=1, flags=re.DOTALL)
-    return new_text, match_found
+    return not_found
 
 def replace_params(base_text_file, replacement_text_file, output_file, start_delimiter, stop_delimiter, replace_all_occurrences=False, silent=False):
     # Read the contents of text files
     base_text = read_file(base_text_file)
-    replacement_text = read_file(replacement_text_file)
+    block = ParamBlock.from_file(base_text_file, replacement_text_file, start_delimiter, stop_delimiter, replace_all_occurrences)
 
     # Replace content between delimiters
-    new_text, match_found = replace_content(base_text, replacement_text, start_delimiter, stop_delimiter, replace_all_occurrences)
+    new_text = apply_block(base_text, block)
+    match_found = block.match_count > 0
 
     # Write the new content to the output file
     write_file(output_file, new_text)
 
     if not match_found:
-        printc.warning("could not find pattern \"", script_name=script_name, end="")
-        printc.red(start_delimiter, end="")
-        printc.grey("[…]", end="")
-        printc.red(stop_delimiter, end="")
-        printc.yellow("\" in \"" + base_text_file + "\"")
+        print_not_found(block)
 
     if not silent and match_found:
         if new_text != base_text:
@@ -0,0 +1,180 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import csv
+import yaml
+import sqlite3
+
+import odatix.lib.printc as printc
+
+script_name = os.path.basename(__file__)
+
+formats = ["yml", "csv", "parquet", "feather", "sqlite"]
+extensions = {"yml": ".yml", "csv": ".csv", "parquet": ".parquet", "feather": ".feather", "sqlite": ".db"}
+
+# Columns identifying a configuration in tabular formats, named as in the explorer dataframes
+key_columns = ["Tool", "Target", "Architecture", "Configuration"]
+
+def get_formats(format):
+  """
+  Return the list of formats to write for the '--format' option value.
+  """
+  if format is None:
+    return ["yml"]
+  if format == "all":
+    return formats
+  return [format]
+
+def get_output_file(output_path, tool, format, prefix="results_"):
+  return os.path.join(output_path, prefix + tool + extensions[format])
+
+def get_metric_names(data):
+  """
+  Return the metrics of all configurations, in order of first appearance.
+  """
+  names = {}
+  for architectures in data.values():
+    for configurations in architectures.values():
+      for metrics in configurations.values():
+        for metric in metrics:
+          names[metric] = None
+  return list(names)
+
+def iterate_rows(tool, data, metric_names):
+  """
+  Yield one row per configuration: key columns followed by the metric values.
+  """
+  for target, architectures in data.items():
+    for architecture, configurations in architectures.items():
+      for configuration, metrics in configurations.items():
+        yield [tool, target, architecture, configuration] + [metrics.get(metric) for metric in metric_names]
+
+def write_yaml(output_file, tool, data, units):
+  with open(output_file, "w") as file:
+    yaml.dump(
+      {"units": units, "fmax_results": data}, file, default_style=None, default_flow_style=False, sort_keys=False
+    )
+
+def write_csv(output_file, tool, data, units):
+  metric_names = get_metric_names(data)
+  with open(output_file, "w", newline="") as file:
+    writer = csv.writer(file)
+    writer.writerow(key_columns + metric_names)
+    for row in iterate_rows(tool, data, metric_names):
+      writer.writerow(["" if value is None else value for value in row])
+
+def get_dataframe(tool, data):
+  import pandas as pd
+
+  metric_names = get_metric_names(data)
+  df = pd.DataFrame(list(iterate_rows(tool, data, metric_names)), columns=key_columns + metric_names)
+
+  # Columnar formats need one type per column: non numeric metrics are stored as strings
+  for metric in metric_names:
+    numeric = pd.to_numeric(df[metric], errors="coerce")
+    if numeric.notna().sum() == df[metric].notna().sum():
+      df[metric] = numeric
+    else:
+      df[metric] = df[metric].map(lambda value: None if value is None else str(value))
+  return df
+
+def write_columnar(output_file, tool, data, units, format):
+  df = get_dataframe(tool, data)
+  if format == "parquet":
+    df.to_parquet(output_file, index=False)
+  else:
+    df.to_feather(output_file)
+
+def write_parquet(output_file, tool, data, units):
+  write_columnar(output_file, tool, data, units, "parquet")
+
+def write_feather(output_file, tool, data, units):
+  write_columnar(output_file, tool, data, units, "feather")
+
+def quote(name):
+  return '"' + str(name).replace('"', '""') + '"'
+
+def write_sqlite(output_file, tool, data, units):
+  """
+  Write a 'results' table with one row per configuration and one column per
+  metric, and a 'units' table.
+  """
+  metric_names = get_metric_names(data)
+  connection = sqlite3.connect(output_file)
+  try:
+    columns = [quote(column) for column in key_columns + metric_names]
+    connection.execute(
+      "CREATE TABLE results (" + ", ".join(columns[:len(key_columns)]) + ", "
+      + ", ".join(columns[len(key_columns):] + ["PRIMARY KEY (" + ", ".join(columns[:len(key_columns)]) + ")"]) + ")"
+    )
+    connection.execute("CREATE TABLE units (Tool, Metric, Unit, PRIMARY KEY (Tool, Metric))")
+    connection.executemany(
+      "INSERT INTO results VALUES (" + ", ".join(["?"] * len(columns)) + ")",
+      iterate_rows(tool, data, metric_names),
+    )
+    connection.executemany("INSERT INTO units VALUES (?, ?, ?)", [(tool, metric, str(unit)) for metric, unit in units.items()])
+    connection.execute("CREATE INDEX results_target ON results (Target)")
+    connection.execute("CREATE INDEX results_architecture ON results (Architecture)")
+    connection.commit()
+  finally:
+    connection.close()
+
+writers = {
+  "yml": write_yaml,
+  "csv": write_csv,
+  "parquet": write_parquet,
+  "feather": write_feather,
+  "sqlite": write_sqlite,
+}
+
+def write_results(output_path, tool, data, units, format, silent=False):
+  """
+  Write the results of a tool in the requested formats.
+  Files are written aside and then moved in place, so readers never see a partial file.
+  Returns False if a format could not be written.
+  """
+  success = True
+  for current_format in get_formats(format):
+    output_file = get_output_file(output_path, tool, current_format)
+    tmp_file = output_file + ".tmp"
+    try:
+      if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+      writers[current_format](tmp_file, tool, data, units)
+      os.replace(tmp_file, output_file)
+      if not silent:
+        printc.say('Results written to "' + output_file + '"', script_name=script_name)
+    except ImportError:
+      success = False
+      if not silent:
+        printc.warning('Could not write "' + output_file + '": missing optional dependency', script_name=script_name)
+        printc.note("Install pyarrow to export results in " + current_format + " format", script_name=script_name)
+    except Exception as e:
+      success = False
+      if not silent:
+        printc.error('Could not write "' + output_file + '"', script_name=script_name)
+        printc.cyan("error details: ", script_name=script_name, end="")
+        print(str(e))
+    finally:
+      if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+  return success
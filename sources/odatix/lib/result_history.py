@@ -0,0 +1,232 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import sqlite3
+import datetime
+import functools
+import subprocess
+
+script_name = os.path.basename(__file__)
+
+history_filename = "history.db"
+
+schema = [
+  """CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    tool_version TEXT,
+    git_revision TEXT,
+    work_path TEXT
+  )""",
+  """CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id),
+    target TEXT NOT NULL,
+    architecture TEXT NOT NULL,
+    configuration TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value
+  )""",
+  """CREATE TABLE IF NOT EXISTS units (
+    tool TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    unit TEXT,
+    PRIMARY KEY (tool, metric)
+  )""",
+  "CREATE INDEX IF NOT EXISTS runs_tool ON runs (tool, run_id)",
+  "CREATE INDEX IF NOT EXISTS results_config ON results (metric, target, architecture, configuration, run_id)",
+  "CREATE INDEX IF NOT EXISTS results_run ON results (run_id)",
+]
+
+def get_git_revision(path="."):
+  """
+  Return the git revision of the design in 'path', or None if it is not a git repository.
+  """
+  try:
+    output = subprocess.run(
+      ["git", "describe", "--always", "--dirty", "--abbrev=12"],
+      cwd=path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True, timeout=10,
+    )
+  except (OSError, subprocess.SubprocessError):
+    return None
+  if output.returncode != 0:
+    return None
+  return output.stdout.strip() or None
+
+@functools.lru_cache(maxsize=None)
+def get_tool_version(version_command, install_path=None):
+  """
+  Return the first line printed by the version command of a tool, or None.
+  The command is run once per process, with the install path of the tool, if any,
+  in TOOL_INSTALL_PATH and at the front of PATH.
+  """
+  if not version_command:
+    return None
+  env = None
+  if install_path is not None:
+    env = dict(os.environ)
+    env["TOOL_INSTALL_PATH"] = install_path
+    env["PATH"] = os.pathsep.join([os.path.join(install_path, "bin"), install_path, env.get("PATH", "")])
+  try:
+    output = subprocess.run(
+      version_command, shell=True, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True, timeout=60,
+    )
+  except (OSError, subprocess.SubprocessError):
+    return None
+  lines = [line.strip() for line in output.stdout.splitlines() if line.strip() != ""]
+  if output.returncode != 0 or not lines:
+    return None
+  return lines[0]
+
+class ResultHistory:
+  """
+  Append-only store of the exported results. Each export is recorded as a
+  run, and each metric of each configuration as a row, so that the value of
+  a metric can be followed across runs with an indexed query.
+  """
+  def __init__(self, db_file):
+    self.db_file = db_file
+    db_dir = os.path.dirname(db_file)
+    if db_dir != "":
+      os.makedirs(db_dir, exist_ok=True)
+    self.connection = sqlite3.connect(db_file)
+    for statement in schema:
+      self.connection.execute(statement)
+    self.connection.commit()
+
+  def close(self):
+    self.connection.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
+
+  def add_run(self, tool, data, units, tool_version=None, git_revision=None, work_path=None):
+    """
+    Record the results of an export. Returns the id of the new run.
+    """
+    timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+    with self.connection:
+      cursor = self.connection.execute(
+        "INSERT INTO runs (timestamp, tool, tool_version, git_revision, work_path) VALUES (?, ?, ?, ?, ?)",
+        (timestamp, tool, tool_version, git_revision, work_path),
+      )
+      run_id = cursor.lastrowid
+      self.connection.executemany(
+        "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)",
+        (
+          (run_id, target, architecture, configuration, metric, value)
+          for target, architectures in data.items()
+          for architecture, configurations in architectures.items()
+          for configuration, metrics in configurations.items()
+          for metric, value in metrics.items()
+          if value is not None and isinstance(value, (int, float, str))
+        ),
+      )
+      self.connection.executemany(
+        "INSERT OR REPLACE INTO units VALUES (?, ?, ?)", ((tool, metric, str(unit)) for metric, unit in units.items())
+      )
+    return run_id
+
+  def get_runs(self, tool=None, last=None):
+    """
+    Return the (run_id, timestamp, tool, tool_version, git_revision) of the runs, newest first.
+    """
+    query = "SELECT run_id, timestamp, tool, tool_version, git_revision FROM runs"
+    parameters = []
+    if tool is not None:
+      query += " WHERE tool = ?"
+      parameters.append(tool)
+    query += " ORDER BY run_id DESC"
+    if last is not None:
+      query += " LIMIT ?"
+      parameters.append(last)
+    return self.connection.execute(query, parameters).fetchall()
+
+  def get_unit(self, tool, metric):
+    row = self.connection.execute("SELECT unit FROM units WHERE tool = ? AND metric = ?", (tool, metric)).fetchone()
+    return row[0] if row is not None else None
+
+  def get_trend(self, metric, tool=None, target=None, architecture=None, configuration=None, last=None):
+    """
+    Return the values of a metric over the last runs, oldest first, as
+    (run_id, timestamp, git_revision, target, architecture, configuration, value).
+    """
+    run_query = "SELECT run_id FROM runs"
+    parameters = []
+    if tool is not None:
+      run_query += " WHERE tool = ?"
+      parameters.append(tool)
+    run_query += " ORDER BY run_id DESC"
+    if last is not None:
+      run_query += " LIMIT ?"
+      parameters.append(last)
+
+    query = (
+      "SELECT results.run_id, runs.timestamp, runs.git_revision, target, architecture, configuration, value"
+      " FROM results JOIN runs ON runs.run_id = results.run_id"
+      " WHERE metric = ? AND results.run_id IN (" + run_query + ")"
+    )
+    parameters = [metric] + parameters
+    for column, value in (("target", target), ("architecture", architecture), ("configuration", configuration)):
+      if value is not None:
+        query += " AND " + column + " = ?"
+        parameters.append(value)
+    query += " ORDER BY target, architecture, configuration, results.run_id"
+    return self.connection.execute(query, parameters).fetchall()
+
+  def get_regressions(self, metric, tool, maximize=True, threshold=0.0):
+    """
+    Compare the last two runs of a tool and return the configurations whose
+    metric got worse by more than 'threshold' percent, as
+    (target, architecture, configuration, previous value, last value, change in percent).
+    """
+    runs = self.get_runs(tool=tool, last=2)
+    if len(runs) < 2:
+      return []
+    last_run, previous_run = runs[0][0], runs[1][0]
+    rows = self.connection.execute(
+      "SELECT last.target, last.architecture, last.configuration, previous.value, last.value"
+      " FROM results AS last JOIN results AS previous"
+      " ON previous.metric = last.metric AND previous.target = last.target"
+      " AND previous.architecture = last.architecture AND previous.configuration = last.configuration"
+      " WHERE last.metric = ? AND last.run_id = ? AND previous.run_id = ?"
+      " ORDER BY last.target, last.architecture, last.configuration",
+      (metric, last_run, previous_run),
+    ).fetchall()
+
+    regressions = []
+    for target, architecture, configuration, previous_value, last_value in rows:
+      try:
+        previous_value = float(previous_value)
+        last_value = float(last_value)
+      except (TypeError, ValueError):
+        continue
+      if previous_value == 0:
+        continue
+      change = (last_value - previous_value) / abs(previous_value) * 100
+      loss = -change if maximize else change
+      if loss > threshold:
+        regressions.append((target, architecture, configuration, previous_value, last_value, change))
+    return regressions
@@ -0,0 +1,135 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import tarfile
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import odatix.lib.printc as printc
+
+script_name = os.path.basename(__file__)
+
+archive_formats = ["gz", "bz2", "xz", "none"]
+archive_basename = "archive.tar"
+
+# Always kept: logs are needed by the cache checks, the others describe the configuration
+default_keep = ["log/*", "settings.yml", "architecture.txt", "target.txt", archive_basename + ".*"]
+
+class RetentionPolicy:
+  """
+  Shrinks the work directory of a completed job: files needed by the metrics
+  of tool.yml and the user keep list are left untouched, files matching the
+  delete list are removed, and everything else is moved to a compressed archive.
+  """
+  def __init__(self, keep=None, delete=None, archive_format="gz", tool_settings=None, nb_workers=2):
+    self.keep = default_keep + RetentionPolicy.get_metric_files(tool_settings) + (keep if keep else [])
+    self.delete = delete if delete else []
+    self.archive_format = archive_format
+    self.executor = ThreadPoolExecutor(max_workers=nb_workers)
+    self.futures = []
+    self.lock = threading.Lock()
+
+  @staticmethod
+  def get_metric_files(tool_settings):
+    files = []
+    if not tool_settings:
+      return files
+    metrics = tool_settings.get("metrics", {}) or {}
+    for content in metrics.values():
+      try:
+        if content["type"] in ["regex", "csv", "yaml"]:
+          file = content["settings"]["file"]
+          if file not in files:
+            files.append(file)
+      except (KeyError, TypeError):
+        continue
+    return files
+
+  @staticmethod
+  def match(rel_path, patterns):
+    basename = os.path.basename(rel_path)
+    for pattern in patterns:
+      if fnmatch.fnmatch(rel_path, pattern):
+        return True
+      if "/" not in pattern and fnmatch.fnmatch(basename, pattern):
+        return True
+    return False
+
+  def apply(self, tmp_dir):
+    """
+    Apply the policy to 'tmp_dir'. Returns the number of archived and deleted files.
+    """
+    to_archive = []
+    to_delete = []
+    for root, dirs, filenames in os.walk(tmp_dir):
+      links = [dir for dir in dirs if os.path.islink(os.path.join(root, dir))]
+      for filename in filenames + links:
+        rel_path = os.path.relpath(os.path.join(root, filename), tmp_dir).replace(os.sep, "/")
+        if RetentionPolicy.match(rel_path, self.keep):
+          continue
+        if RetentionPolicy.match(rel_path, self.delete):
+          to_delete.append(rel_path)
+        elif self.archive_format != "none":
+          to_archive.append(rel_path)
+
+    if to_archive:
+      archive_file = os.path.join(tmp_dir, archive_basename + "." + self.archive_format)
+      with tarfile.open(archive_file, "w:" + self.archive_format) as tar:
+        for rel_path in to_archive:
+          tar.add(os.path.join(tmp_dir, rel_path), arcname=rel_path, recursive=False)
+
+    for rel_path in to_archive + to_delete:
+      os.remove(os.path.join(tmp_dir, rel_path))
+
+    # Remove the directories left empty
+    for root, dirs, filenames in os.walk(tmp_dir, topdown=False):
+      if root != tmp_dir and not os.listdir(root):
+        os.rmdir(root)
+
+    return len(to_archive), len(to_delete)
+
+  def submit(self, job):
+    """
+    Apply the policy in the background to a job that completed successfully.
+    Meant to be used as a retire callback of ParallelJobHandler.
+    """
+    if job.status != "success":
+      return
+    with self.lock:
+      self.futures.append((job.tmp_dir, self.executor.submit(self.apply, job.tmp_dir)))
+
+  def wait(self):
+    with self.lock:
+      futures = self.futures
+      self.futures = []
+    for tmp_dir, future in futures:
+      try:
+        future.result()
+      except Exception as e:
+        printc.error("Could not apply retention policy to \"" + tmp_dir + "\"", script_name)
+        printc.cyan("error details: ", end="", script_name=script_name)
+        print(str(e))
+
+  def shutdown(self):
+    self.wait()
+    self.executor.shutdown(wait=True)
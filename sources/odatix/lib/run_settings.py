@@ -24,6 +24,7 @@ import yaml
 
 import odatix.lib.printc as printc
 from odatix.lib.utils import *
+from odatix.lib.retention import archive_formats as retention_archive_formats
 
 script_name = os.path.basename(__file__)
 
@@ -79,3 +80,38 @@ def get_sim_settings(settings_filename):
     except (KeyNotInListError, BadValueInListError):
       sys.exit(-1) # if a key is missing
   return overwrite, ask_continue, show_log_if_one, nb_jobs, simulations
+
+
+def get_retention_settings(settings_filename):
+  # get the optional retention settings, None if retention is disabled
+  with open(settings_filename, 'r') as f:
+    try:
+      settings_data = yaml.load(f, Loader=yaml.loader.SafeLoader)
+    except Exception:
+      return None
+
+  retention = read_from_list("retention", settings_data, settings_filename, raise_if_missing=False, print_error=False, script_name=script_name)
+  if not retention:
+    return None
+  if not isinstance(retention, dict):
+    printc.error("\"retention\" from settings file \"" + settings_filename + "\" should contain keys", script_name)
+    sys.exit(-1)
+
+  try:
+    enable = read_from_list("enable", retention, settings_filename, type=bool, parent="retention", script_name=script_name)
+  except (KeyNotInListError, BadValueInListError):
+    sys.exit(-1)
+  if not enable:
+    return None
+
+  archive = read_from_list("archive", retention, settings_filename, raise_if_missing=False, print_error=False, parent="retention", script_name=script_name)
+  if not archive:
+    archive = "gz"
+  if archive not in retention_archive_formats:
+    printc.error("Archive format \"" + str(archive) + "\" in \"" + settings_filename + "\" is not supported. Supported formats: " + ", ".join(retention_archive_formats), script_name)
+    sys.exit(-1)
+
+  keep = read_from_list("keep", retention, settings_filename, raise_if_missing=False, print_error=False, type=list, parent="retention", script_name=script_name)
+  delete = read_from_list("delete", retention, settings_filename, raise_if_missing=False, print_error=False, type=list, parent="retention", script_name=script_name)
+
+  return {"archive": archive, "keep": keep if keep else [], "delete": delete if delete else []}
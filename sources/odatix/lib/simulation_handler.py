@@ -163,109 +163,108 @@ class SimulationHandler:
         printc.note("There is no setting file \"" + self.sim_settings_filename + "\" in directory \"" + source_sim_dir + "\"", script_name)
         self.no_settings_sims.append(sim)
       else:
-        with open(settings_filename, 'r') as f:
+        try:
+          settings_data = arch_handler.index.get_settings(settings_filename)
+        except Exception as e:
+          printc.error("Settings file \"" + settings_filename + "\" is not a valid YAML file", script_name)
+          printc.cyan("error details: ", end="", script_name=script_name)
+          print(str(e))
+          self.banned_sim_param.append(sim)
+          self.error_sims.append(sim_display_name)
+          return None # if an identifier is missing
+
+        # get use_parameters, start_delimiter and stop_delimiter
+        use_parameters, start_delimiter, stop_delimiter = arch_handler.get_use_parameters(arch, arch, settings_data, settings_filename, add_to_error_list=False)
+        if use_parameters is None:
+          self.banned_sim_param.append(sim)
+          self.error_sims.append(sim_display_name)
+          return None
+        elif start_delimiter is None or stop_delimiter is None:
+          self.error_sims.append(sim_display_name)
+          return None
+
+        # overwrite architecture settings
+        architecture.use_parameters = use_parameters
+        architecture.start_delimiter = start_delimiter
+        architecture.stop_delimiter = stop_delimiter
+
+        # get param_target_file
+        if use_parameters:
           try:
-            settings_data = yaml.load(f, Loader=yaml.loader.SafeLoader)
-          except Exception as e:
-            printc.error("Settings file \"" + settings_filename + "\" is not a valid YAML file", script_name)
-            printc.cyan("error details: ", end="", script_name=script_name)
-            print(str(e))
-            self.banned_arch_param.append(arch_param_dir)
-            self.error_archs.append(arch_display_name)
-            return None # if an identifier is missing
-
-          # get use_parameters, start_delimiter and stop_delimiter
-          use_parameters, start_delimiter, stop_delimiter = arch_handler.get_use_parameters(arch, arch, settings_data, settings_filename, add_to_error_list=False)
-          if use_parameters is None:
+            param_target_filename = read_from_list('param_target_file', settings_data, settings_filename, script_name=script_name)
+            # check if param target file path exists
+            param_target_file_rtl = architecture.rtl_path + '/' + param_target_filename
+            param_target_file_sim = source_sim_dir + '/' + param_target_filename
+            #if not isfile(param_target_file_rtl) and not isfile(param_target_file_sim): 
+              #printc.warning("The parameter target file \"" + param_target_filename + "\" specified in \"" + settings_filename + "\" does not seem to exist", script_name)
+            # overwrite architecture settings
+            architecture.param_target_filename = param_target_filename
+          except (KeyNotInListError, BadValueInListError):
             self.banned_sim_param.append(sim)
             self.error_sims.append(sim_display_name)
             return None
-          elif start_delimiter is None or stop_delimiter is None:
+
+        # get override_parameters
+        try:
+          override_parameters = read_from_list('override_parameters', settings_data, settings_filename, type=bool, script_name=script_name)
+        except (KeyNotInListError, BadValueInListError):
+          self.banned_sim_param.append(sim)
+          self.error_sims.append(sim_display_name)
+          return None
+
+        if override_parameters:
+          # get override_param_target_file
+          try:
+            override_param_file = read_from_list('override_param_file', settings_data, settings_filename, print_error=False, script_name=script_name)
+          except (KeyNotInListError, BadValueInListError):
+            printc.error("Cannot find key \"override_param_file\" in \"" + settings_filename + "\", while \"override_parameters\" is true", script_name)
+            self.banned_sim_param.append(sim)
             self.error_sims.append(sim_display_name)
             return None
 
-          # overwrite architecture settings
-          architecture.use_parameters = use_parameters
-          architecture.start_delimiter = start_delimiter
-          architecture.stop_delimiter = stop_delimiter
-
-          # get param_target_file
-          if use_parameters:
-            try:
-              param_target_filename = read_from_list('param_target_file', settings_data, settings_filename, script_name=script_name)
-              # check if param target file path exists
-              param_target_file_rtl = architecture.rtl_path + '/' + param_target_filename
-              param_target_file_sim = source_sim_dir + '/' + param_target_filename
-              #if not isfile(param_target_file_rtl) and not isfile(param_target_file_sim): 
-                #printc.warning("The parameter target file \"" + param_target_filename + "\" specified in \"" + settings_filename + "\" does not seem to exist", script_name)
-              # overwrite architecture settings
-              architecture.param_target_filename = param_target_filename
-            except (KeyNotInListError, BadValueInListError):
-              self.banned_sim_param.append(sim)
-              self.error_sims.append(sim_display_name)
-              return None
-
-          # get override_parameters
+          # check if parameter file exists
+          if not isfile(source_sim_dir + '/' + override_param_file):
+            printc.error("There is no parameter file \"" + source_sim_dir + '/' + override_param_file + "\", while override_parameters=true", script_name)
+            self.error_sims.append(sim_display_name)
+            return True
+        
+        if override_parameters:
+          # get start delimiter
           try:
-            override_parameters = read_from_list('override_parameters', settings_data, settings_filename, type=bool, script_name=script_name)
+            override_start_delimiter = read_from_list('override_start_delimiter', settings_data, settings_filename, print_error=False, script_name=script_name)
           except (KeyNotInListError, BadValueInListError):
+            printc.error("Cannot find key \"override_start_delimiter\" in \"" + settings_filename + "\", while \"override_parameters\" is true", script_name)
             self.banned_sim_param.append(sim)
             self.error_sims.append(sim_display_name)
             return None
 
-          if override_parameters:
-            # get override_param_target_file
-            try:
-              override_param_file = read_from_list('override_param_file', settings_data, settings_filename, print_error=False, script_name=script_name)
-            except (KeyNotInListError, BadValueInListError):
-              printc.error("Cannot find key \"override_param_file\" in \"" + settings_filename + "\", while \"override_parameters\" is true", script_name)
-              self.banned_sim_param.append(sim)
-              self.error_sims.append(sim_display_name)
-              return None
-
-            # check if parameter file exists
-            if not isfile(source_sim_dir + '/' + override_param_file):
-              printc.error("There is no parameter file \"" + source_sim_dir + '/' + override_param_file + "\", while override_parameters=true", script_name)
-              self.error_sims.append(sim_display_name)
-              return True
-          
-          if override_parameters:
-            # get start delimiter
-            try:
-              override_start_delimiter = read_from_list('override_start_delimiter', settings_data, settings_filename, print_error=False, script_name=script_name)
-            except (KeyNotInListError, BadValueInListError):
-              printc.error("Cannot find key \"override_start_delimiter\" in \"" + settings_filename + "\", while \"override_parameters\" is true", script_name)
-              self.banned_sim_param.append(sim)
-              self.error_sims.append(sim_display_name)
-              return None
-
-            # get stop delimiter
-            try:
-              override_stop_delimiter = read_from_list('override_stop_delimiter', settings_data, settings_filename, print_error=False, script_name=script_name)
-            except (KeyNotInListError, BadValueInListError):
-              printc.error("Cannot find key \"override_stop_delimiter\" in \"" + settings_filename + "\", while \"override_parameters\" is true", script_name)
-              self.banned_sim_param.append(sim)
-              self.error_sims.append(sim_display_name)
-          else:
-            override_start_delimiter = ""
-            override_stop_delimiter = ""
+          # get stop delimiter
+          try:
+            override_stop_delimiter = read_from_list('override_stop_delimiter', settings_data, settings_filename, print_error=False, script_name=script_name)
+          except (KeyNotInListError, BadValueInListError):
+            printc.error("Cannot find key \"override_stop_delimiter\" in \"" + settings_filename + "\", while \"override_parameters\" is true", script_name)
+            self.banned_sim_param.append(sim)
+            self.error_sims.append(sim_display_name)
+        else:
+          override_start_delimiter = ""
+          override_stop_delimiter = ""
 
-          # get override_param_target_file
-          if override_parameters:
-            try:
-              override_param_target_filename = read_from_list('override_param_target_file', settings_data, settings_filename, script_name=script_name)
-
-              # check if param target file path exists
-              override_param_target_file_rtl = architecture.rtl_path + '/' + override_param_target_filename
-              override_param_target_file_sim = source_sim_dir + '/' + override_param_target_filename
-              #if not isfile(override_param_target_file_rtl) and not isfile(override_param_target_file_sim): 
-                #printc.warning("The override parameter target file \"" + override_param_target_filename + "\" specified in \"" + settings_filename + "\" does not seem to exist", script_name)
-            except (KeyNotInListError, BadValueInListError):
-              self.banned_sim_param.append(sim)
-              self.error_sims.append(sim_display_name)
-              return None
-          else:
-            override_param_target_filename = "/dev/null"
+        # get override_param_target_file
+        if override_parameters:
+          try:
+            override_param_target_filename = read_from_list('override_param_target_file', settings_data, settings_filename, script_name=script_name)
+
+            # check if param target file path exists
+            override_param_target_file_rtl = architecture.rtl_path + '/' + override_param_target_filename
+            override_param_target_file_sim = source_sim_dir + '/' + override_param_target_filename
+            #if not isfile(override_param_target_file_rtl) and not isfile(override_param_target_file_sim): 
+              #printc.warning("The override parameter target file \"" + override_param_target_filename + "\" specified in \"" + settings_filename + "\" does not seem to exist", script_name)
+          except (KeyNotInListError, BadValueInListError):
+            self.banned_sim_param.append(sim)
+            self.error_sims.append(sim_display_name)
+            return None
+        else:
+          override_param_target_filename = "/dev/null"
       
     # check if the architecture is in cache and has a status file
     if isdir(tmp_dir):
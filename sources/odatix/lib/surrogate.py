@@ -0,0 +1,80 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import numpy as np
+
+class GaussianProcess:
+  """
+  Minimal Gaussian process regressor with a squared exponential kernel.
+  Inputs are expected to be normalized in [0, 1].
+  """
+  def __init__(self, length_scale=None, noise=1e-4):
+    self.length_scale = length_scale
+    self.noise = noise
+
+  def kernel(self, a, b):
+    sq_dist = np.sum(a ** 2, axis=1)[:, np.newaxis] + np.sum(b ** 2, axis=1)[np.newaxis, :] - 2 * np.dot(a, b.T)
+    sq_dist = np.maximum(sq_dist, 0)
+    return np.exp(-0.5 * sq_dist / self.fitted_length_scale ** 2)
+
+  def fit(self, x, y):
+    self.x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Standardize outputs
+    self.y_mean = np.mean(y)
+    self.y_std = np.std(y)
+    if self.y_std == 0:
+      self.y_std = 1.0
+    y = (y - self.y_mean) / self.y_std
+
+    # Median heuristic for the length scale
+    if self.length_scale is not None:
+      self.fitted_length_scale = self.length_scale
+    else:
+      diff = self.x[:, np.newaxis, :] - self.x[np.newaxis, :, :]
+      dist = np.sqrt(np.sum(diff ** 2, axis=2))
+      dist = dist[np.triu_indices(len(self.x), k=1)]
+      dist = dist[dist > 0]
+      self.fitted_length_scale = float(np.median(dist)) if len(dist) > 0 else 1.0
+
+    k = self.kernel(self.x, self.x) + self.noise * np.eye(len(self.x))
+    jitter = self.noise
+    while True:
+      try:
+        self.chol = np.linalg.cholesky(k)
+        break
+      except np.linalg.LinAlgError:
+        jitter *= 10
+        k = k + jitter * np.eye(len(self.x))
+    self.alpha = np.linalg.solve(self.chol.T, np.linalg.solve(self.chol, y))
+    return self
+
+  def predict(self, x):
+    """
+    Return the predicted mean and standard deviation for each row of 'x'.
+    """
+    x = np.asarray(x, dtype=float)
+    k_star = self.kernel(x, self.x)
+    mean = np.dot(k_star, self.alpha)
+    v = np.linalg.solve(self.chol, k_star.T)
+    var = np.maximum(1.0 - np.sum(v ** 2, axis=0), 0)
+    return mean * self.y_std + self.y_mean, np.sqrt(var) * self.y_std
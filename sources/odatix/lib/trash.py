@@ -0,0 +1,144 @@
+# ********************************************************************** #
+#                                Odatix                                  #
+# ********************************************************************** #
+#
+# Copyright (C) 2022 Jonathan Saussereau
+#
+# This file is part of Odatix.
+# Odatix is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Odatix is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Odatix. If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import odatix.lib.printc as printc
+
+script_name = os.path.basename(__file__)
+
+trash_dirname = ".trash"
+default_nb_workers = 4
+
+class Trash:
+  """
+  Deletes directories in the background.
+  Directories are first renamed into the trash directory, so the caller only
+  pays for a rename, then removed by a pool of worker threads.
+  """
+  def __init__(self, trash_path=None, nb_workers=default_nb_workers, purge=True):
+    self.trash_path = trash_path
+    self.executor = ThreadPoolExecutor(max_workers=nb_workers)
+    self.futures = []
+    self.empty_dirs = []
+    self.lock = threading.Lock()
+    if purge:
+      self.purge()
+
+  def submit(self, function, *args):
+    with self.lock:
+      self.futures.append(self.executor.submit(function, *args))
+
+  def purge(self):
+    """
+    Remove what a previous (interrupted) run left in the trash
+    """
+    if self.trash_path is None or not os.path.isdir(self.trash_path):
+      return
+    for name in os.listdir(self.trash_path):
+      self.submit(Trash.remove_now, os.path.join(self.trash_path, name))
+
+  def discard(self, path):
+    """
+    Move 'path' to the trash and delete it in the background.
+    Falls back to a synchronous deletion if it cannot be renamed (different filesystem for example).
+    """
+    if not os.path.lexists(path):
+      return
+    if self.trash_path is None:
+      self.remove(path)
+      return
+    trashed_path = os.path.join(self.trash_path, os.path.basename(os.path.normpath(path)) + "-" + uuid.uuid4().hex)
+    try:
+      os.makedirs(self.trash_path, exist_ok=True)
+      os.rename(path, trashed_path)
+    except OSError:
+      Trash.remove_now(path)
+      return
+    self.submit(Trash.remove_now, trashed_path)
+
+  def remove(self, path):
+    """
+    Delete 'path' in the background, in place.
+    The content of directories is split among the workers.
+    """
+    if os.path.isdir(path) and not os.path.islink(path):
+      try:
+        entries = os.listdir(path)
+      except OSError:
+        entries = []
+      for name in entries:
+        self.submit(Trash.remove_now, os.path.join(path, name))
+      with self.lock:
+        self.empty_dirs.append(path)
+    else:
+      self.submit(Trash.remove_now, path)
+
+  @staticmethod
+  def remove_now(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+      shutil.rmtree(path)
+    else:
+      os.remove(path)
+
+  def wait(self):
+    """
+    Wait for all pending deletions. Returns the list of (path, error) that failed.
+    """
+    errors = []
+    while True:
+      with self.lock:
+        futures = self.futures
+        self.futures = []
+      if not futures:
+        break
+      for future in futures:
+        try:
+          future.result()
+        except Exception as e:
+          errors.append((getattr(e, "filename", None), e))
+    with self.lock:
+      empty_dirs = self.empty_dirs
+      self.empty_dirs = []
+    for path in reversed(empty_dirs):
+      try:
+        shutil.rmtree(path)
+      except Exception as e:
+        errors.append((path, e))
+    for path, e in errors:
+      printc.error("Failed to remove \"" + str(path) + "\".", script_name=script_name)
+      printc.cyan("error details: ", end="", script_name=script_name)
+      print(str(e))
+    return errors
+
+  def shutdown(self):
+    errors = self.wait()
+    self.executor.shutdown(wait=True)
+    if self.trash_path is not None:
+      try:
+        os.rmdir(self.trash_path)
+      except OSError:
+        pass
+    return errors
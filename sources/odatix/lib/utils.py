@@ -139,9 +139,18 @@ def ask_yes_no():
     else:
       print("Please enter yes or no")
 
-def create_dir(dir):
+def list_dirs(path):
+  # Sorted subdirectories of path, hidden ones (like the trash) excluded
+  # Directory entries carry their type, so no file needs to be stat'ed
+  with os.scandir(path) as entries:
+    return sorted(entry.name for entry in entries if not entry.name.startswith(".") and entry.is_dir())
+
+def create_dir(dir, trash=None):
   if os.path.isdir(dir):
-    shutil.rmtree(dir)
+    if trash is not None:
+      trash.discard(dir)
+    else:
+      shutil.rmtree(dir)
   os.makedirs(dir)
 
 def internal_error(e, error_logfile, script_name):
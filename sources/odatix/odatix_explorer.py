@@ -32,6 +32,8 @@ from waitress import serve
 import odatix.lib.printc as printc
 import odatix.lib.term_mode as term_mode
 from odatix.explorer.explorer_app import ResultExplorer
+from odatix.explorer.figure_cache import DEFAULT_CACHE_SIZE
+import odatix.explorer.report as report
 
 ######################################
 # Settings
@@ -51,6 +53,11 @@ def add_arguments(parser):
   parser.add_argument('-n', '--network', action='store_true', help='Run the server on the network')
   parser.add_argument('--normal_term_mode', action='store_true', help='Do not change terminal mode')
   parser.add_argument('--safe_mode', action='store_true', help='Do not exit on internal error')
+  parser.add_argument('--cache_size', type=int, default=DEFAULT_CACHE_SIZE, help='Memory used to cache figures, in MiB (default: ' + str(DEFAULT_CACHE_SIZE) + ')')
+  parser.add_argument('-e', '--export', action='store_true', help='Export the figures of all the pages to a static report instead of starting the server')
+  parser.add_argument('-o', '--output', type=str, default=report.DEFAULT_OUTPUT, help='Directory of the exported report (default: ' + report.DEFAULT_OUTPUT + ')')
+  parser.add_argument('-f', '--formats', nargs='+', choices=report.report_formats, default=report.DEFAULT_FORMATS, help='Formats of the exported figures (default: ' + ' '.join(report.DEFAULT_FORMATS) + ')')
+  parser.add_argument('-j', '--jobs', type=int, default=report.DEFAULT_JOBS, help='Number of parallel processes exporting figures (default: number of cpus)')
 
 def parse_arguments():
   parser = argparse.ArgumentParser(description='Odatix - Start Result Explorer')
@@ -86,7 +93,7 @@ def find_free_port(host, start_port):
       port += 1
       attempts += 1
 
-def start_result_explorer(input, network=False, normal_term_mode=False, safe_mode=False):
+def start_result_explorer(input, network=False, normal_term_mode=False, safe_mode=False, cache_size=DEFAULT_CACHE_SIZE):
 
   global ip_address
   global port
@@ -125,7 +132,8 @@ def start_result_explorer(input, network=False, normal_term_mode=False, safe_mod
   result_explorer = ResultExplorer(
     result_path=input,
     old_settings=old_settings,
-    safe_mode=safe_mode
+    safe_mode=safe_mode,
+    cache_size=cache_size
   )
 
   # Start the server
@@ -151,11 +159,17 @@ def main(args=None):
   if args is None:
     args = parse_arguments()
 
+  if args.export:
+    if not report.export_report(args.input, args.output, args.formats, args.jobs):
+      sys.exit(-1)
+    return
+
   network = args.network
   input = args.input
   normal_term_mode = args.normal_term_mode
   safe_mode = args.safe_mode
-  start_result_explorer(input, network, normal_term_mode, safe_mode)
+  cache_size = args.cache_size
+  start_result_explorer(input, network, normal_term_mode, safe_mode, cache_size)
 
 if __name__ == "__main__":
   main()
@@ -32,13 +32,17 @@ sys.path.append(sources_dir)
 from odatix.components.motd import *
 import odatix.components.run_simulations as run_sim
 import odatix.components.run_fmax_synthesis as run_synth
+import odatix.components.run_exploration as run_explore
 import odatix.components.export_results as exp_res
 import odatix.components.export_benchmark as exp_bench
 import odatix.components.clean as cln
+import odatix.components.history as hist
+import odatix.components.merge_results as merge_res
 
 import odatix.lib.settings as settings
 from odatix.lib.settings import OdatixSettings
 import odatix.lib.printc as printc
+import odatix.lib.result_formats as result_formats
 from odatix.lib.utils import *
 
 ######################################
@@ -83,9 +87,13 @@ class ArgParser:
     # Define parser for the 'fmax' command
     ArgParser.fmax_parser = subparsers.add_parser("fmax", help="run fmax synthesis", formatter_class=formatter)
     run_synth.add_arguments(ArgParser.fmax_parser)
-    ArgParser.fmax_parser.add_argument('-e', '--noexport', action='store_true', help='do not export results after synthesis')
     ArgParser.add_nobanner(ArgParser.fmax_parser)
 
+    # Define parser for the 'explore' command
+    ArgParser.explore_parser = subparsers.add_parser("explore", help="explore the pareto front of the design space", formatter_class=formatter)
+    run_explore.add_arguments(ArgParser.explore_parser)
+    ArgParser.add_nobanner(ArgParser.explore_parser)
+
     # Define parser for the 'sim' command
     ArgParser.sim_parser = subparsers.add_parser("sim", help="run simulations", formatter_class=formatter)
     run_sim.add_arguments(ArgParser.sim_parser)
@@ -94,13 +102,18 @@ class ArgParser:
     # Define parser for the 'results' command
     ArgParser.res_parser = subparsers.add_parser("results", help="export benchmark results", formatter_class=formatter)
     ArgParser.res_parser.add_argument("-t", "--tool", default="all", help="eda tool in use, or 'all'")
-    ArgParser.res_parser.add_argument("-f", "--format", choices=["csv", "yml", "all"], help="Output format: csv, yml, or all")
+    ArgParser.res_parser.add_argument("-f", "--format", choices=result_formats.formats + ["all"], help="Output format: " + ", ".join(result_formats.formats) + ", or all")
     ArgParser.res_parser.add_argument("-u", "--use_benchmark", action="store_true", help="Use benchmark values in yaml file")
-    ArgParser.res_parser.add_argument('-b', '--benchmark', choices=['dhrystone'], default=exp_bench.DEFAULT_BENCHMARK, help='benchmark to parse (default: ' + exp_bench.DEFAULT_BENCHMARK + ')')
+    ArgParser.res_parser.add_argument('-b', '--benchmark', default=exp_bench.DEFAULT_BENCHMARK, help='benchmark to parse (default: ' + exp_bench.DEFAULT_BENCHMARK + ')')
     ArgParser.res_parser.add_argument("-B", "--benchmark_file", help="output benchmark file")
     ArgParser.res_parser.add_argument('-S', '--sim_file', default=exp_bench.DEFAULT_SIM_FILE, help='simulation log file (default: ' + exp_bench.DEFAULT_SIM_FILE + ')')
     ArgParser.res_parser.add_argument("-w", "--work", help="simulation work directory")
     ArgParser.res_parser.add_argument("-r", "--respath", help="Result path")
+    ArgParser.res_parser.add_argument("-j", "--jobs", type=int, help="number of parallel extraction jobs (default: number of cpus)")
+    ArgParser.res_parser.add_argument("--targets", nargs="+", help="only export the fmax results of the targets matching these glob patterns")
+    ArgParser.res_parser.add_argument("--archs", nargs="+", help="only export the fmax results of the architectures matching these glob patterns (ex: 'Example*' or 'Example_Counter/*_8bits')")
+    ArgParser.res_parser.add_argument("--full", action="store_true", help="extract all configurations again, ignoring the export manifest")
+    ArgParser.res_parser.add_argument("--nohistory", action="store_true", help="do not record this export in the result history database")
     ArgParser.res_parser.add_argument("-c", "--config", default=OdatixSettings.DEFAULT_SETTINGS_FILE, help="global settings file for Odatix (default: " + OdatixSettings.DEFAULT_SETTINGS_FILE + ")")
     ArgParser.add_nobanner(ArgParser.res_parser)
 
@@ -114,6 +127,16 @@ class ArgParser:
     exp_res.add_arguments(ArgParser.exp_res_parser)
     ArgParser.add_nobanner(ArgParser.exp_res_parser)
 
+    # Define parser for the 'res_merge' command
+    ArgParser.merge_res_parser = subparsers.add_parser("res_merge", help="merge results produced on different machines", formatter_class=formatter)
+    merge_res.add_arguments(ArgParser.merge_res_parser)
+    ArgParser.add_nobanner(ArgParser.merge_res_parser)
+
+    # Define parser for the 'history' command
+    ArgParser.history_parser = subparsers.add_parser("history", help="query the history of exported results", formatter_class=formatter)
+    hist.add_arguments(ArgParser.history_parser)
+    ArgParser.add_nobanner(ArgParser.history_parser)
+
     # Define parser for the 'clean' command
     ArgParser.clean_parser = subparsers.add_parser("clean", help="clean directory", formatter_class=formatter)
     cln.add_arguments(ArgParser.clean_parser)
@@ -130,6 +153,9 @@ class ArgParser:
     printc.bold("Synthesis:\n  ", printc.colors.CYAN, end="")
     ArgParser.fmax_parser.print_help()
     print()
+    printc.bold("Exploration:\n  ", printc.colors.CYAN, end="")
+    ArgParser.explore_parser.print_help()
+    print()
     printc.bold("Simulation:\n  ", printc.colors.CYAN, end="")
     ArgParser.sim_parser.print_help()
     print()
@@ -149,6 +175,15 @@ class ArgParser:
     printc.bold(prog + " res_synth -h", end="")
     print(" for more details")
     print()
+    printc.cyan("- Merge Results:\n  ", end="")
+    print(ArgParser.merge_res_parser.format_usage(), end="")
+    print("  run ", end="")
+    printc.bold(prog + " res_merge -h", end="")
+    print(" for more details")
+    print()
+    printc.bold("History:\n  ", printc.colors.CYAN, end="")
+    ArgParser.history_parser.print_help()
+    print()
     printc.bold("Clean:\n  ", printc.colors.CYAN, end="")
     ArgParser.clean_parser.print_help()
     print()
@@ -204,6 +239,46 @@ def run_fmax_synthesis(args):
         benchmark_file = None,
         work = args.work,
         respath = None,
+        jobs = None,
+        full = False,
+        nohistory = False,
+        targets = None,
+        archs = None,
+        config = args.config,
+      )
+      exp_res.main(newargs)
+    except SystemExit as e:
+      if e.code != EXIT_SUCCESS:
+        success = False
+    except Exception as e:
+      internal_error(e, error_logfile, script_name)
+      success = False
+  return success
+
+def run_exploration(args):
+  success = True
+  try:
+    run_explore.main(args)
+  except SystemExit as e:
+    if e.code != EXIT_SUCCESS:
+      success = False
+  except Exception as e:
+    internal_error(e, error_logfile, script_name)
+    success = False
+  if success and not args.noexport:
+    try:
+      newargs = argparse.Namespace(
+        tool = args.tool,
+        format = exp_res.DEFAULT_FORMAT,
+        use_benchmark = None,
+        benchmark_file = None,
+        work = args.work,
+        respath = args.respath,
+        jobs = None,
+        full = False,
+        nohistory = False,
+        targets = None,
+        archs = None,
         config = args.config,
       )
       exp_res.main(newargs)
@@ -247,6 +322,7 @@ def export_all_results(args):
         sim_file = args.sim_file,
         benchmark_file = args.benchmark_file,
         work = args.work,
+        jobs = args.jobs,
         config = args.config,
       )
       exp_bench.main(newargs)
@@ -266,6 +342,11 @@ def export_all_results(args):
       benchmark_file = args.benchmark_file,
       work = args.work,
       respath = args.respath,
+      jobs = args.jobs,
+      full = args.full,
+      nohistory = args.nohistory,
+      targets = args.targets,
+      archs = args.archs,
       config = args.config,
     )
     exp_res.main(newargs)
@@ -277,6 +358,30 @@ def export_all_results(args):
     success = False
   return success
 
+def merge_results(args):
+  success = True
+  try:
+    merge_res.main(args)
+  except SystemExit as e:
+    if e.code != EXIT_SUCCESS:
+      success = False
+  except Exception as e:
+    internal_error(e, error_logfile, script_name)
+    success = False
+  return success
+
+def query_history(args):
+  success = True
+  try:
+    hist.main(args)
+  except SystemExit as e:
+    if e.code != EXIT_SUCCESS:
+      success = False
+  except Exception as e:
+    internal_error(e, error_logfile, script_name)
+    success = False
+  return success
+
 def clean(args):
   success = True
   try:
@@ -338,12 +443,18 @@ def main(args=None):
     success = run_simulations(args)
   elif args.command == "fmax":
     success = run_fmax_synthesis(args)
+  elif args.command == "explore":
+    success = run_exploration(args)
   elif args.command == "results":
     success = export_all_results(args)
   elif args.command in "res_benchmark":
     success = export_benchmark(args)
   elif args.command in "res_synth":
     success = export_results(args)
+  elif args.command == "res_merge":
+    success = merge_results(args)
+  elif args.command == "history":
+    success = query_history(args)
   elif args.command in "clean":
     success = clean(args)
 